@@ -0,0 +1,61 @@
+"""Адаптивный интервал опроса вместо постоянного RETRY_TIME."""
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value, now=None):
+    """Переводит заголовок Retry-After (секунды или дата) в секунды."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, moment.timestamp() - now)
+
+
+class AdaptivePolicy:
+    """Интервал опроса с границами по состоянию и экспоненциальным ростом.
+
+    После изменения статуса интервал сбрасывается к нижней границе
+    состояния, пока изменений нет — растёт в factor раз до верхней.
+    К результату добавляется случайный разброс ±jitter, чтобы опросы
+    разных получателей не собирались в пачки.
+    """
+
+    def __init__(self, bounds, factor=2.0, jitter=0.1, rand=random.random):
+        if 'idle' not in bounds:
+            raise ValueError('Нужны границы интервала для состояния idle')
+        self.bounds = bounds
+        self.factor = factor
+        self.jitter = jitter
+        self._rand = rand
+        self._intervals = {}
+
+    def next_interval(self, key, state, changed, retry_after=None):
+        """Возвращает задержку до следующего опроса в секундах."""
+        low, high = self.bounds.get(state, self.bounds['idle'])
+        previous = self._intervals.get(key)
+        if changed or previous is None:
+            interval = low
+        else:
+            interval = min(max(previous * self.factor, low), high)
+        self._intervals[key] = interval
+        delay = interval * (1 + self.jitter * (2 * self._rand() - 1))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def carry_from(self, other):
+        """Переносит накопленные интервалы из прежней политики."""
+        self._intervals.update(other._intervals)
+
+    def forget(self, key):
+        """Сбрасывает накопленный интервал получателя."""
+        self._intervals.pop(key, None)
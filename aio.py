@@ -0,0 +1,52 @@
+"""Асинхронный запуск сетевых вызовов с ограничением параллелизма."""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BoundedRunner:
+    """Выполняет вызовы как корутины, не более concurrency одновременно.
+
+    Блокирующие функции (requests, python-telegram-bot) уходят в пул
+    потоков того же размера, корутинные функции ожидаются напрямую.
+    """
+
+    def __init__(self, concurrency):
+        if concurrency < 1:
+            raise ValueError('Параллелизм должен быть не меньше 1')
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.peak = 0
+        self._semaphore = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='homework-io'
+        )
+
+    def _get_semaphore(self):
+        # Семафор создаётся внутри работающего цикла событий.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def call(self, func, *args, **kwargs):
+        """Выполняет func(*args, **kwargs) с учётом лимита параллелизма."""
+        async with self._get_semaphore():
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            try:
+                if asyncio.iscoroutinefunction(func):
+                    return await func(*args, **kwargs)
+                loop = asyncio.get_running_loop()
+                # Контекст задачи (поля лога) переносится в поток пула.
+                context = contextvars.copy_context()
+                return await loop.run_in_executor(
+                    self._executor, context.run,
+                    functools.partial(func, *args, **kwargs)
+                )
+            finally:
+                self.in_flight -= 1
+
+    def close(self):
+        """Останавливает пул потоков."""
+        self._executor.shutdown(wait=False)
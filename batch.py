@@ -0,0 +1,71 @@
+"""Пакетные запросы к API: много получателей за одну операцию."""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class BatchResult:
+    """Итог одного элемента пакета: ответ или ошибка."""
+
+    item: tuple
+    response: object = None
+    error: Exception = None
+
+    @property
+    def ok(self):
+        """Элемент выполнен без ошибки."""
+        return self.error is None
+
+    def get(self):
+        """Возвращает ответ или поднимает ошибку элемента."""
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+class BatchFetcher:
+    """Выполняет пакет запросов через общий пул соединений.
+
+    Запросы пакета идут одновременно, но не больше workers сразу —
+    размер пула соединений, чтобы каждый запрос брал уже открытое
+    keep-alive соединение, а не открывал новое. При workers=0 пакет
+    выполняется по порядку в вызывающем потоке.
+    """
+
+    def __init__(self, workers=0):
+        self.workers = workers
+        self._executor = None
+        if workers:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='homework-batch'
+            )
+
+    def fetch(self, request, items):
+        """Вызывает request(*item) для каждого элемента.
+
+        Результаты возвращаются в порядке items; ошибка одного элемента
+        остаётся в его BatchResult и не прерывает остальные.
+        """
+        items = [tuple(item) for item in items]
+        if self._executor is None or len(items) < 2:
+            return [self._call(request, item) for item in items]
+        futures = [
+            self._executor.submit(
+                contextvars.copy_context().run, self._call, request, item
+            )
+            for item in items
+        ]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _call(request, item):
+        try:
+            return BatchResult(item, request(*item))
+        except Exception as error:
+            return BatchResult(item, error=error)
+
+    def close(self):
+        """Останавливает пул потоков."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
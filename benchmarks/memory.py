@@ -0,0 +1,105 @@
+"""Бенчмарк памяти состояния получателей.
+
+Пример: python benchmarks/memory.py --tenants 10000 100000
+
+Для каждого числа получателей печатает JSON-строку с байтами на
+получателя (по tracemalloc) для компактной модели (Tenant со __slots__,
+коды статусов, курсоры в массиве) и для прежней — словари из
+statuses.json() и обычные объекты.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import make_dataclass
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state import StateStore  # noqa: E402
+from tenants import Tenant, TenantRegistry  # noqa: E402
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+PlainTenant = make_dataclass(
+    'PlainTenant', ['tenant_id', 'token', 'chat_id', 'from_date', 'locale']
+)
+
+
+def response(index, homeworks):
+    """Тело ответа API для получателя, как его возвращает requests."""
+    return json.dumps({'homeworks': [
+        {'id': index * homeworks + number,
+         'homework_name': f'hw-{index}-{number}',
+         'status': STATUSES[(index + number) % len(STATUSES)]}
+        for number in range(homeworks)
+    ], 'current_date': 1_700_000_000 + index})
+
+
+def build_plain(count, homeworks):
+    """Прежняя модель: словари со строками статусов из json."""
+    tenants, cursors, statuses = {}, {}, {}
+    for index in range(count):
+        tenant_id = str(index)
+        tenants[tenant_id] = PlainTenant(tenant_id, f'token-{index}', index,
+                                         0, None)
+        body = json.loads(response(index, homeworks))
+        cursors[tenant_id] = body['current_date']
+        statuses[tenant_id] = {str(homework['id']): homework['status']
+                               for homework in body['homeworks']}
+    return tenants, cursors, statuses
+
+
+def build_compact(count, homeworks):
+    """Компактная модель: реестр и хранилище состояния бота."""
+    registry = TenantRegistry()
+    store = StateStore()
+    for index in range(count):
+        tenant_id = str(index)
+        registry.add(Tenant(tenant_id, f'token-{index}', index))
+        body = json.loads(response(index, homeworks))
+        store.save_cursor(tenant_id, body['current_date'])
+        for homework in body['homeworks']:
+            store.save_status(tenant_id, homework['id'], homework['status'])
+        store.commit()
+    return registry, store
+
+
+def measure(build, count, homeworks):
+    """Байты, которые занимает построенное состояние, на получателя."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    state = build(count, homeworks)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del state
+    return size / count, elapsed
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, nargs='+',
+                        default=[10_000, 100_000])
+    parser.add_argument('--homeworks', type=int, default=3)
+    args = parser.parse_args()
+    for count in args.tenants:
+        result = {'tenants': count, 'homeworks': args.homeworks}
+        for name, build in (('plain', build_plain),
+                            ('compact', build_compact)):
+            per_tenant, elapsed = measure(build, count, args.homeworks)
+            result[f'{name}_bytes_per_tenant'] = round(per_tenant)
+            result[f'{name}_build_seconds'] = round(elapsed, 2)
+        result['saving'] = round(
+            1 - result['compact_bytes_per_tenant']
+            / result['plain_bytes_per_tenant'], 3
+        )
+        print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Бенчмарк отрисовки уведомлений пачками разного размера.
+
+Пример: python benchmarks/render.py --sizes 2000 20000 200000
+
+Для каждого размера пачки печатает JSON-строку: лучшее из repeat
+время render_many в пересчёте на сообщение. Шаблоны собираются один
+раз при загрузке, поэтому время на сообщение не должно расти с пачкой.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from templates import TemplateCatalog  # noqa: E402
+
+CATALOG = {
+    'ru': {
+        'verdicts': {'approved': 'Принято.', 'revision': 'Нужна доработка.'},
+        'messages': {
+            'revision': 'Работа "{homework_name}" ({lesson_name}): {verdict}',
+        },
+    },
+}
+
+
+def per_message(catalog, count, repeat):
+    """Лучшее время отрисовки одного сообщения в пачке из count."""
+    homeworks = [{'homework_name': f'hw{index}', 'lesson_name': 'Спринт 1',
+                  'status': ('approved', 'revision')[index % 2]}
+                 for index in range(count)]
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        catalog.render_many(homeworks)
+        best = min(best, time.perf_counter() - started)
+    return best / count
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[2_000, 20_000, 200_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    catalog = TemplateCatalog(CATALOG)
+    for count in args.sizes:
+        print(json.dumps({
+            'messages': count,
+            'us_per_message': round(
+                per_message(catalog, count, args.repeat) * 1e6, 3
+            ),
+        }))
+
+
+if __name__ == '__main__':
+    main()
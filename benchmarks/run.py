@@ -0,0 +1,193 @@
+"""Бенчмарк бота против локальной заглушки API Практикума и Telegram.
+
+Пример: python benchmarks/run.py --tenants 500 --duration 30 --mode async
+
+Печатает одну JSON-строку с результатом, чтобы сравнивать коммиты:
+опросы и уведомления в секунду, p50/p99 задержки от изменения статуса
+до доставки сообщения и RSS процесса бота.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import homework  # noqa: E402
+import standin  # noqa: E402
+from adaptive import AdaptivePolicy  # noqa: E402
+from cache import ResponseCache  # noqa: E402
+from state import StateStore  # noqa: E402
+from telegram import Bot  # noqa: E402
+from telegram.utils.request import Request  # noqa: E402
+from tenants import Tenant, TenantRegistry  # noqa: E402
+from timerwheel import TimerWheel  # noqa: E402
+from transport import PooledSession  # noqa: E402
+
+
+def run_standin(connection, options):
+    """Запускает заглушку в отдельном процессе и сообщает её порт."""
+    server = standin.serve(standin.StandIn(**options))
+    connection.send(server.server_port)
+    threading.Event().wait()
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированной выборке (None для пустой)."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, round(fraction * (len(values) - 1)))]
+
+
+def rss_mb():
+    """Текущий RSS процесса в мегабайтах."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_commit():
+    """Короткий хеш текущего коммита или None."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def configure(base_url, args):
+    """Настраивает модуль бота на заглушку и собирает получателей."""
+    homework.ENDPOINT = base_url + standin.STATUSES_PATH
+    homework.HTTP_SESSION = PooledSession(max(args.concurrency, 10))
+    homework.RESPONSE_CACHE = ResponseCache()
+    homework.STATE_STORE = StateStore()
+    homework.POLLING_POLICY = AdaptivePolicy({
+        'reviewing': (args.interval, args.interval),
+        'idle': (args.interval, 4 * args.interval),
+    })
+    bot = Bot(token='123456:bench', base_url=base_url + '/bot',
+              request=Request(con_pool_size=4))
+    homework.OUTBOX = homework.build_outbox(bot)
+    homework.OUTBOX.chat_rate = 1000
+    homework.OUTBOX.start()
+    now = int(time.time())
+    registry = TenantRegistry(
+        Tenant(str(index), f'token-{index}', index, now)
+        for index in range(args.tenants)
+    )
+    scheduler = TimerWheel(args.interval)
+    scheduler.spread(registry.ids(), time.time())
+    return bot, registry, scheduler
+
+
+def drive_sync(bot, registry, scheduler, duration):
+    """Опрашивает в одном потоке в течение duration секунд."""
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        homework.poll_due_tenants(bot, registry, scheduler, time.time())
+        next_due = scheduler.next_due() or deadline
+        time.sleep(max(0, min(next_due, deadline) - time.time()))
+
+
+def drive_async(bot, registry, scheduler, duration, concurrency,
+                parse_workers=0):
+    """Опрашивает в asyncio-режиме в течение duration секунд."""
+    runner = homework.BoundedRunner(concurrency)
+    if parse_workers:
+        homework.PARSE_POOL = homework.ParsePool(
+            homework.decode_job, parse_workers
+        )
+
+    async def scenario():
+        try:
+            await asyncio.wait_for(
+                homework.run_polling_async(bot, registry, scheduler, runner),
+                timeout=duration,
+            )
+        except asyncio.TimeoutError:
+            pass
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        runner.close()
+        if homework.PARSE_POOL is not None:
+            homework.PARSE_POOL.close()
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--mode', choices=('sync', 'async'), default='async')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='процессы для разбора ответов (asyncio)')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='нижняя граница интервала опроса, секунды')
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--change-rate', type=float, default=0.05)
+    args = parser.parse_args()
+
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=run_standin, daemon=True, args=(child, {
+            'tenants': args.tenants, 'latency': args.latency,
+            'error_rate': args.error_rate, 'change_rate': args.change_rate,
+        })
+    )
+    process.start()
+    base_url = f'http://127.0.0.1:{parent.recv()}'
+    try:
+        bot, registry, scheduler = configure(base_url, args)
+        started = time.time()
+        if args.mode == 'sync':
+            drive_sync(bot, registry, scheduler, args.duration)
+        else:
+            drive_async(bot, registry, scheduler, args.duration,
+                        args.concurrency, args.parse_workers)
+        homework.OUTBOX.stop(timeout=5)
+        elapsed = time.time() - started
+        with urllib.request.urlopen(base_url + '/_stats') as response:
+            stats = json.load(response)
+    finally:
+        process.terminate()
+    latencies = stats['latencies']
+    p50, p99 = percentile(latencies, 0.5), percentile(latencies, 0.99)
+    print(json.dumps({
+        'commit': current_commit(),
+        'mode': args.mode,
+        'tenants': args.tenants,
+        'duration': round(elapsed, 2),
+        'polls_per_sec': round(stats['polls'] / elapsed, 2),
+        'notifications_per_sec': round(stats['sends'] / elapsed, 2),
+        'api_errors': stats['errors'],
+        'latency_p50': None if p50 is None else round(p50, 3),
+        'latency_p99': None if p99 is None else round(p99, 3),
+        'rss_mb': round(rss_mb(), 1),
+        'pool': homework.HTTP_SESSION.stats(),
+        'cache_hits': homework.RESPONSE_CACHE.hits,
+    }, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Бенчмарк планировщика опроса на миллионе получателей.
+
+Пример: python benchmarks/scheduler.py --tenants 1000000
+
+Для колеса таймеров и кучи печатает JSON-строку: время расстановки,
+переноса и отмены сроков в пересчёте на операцию и время pop_due на
+каждую секунду периода. Время симулированное: p99 и максимум pop_due
+показывают, сколько планировщик отнимает у цикла опроса за тик и
+насколько из-за него опаздывает самый поздний опрос тика.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tenants import PollScheduler  # noqa: E402
+from timerwheel import TimerWheel  # noqa: E402
+
+START = 1_700_000_000
+
+
+def percentile(values, share):
+    """Значение перцентиля share из отсортированного списка."""
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def run(scheduler, tenants, period, seed):
+    """Прогоняет один период опроса и возвращает замеры."""
+    rnd = random.Random(seed)
+    ids = [str(index) for index in range(tenants)]
+    result = {'scheduler': type(scheduler).__name__, 'tenants': tenants}
+
+    started = time.perf_counter()
+    scheduler.spread(ids, START)
+    result['spread_us_per_op'] = round(
+        (time.perf_counter() - started) / tenants * 1e6, 3
+    )
+
+    moved = rnd.sample(ids, tenants // 10)
+    started = time.perf_counter()
+    for tenant_id in moved:
+        scheduler.schedule(tenant_id, START + rnd.uniform(0, period))
+    result['reschedule_us_per_op'] = round(
+        (time.perf_counter() - started) / len(moved) * 1e6, 3
+    )
+
+    cancelled = moved[:len(moved) // 10]
+    started = time.perf_counter()
+    for tenant_id in cancelled:
+        scheduler.cancel(tenant_id)
+    result['cancel_us_per_op'] = round(
+        (time.perf_counter() - started) / len(cancelled) * 1e6, 3
+    )
+
+    ticks, popped = [], 0
+    for second in range(1, period + 1):
+        now = START + second
+        started = time.perf_counter()
+        due = scheduler.pop_due(now)
+        for tenant_id, _ in due:
+            scheduler.schedule(tenant_id, now + period * rnd.uniform(1, 4))
+        ticks.append(time.perf_counter() - started)
+        popped += len(due)
+    ticks.sort()
+    result['popped'] = popped
+    result['tick_p50_ms'] = round(percentile(ticks, 0.5) * 1e3, 3)
+    result['tick_p99_ms'] = round(percentile(ticks, 0.99) * 1e3, 3)
+    result['tick_max_ms'] = round(ticks[-1] * 1e3, 3)
+    result['pending'] = len(scheduler)
+    return result
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=1_000_000)
+    parser.add_argument('--period', type=int, default=600)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    for scheduler in (TimerWheel(args.period), PollScheduler(args.period)):
+        print(json.dumps(run(scheduler, args.tenants, args.period,
+                             args.seed)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Локальная замена API Практикума и Telegram Bot API для бенчмарков.
+
+Запуск отдельно: python benchmarks/standin.py --port 8080 --tenants 100
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STATUSES_PATH = '/api/user_api/homework_statuses/'
+CYCLE = {'reviewing': 'rejected', 'rejected': 'reviewing',
+         'approved': 'reviewing'}
+NAME = re.compile(r'"([^"]+)"')
+
+
+class StandIn:
+    """Состояние заглушки: работы студентов, изменения и статистика.
+
+    latency — задержка каждого ответа в секундах, error_rate — доля
+    ответов API с кодом 500, change_rate — число изменений статуса
+    в секунду на одного студента.
+    """
+
+    def __init__(self, tenants, homeworks=3, latency=0.0, error_rate=0.0,
+                 change_rate=0.01, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.change_rate = change_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._homeworks = {
+            f'token-{tenant}': [
+                {'id': tenant * homeworks + index,
+                 'homework_name': f'hw-{tenant}-{index}',
+                 'status': 'reviewing', 'date_updated': 0}
+                for index in range(homeworks)
+            ]
+            for tenant in range(tenants)
+        }
+        self._changed_at = {}
+        self.latencies = []
+        self.polls = 0
+        self.errors = 0
+        self.sends = 0
+        self.started = time.time()
+
+    def tick(self, interval):
+        """Меняет статусы случайных работ за прошедший interval."""
+        now = time.time()
+        probability = self.change_rate * interval
+        with self._lock:
+            for homeworks in self._homeworks.values():
+                if self._random.random() >= probability:
+                    continue
+                homework = self._random.choice(homeworks)
+                homework['status'] = CYCLE[homework['status']]
+                homework['date_updated'] = now
+                self._changed_at.setdefault(homework['homework_name'], now)
+
+    def statuses(self, token, from_date):
+        """Возвращает (код, тело) ответа API для токена."""
+        with self._lock:
+            self.polls += 1
+            if self._random.random() < self.error_rate:
+                self.errors += 1
+                return 500, {'message': 'Internal error'}
+            homeworks = self._homeworks.get(token)
+            if homeworks is None:
+                return 401, {'message': 'Учетные данные не были предоставлены.'}
+            return 200, {
+                'homeworks': [
+                    {key: value for key, value in homework.items()
+                     if key != 'date_updated'}
+                    for homework in homeworks
+                    if homework['date_updated'] >= from_date
+                ],
+                'current_date': int(time.time()),
+            }
+
+    def message(self, chat_id, text):
+        """Учитывает сообщение бота и задержку от изменения статуса."""
+        now = time.time()
+        with self._lock:
+            self.sends += 1
+            for name in NAME.findall(text):
+                changed_at = self._changed_at.pop(name, None)
+                if changed_at is not None:
+                    self.latencies.append(now - changed_at)
+            return {'message_id': self.sends, 'date': int(now),
+                    'chat': {'id': chat_id, 'type': 'private'},
+                    'text': text}
+
+    def stats(self):
+        """Сводка: опросы, ошибки, отправки и задержки доставки."""
+        with self._lock:
+            return {'polls': self.polls, 'errors': self.errors,
+                    'sends': self.sends, 'latencies': list(self.latencies),
+                    'elapsed': time.time() - self.started}
+
+
+def make_handler(standin):
+    """Создаёт обработчик HTTP-запросов к заглушке."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, code, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/_stats':
+                self._reply(200, standin.stats())
+                return
+            if url.path != STATUSES_PATH:
+                self._reply(404, {'message': 'Not found'})
+                return
+            time.sleep(standin.latency)
+            token = self.headers.get('Authorization', '')[len('OAuth '):]
+            query = parse_qs(url.query)
+            from_date = float(query.get('from_date', ['0'])[0])
+            self._reply(*standin.statuses(token, from_date))
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            raw = self.rfile.read(length).decode('utf-8')
+            if not self.path.endswith('/sendMessage'):
+                self._reply(404, {'ok': False, 'description': 'Not found'})
+                return
+            time.sleep(standin.latency)
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                data = {key: values[0]
+                        for key, values in parse_qs(raw).items()}
+            result = standin.message(int(data['chat_id']), data['text'])
+            self._reply(200, {'ok': True, 'result': result})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(standin, port=0, host='127.0.0.1', tick=0.1):
+    """Запускает заглушку в фоновых потоках и возвращает сервер."""
+    server = ThreadingHTTPServer((host, port), make_handler(standin))
+    server.daemon_threads = True
+    stop = threading.Event()
+
+    def changes():
+        while not stop.wait(tick):
+            standin.tick(tick)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threading.Thread(target=changes, daemon=True).start()
+    server.stop_changes = stop.set
+    return server
+
+
+def main():
+    """Запускает заглушку из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--change-rate', type=float, default=0.01)
+    args = parser.parse_args()
+    server = serve(StandIn(args.tenants, latency=args.latency,
+                           error_rate=args.error_rate,
+                           change_rate=args.change_rate), args.port)
+    print(f'Заглушка слушает http://127.0.0.1:{server.server_port}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
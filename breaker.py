@@ -0,0 +1,113 @@
+"""Предохранитель для запросов к API и фильтр повторных ошибок."""
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Предохранитель: closed → open после серии сбоев → half_open.
+
+    В состоянии open запросы не выполняются recovery_timeout секунд,
+    затем пропускается один пробный запрос (half_open). Его успех
+    замыкает цепь, сбой снова размыкает её.
+    """
+
+    def __init__(self, failure_threshold=5, recovery_timeout=60.0,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._clock = clock
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Можно ли выполнить запрос сейчас."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if self.retry_after() > 0:
+                    return False
+                self.state = HALF_OPEN
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def retry_after(self):
+        """Сколько секунд осталось до пробного запроса."""
+        if self._opened_at is None:
+            return 0.0
+        return max(
+            0.0, self._opened_at + self.recovery_timeout - self._clock()
+        )
+
+    def record_success(self):
+        """Отмечает успешный запрос; True, если цепь только что замкнулась."""
+        with self._lock:
+            recovered = self.state != CLOSED
+            self.state = CLOSED
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+            return recovered
+
+    def record_failure(self):
+        """Отмечает сбой; True, если цепь только что разомкнулась."""
+        with self._lock:
+            self._probing = False
+            self.failures += 1
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED
+                and self.failures >= self.failure_threshold
+            ):
+                self.state = OPEN
+                self._opened_at = self._clock()
+                return True
+            return False
+
+
+class ErrorNotifier:
+    """Подавляет одинаковые сообщения об ошибке в пределах окна.
+
+    Запоминает, кому сообщали об ошибках, чтобы после восстановления
+    отправить каждому ровно одно сообщение об этом.
+    """
+
+    def __init__(self, window=3600.0, clock=time.monotonic):
+        self.window = window
+        self._clock = clock
+        self._last_sent = {}
+        self._lock = threading.Lock()
+
+    def should_report(self, key, message):
+        """True, если такая ошибка для key не сообщалась в окне.
+
+        message — текст ошибки или любой другой её ключ.
+        """
+        now = self._clock()
+        with self._lock:
+            sent = self._last_sent.setdefault(key, {})
+            last = sent.get(message)
+            if last is not None and now - last < self.window:
+                return False
+            sent[message] = now
+            return True
+
+    def recovered(self, key):
+        """True, если key сообщали об ошибке; забывает эти ошибки."""
+        with self._lock:
+            return self._last_sent.pop(key, None) is not None
+
+    def recovered_all(self):
+        """Возвращает всех, кому сообщали об ошибках, и забывает их."""
+        with self._lock:
+            keys = list(self._last_sent)
+            self._last_sent.clear()
+            return keys
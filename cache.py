@@ -0,0 +1,108 @@
+"""Кеш ответов API для опросов, в которых ничего не изменилось.
+
+Для каждого получателя запоминаются валидаторы последнего успешно
+обработанного ответа: ETag и Last-Modified (если API их прислал) и хеш
+тела без поля current_date. Валидаторы отправляются в условном запросе
+только при том же from_date — иначе это другой URL. Совпадение хеша
+проверяется при любом from_date: то же тело значит те же работы, а их
+статусы уже сверены, поэтому ответ можно не разбирать вовсе.
+
+Запись становится действующей только после confirm(), то есть после
+того как ответ разобран и статусы сохранены: ответ, обработка которого
+упала, не будет пропущен при следующем опросе.
+"""
+import hashlib
+import re
+import threading
+from dataclasses import dataclass
+
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(-?\d+)')
+
+
+@dataclass
+class Unchanged:
+    """Ответ совпал с уже обработанным; current_date — новый курсор."""
+
+    current_date: int = None
+
+
+@dataclass
+class _Entry:
+    from_date: int
+    digest: bytes
+    etag: str = None
+    last_modified: str = None
+
+
+def body_digest(body):
+    """Хеш тела ответа без current_date и значение current_date."""
+    match = CURRENT_DATE.search(body)
+    if match is None:
+        return hashlib.blake2b(body, digest_size=16).digest(), None
+    masked = body[:match.start(1)] + body[match.end(1):]
+    return (hashlib.blake2b(masked, digest_size=16).digest(),
+            int(match.group(1)))
+
+
+class ResponseCache:
+    """Валидаторы последних ответов API по получателям."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def conditional_headers(self, key, from_date):
+        """Заголовки условного запроса для получателя или пустой словарь."""
+        entry = self._entries.get(key)
+        if entry is None or entry.from_date != from_date:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def not_modified(self, key):
+        """Учитывает ответ 304 и возвращает Unchanged без сдвига курсора."""
+        with self._lock:
+            self.hits += 1
+            self._pending.pop(key, None)
+        return Unchanged()
+
+    def check(self, key, from_date, body, headers=None):
+        """Сверяет тело ответа с последним обработанным.
+
+        Возвращает Unchanged, если тело совпало, иначе None и запоминает
+        ответ как ожидающий подтверждения.
+        """
+        digest, current_date = body_digest(body)
+        headers = headers or {}
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.digest == digest:
+                self.hits += 1
+                self._pending.pop(key, None)
+                return Unchanged(current_date)
+            self.misses += 1
+            self._pending[key] = _Entry(
+                from_date, digest, headers.get('ETag'),
+                headers.get('Last-Modified')
+            )
+        return None
+
+    def confirm(self, key):
+        """Делает действующим ответ, который успешно обработан."""
+        with self._lock:
+            entry = self._pending.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+
+    def forget(self, key):
+        """Удаляет записи получателя."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._pending.pop(key, None)
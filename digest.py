@@ -0,0 +1,134 @@
+"""Сводки уведомлений для чатов, которые следят за многими студентами."""
+import logging
+import threading
+import time
+
+
+class DigestBuffer:
+    """Копит уведомления чатов-сводок и отдаёт их пачкой раз в окно.
+
+    windows — окно в секундах для каждого чата, включившего сводку.
+    Окно открывается первым уведомлением; когда оно истекает, всё
+    накопленное уходит одним вызовом flush(chat_id, messages, on_failed),
+    который выполняет отдельный поток. Остальные чаты add() не трогает.
+
+    on_failed сводки однократно вызывает обработчики всех вошедших в неё
+    уведомлений; он же вызывается, если flush завершился ошибкой.
+    """
+
+    def __init__(self, windows, flush, clock=time.monotonic):
+        self.windows = windows
+        self._flush = flush
+        self._clock = clock
+        self._buffers = {}
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self.stats = {'buffered': 0, 'digests': 0}
+
+    @property
+    def windows(self):
+        """Окна сводок по чатам."""
+        return self._windows
+
+    @windows.setter
+    def windows(self, windows):
+        # Ключи — строки: chat_id приходит и числом, и строкой из .env.
+        self._windows = {str(chat_id): float(window)
+                         for chat_id, window in (windows or {}).items()}
+
+    def add(self, chat_id, message, on_failed=None):
+        """Откладывает уведомление; False, если у чата нет сводки.
+
+        on_failed вызывается, если сводка так и не будет доставлена.
+        """
+        window = self._windows.get(str(chat_id))
+        if not window:
+            return False
+        with self._condition:
+            entry = self._buffers.get(chat_id)
+            if entry is None:
+                entry = self._buffers[chat_id] = [
+                    self._clock() + window, [], []
+                ]
+                self._condition.notify()
+            entry[1].append(message)
+            if on_failed is not None:
+                entry[2].append(on_failed)
+            self.stats['buffered'] += 1
+        return True
+
+    def pending(self):
+        """Число отложенных уведомлений."""
+        with self._condition:
+            return sum(len(entry[1]) for entry in self._buffers.values())
+
+    def flush_due(self, now=None):
+        """Отправляет сводки чатов, у которых истекло окно."""
+        now = self._clock() if now is None else now
+        with self._condition:
+            due = [chat_id for chat_id, entry in self._buffers.items()
+                   if entry[0] <= now]
+            batches = [(chat_id, *self._buffers.pop(chat_id)[1:])
+                       for chat_id in due]
+        for chat_id, messages, callbacks in batches:
+            on_failed = self._failure_handler(callbacks)
+            try:
+                self._flush(chat_id, messages, on_failed)
+                self.stats['digests'] += 1
+            except Exception as error:
+                logging.error(f'{error}, Бот не отправил сводку '
+                              f'в чат {chat_id}', exc_info=True)
+                on_failed()
+
+    @staticmethod
+    def _failure_handler(callbacks):
+        """Обработчик недоставки сводки, срабатывающий один раз.
+
+        Сводка может уйти несколькими сообщениями, и каждое из них
+        может не дойти.
+        """
+        def on_failed():
+            while callbacks:
+                callback = callbacks.pop(0)
+                try:
+                    callback()
+                except Exception as error:
+                    logging.error(f'{error}, не удалось вернуть состояние '
+                                  f'недоставленной сводки', exc_info=True)
+        return on_failed
+
+    def _next_wait(self):
+        if not self._buffers:
+            return None
+        return min(entry[0] for entry in self._buffers.values()) - (
+            self._clock()
+        )
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    wait = self._next_wait()
+                    if wait is not None and wait <= 0:
+                        break
+                    self._condition.wait(timeout=wait)
+                if self._stopping:
+                    return
+            self.flush_due()
+
+    def start(self):
+        """Запускает поток отправки сводок."""
+        self._thread = threading.Thread(
+            target=self._run, name='telegram-digest', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает поток и сразу отправляет все накопленные сводки."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush_due(float('inf'))
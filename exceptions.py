@@ -4,4 +4,28 @@
 class StatusCodeError(Exception):
     """Исключение при неверном статусе дз."""
 
+    def __init__(self, message='', status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TooManyRequestsError(StatusCodeError):
+    """Исключение при ограничении частоты запросов к API."""
+
+    def __init__(self, message, retry_after=None, status_code=429):
+        super().__init__(message, status_code)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """Исключение, когда опрос API приостановлен после серии сбоев."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UnknownStatusError(ValueError):
+    """Исключение при недокументированном статусе домашней работы."""
+
     pass
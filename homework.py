@@ -1,21 +1,200 @@
+import asyncio
+import functools
+import itertools
+import json
 import logging
 import os
+import signal
+import socket
+import sys
+import threading
 import time
+from http import HTTPStatus
 
-import requests
-from telegram import Bot, TelegramError
-from dotenv import load_dotenv
-from requests import RequestException
+from adaptive import AdaptivePolicy, parse_retry_after
+from aio import BoundedRunner
+from batch import BatchFetcher
+from breaker import CircuitBreaker, ErrorNotifier
+from cache import ResponseCache, Unchanged
+from digest import DigestBuffer
+from exceptions import (CircuitOpenError, StatusCodeError,
+                        TooManyRequestsError, UnknownStatusError)
+from logpipe import LogPipeline, RedactingFilter, log_context
+from metrics import Registry, start_http_server
+from outbox import Outbox
+from parallel import ParsePool
+from schema import Field, Schema, describe
+from sharding import ShardManager, SQLiteCoordinator
+from snapshots import SnapshotCache
+from startup import (LazyObject, format_import_profile, lazy_import,
+                     profile_imports)
+from state import SQLiteStateStore, StateStore, open_state_store
+from streaming import HomeworkStream
+from templates import TemplateCatalog
+from tenants import Tenant, TenantRegistry
+from timerwheel import TimerWheel
+from transport import PooledSession
+from webhook import start_webhook_server
 
-from exceptions import (StatusCodeError)
+# Тяжёлые зависимости загружаются при первом обращении, а не при старте.
+requests = lazy_import('requests')
+telegram = lazy_import('telegram')
 
-load_dotenv()
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+
+def load_env(override=False):
+    """Функция читает переменные из .env, если файл есть.
+
+    python-dotenv импортируется, только когда файл нашёлся.
+    """
+    if os.path.exists(ENV_FILE):
+        from dotenv import load_dotenv
+
+        load_dotenv(ENV_FILE, override=override)
+
+
+load_env()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+TENANTS_FILE = os.getenv('TENANTS_FILE')
 TOKENS = ['PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID']
 RETRY_TIME = 600
+ASYNC_MODE = os.getenv('ASYNC_MODE', '').lower() in ('1', 'true', 'yes')
+MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', 100))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+CONNECT_TIMEOUT = float(os.getenv('CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('READ_TIMEOUT', 30))
+FETCH_BATCH_SIZE = int(os.getenv('FETCH_BATCH_SIZE', HTTP_POOL_SIZE))
+HTTP_SESSION = None
+BATCH_FETCHER = None
+RESPONSE_CACHE = None
+STATE_PATH = os.getenv('STATE_PATH')
+STATE_SYNC_EVERY = int(os.getenv('STATE_SYNC_EVERY', 50))
+STATE_SYNC_INTERVAL = float(os.getenv('STATE_SYNC_INTERVAL', 5))
+STATE_STORE = StateStore()
+POLL_INTERVALS = json.loads(os.getenv('POLL_INTERVALS', 'null')) or {
+    'reviewing': (60, 300),
+    'idle': (RETRY_TIME, 6 * RETRY_TIME),
+}
+POLL_BACKOFF = float(os.getenv('POLL_BACKOFF', 2))
+POLL_JITTER = float(os.getenv('POLL_JITTER', 0.1))
+POLLING_POLICY = AdaptivePolicy(POLL_INTERVALS, POLL_BACKOFF, POLL_JITTER)
+BREAKER_THRESHOLD = int(os.getenv('BREAKER_THRESHOLD', 5))
+BREAKER_RECOVERY = float(os.getenv('BREAKER_RECOVERY', 60))
+API_BREAKER = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RECOVERY)
+ERROR_REPEAT_WINDOW = float(os.getenv('ERROR_REPEAT_WINDOW', 3600))
+ERROR_NOTIFIER = ErrorNotifier(ERROR_REPEAT_WINDOW)
+RECOVERY_MESSAGE = 'Работа программы восстановлена.'
+TELEGRAM_MESSAGE_LIMIT = 4096
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+OUTBOX_DRAIN_TIMEOUT = float(os.getenv('OUTBOX_DRAIN_TIMEOUT', 30))
+OUTBOX = None
+DIGEST_CHATS = json.loads(os.getenv('DIGEST_CHATS', 'null')) or {}
+DIGEST_HEADER = 'Сводка изменений статусов за {minutes} мин.'
+DIGEST = None
+STREAM_BACKFILL_AGE = int(os.getenv('STREAM_BACKFILL_AGE', 30 * 24 * 3600))
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 16 * 1024))
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', 0))
+PARSE_BATCH_SIZE = int(os.getenv('PARSE_BATCH_SIZE', 64))
+PARSE_POOL = None
+SHARD_DB = os.getenv('SHARD_DB')
+SHARD_TTL = float(os.getenv('SHARD_TTL', 30))
+WORKER_ID = os.getenv('WORKER_ID') or os.getenv('DYNO') or (
+    f'{socket.gethostname()}-{os.getpid()}'
+)
+SHARD = None
+METRICS_PORT = os.getenv('METRICS_PORT')
+LOG_FILE = os.getenv('LOG_FILE', 'homework_bot.log')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUPS = int(os.getenv('LOG_BACKUPS', 5))
+NO_CHANGES_MESSAGE = 'Новые статусы отсутствуют.'
+LOG_SAMPLE_NO_CHANGES = int(os.getenv('LOG_SAMPLE_NO_CHANGES', 100))
+LOGS = None
+WEBHOOK_PORT = os.getenv('WEBHOOK_PORT')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+# Без секрета сервер принимает события только с этой же машины.
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST') or (
+    '0.0.0.0' if WEBHOOK_SECRET else '127.0.0.1'
+)
+WEBHOOK_RECONCILE_INTERVAL = float(
+    os.getenv('WEBHOOK_RECONCILE_INTERVAL', 6 * RETRY_TIME)
+)
+CHANGES_LOCK = threading.Lock()
+SCHEDULER_RESOLUTION = float(os.getenv('SCHEDULER_RESOLUTION', 1))
+SCHEDULER = None
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 25))
+SHUTDOWN_DEADLINE = None
+STOPPING = threading.Event()
+RELOADING = threading.Event()
+WAKEUP = threading.Event()
+BOT_COMMANDS = os.getenv('BOT_COMMANDS', '0').lower() in ('1', 'true', 'yes')
+HISTORY_LIMIT = int(os.getenv('HISTORY_LIMIT', 20))
+SNAPSHOTS = SnapshotCache(HISTORY_LIMIT)
+NO_SNAPSHOT_MESSAGE = 'Статусы работ пока не получены, попробуйте позже.'
+UNKNOWN_CHAT_MESSAGE = 'Этот чат не подписан на статусы работ.'
+POLL_CYCLES = itertools.count(1)
+METRICS = Registry()
+API_SECONDS = METRICS.histogram(
+    'homework_api_request_seconds', 'Длительность запроса к API Практикума'
+)
+API_RESPONSES = METRICS.counter(
+    'homework_api_responses_total', 'Ответы API Практикума по коду'
+)
+CHECK_FAILURES = METRICS.counter(
+    'homework_check_response_failures_total',
+    'Ответы API, не прошедшие check_response'
+)
+INVALID_HOMEWORKS = METRICS.counter(
+    'homework_invalid_items_total', 'Работы, не прошедшие проверку схемы'
+)
+UNKNOWN_STATUSES = METRICS.counter(
+    'homework_unknown_status_total', 'Неизвестные статусы в parse_status'
+)
+SEND_SECONDS = METRICS.histogram(
+    'homework_telegram_send_seconds', 'Длительность отправки в Telegram'
+)
+SEND_ERRORS = METRICS.counter(
+    'homework_telegram_send_errors_total', 'Ошибки отправки в Telegram'
+)
+WEBHOOK_EVENTS = METRICS.counter(
+    'homework_webhook_events_total', 'События, присланные на webhook'
+)
+SCHEDULER_LAG = METRICS.histogram(
+    'homework_scheduler_lag_seconds', 'Опоздание опроса относительно срока'
+)
+METRICS.gauge(
+    'homework_scheduler_overdue_seconds',
+    'Просрочка самого раннего ожидающего срока опроса',
+    lambda: SCHEDULER.lag(time.time()) if SCHEDULER else 0
+)
+METRICS.gauge(
+    'homework_scheduler_pending', 'Получатели в расписании опроса',
+    lambda: len(SCHEDULER) if SCHEDULER else 0
+)
+METRICS.gauge(
+    'homework_http_pool_hits', 'Запросы по соединению из пула',
+    lambda: HTTP_SESSION.stats()['hits'] if HTTP_SESSION else 0
+)
+METRICS.gauge(
+    'homework_http_pool_misses', 'Запросы с открытием нового соединения',
+    lambda: HTTP_SESSION.stats()['misses'] if HTTP_SESSION else 0
+)
+METRICS.gauge(
+    'homework_response_cache_hits', 'Ответы API, совпавшие с обработанными',
+    lambda: RESPONSE_CACHE.hits if RESPONSE_CACHE else 0
+)
+METRICS.gauge(
+    'homework_digest_pending', 'Уведомления, ожидающие сводки',
+    lambda: DIGEST.pending() if DIGEST else 0
+)
+METRICS.gauge(
+    'homework_outbox_pending', 'Сообщения в очереди отправки',
+    lambda: OUTBOX.pending() if OUTBOX else 0
+)
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
@@ -25,35 +204,148 @@ VERDICTS = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+TEMPLATES_FILE = os.getenv('TEMPLATES_FILE')
+DEFAULT_LOCALE = os.getenv('DEFAULT_LOCALE', 'ru')
+TEMPLATES = TemplateCatalog.from_file(
+    TEMPLATES_FILE, DEFAULT_LOCALE
+) if TEMPLATES_FILE else TemplateCatalog({
+    'ru': {'verdicts': VERDICTS},
+    'en': {
+        'message': 'Homework "{homework_name}" status changed. {verdict}',
+        'verdicts': {
+            'approved': 'The reviewer approved the work. Hooray!',
+            'reviewing': 'The work is being reviewed.',
+            'rejected': 'The reviewer left some remarks.',
+        },
+    },
+}, DEFAULT_LOCALE)
 
-def send_message(bot, message):
-    """Функция отправляет сообщение в Telegram чат."""
+HOMEWORK_SCHEMA = Schema({
+    'homework_name': Field(str),
+    'status': Field(str),
+    'id': Field(int, required=False),
+})
+
+
+def deliver(bot, chat_id, message):
+    """Функция отправляет сообщение ботом, учитывая время и ошибки."""
+    try:
+        with SEND_SECONDS.time():
+            bot.send_message(chat_id=chat_id, text=message)
+    except Exception:
+        SEND_ERRORS.inc()
+        raise
+
+
+def send_to_chat(bot, chat_id, message, on_failed=None):
+    """Функция отправляет сообщение в указанный Telegram чат.
+
+    Если запущена очередь OUTBOX, сообщение ставится в неё и уходит
+    из отдельного потока с учётом лимитов Telegram. on_failed
+    вызывается, если сообщение так и не было доставлено.
+    """
+    if OUTBOX is not None:
+        OUTBOX.put(chat_id, message, on_failed)
+        return
     try:
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+        deliver(bot, chat_id, message)
         logging.info(f'Бот отправил сообщение "{message}"')
-    except TelegramError as error:
+    except telegram.TelegramError as error:
         logging.error(f'{error}, Бот не отправил сообщение '
                       f'{message}', exc_info=True)
+        if on_failed is not None:
+            on_failed()
+
+
+def notify(bot, chat_id, message, on_failed=None):
+    """Функция отправляет уведомление о статусах работ.
+
+    В чатах, включивших сводку (DIGEST_CHATS), уведомление
+    откладывается и уходит вместе с остальными по истечении окна.
+    """
+    if DIGEST is not None and DIGEST.add(chat_id, message, on_failed):
+        return
+    send_to_chat(bot, chat_id, message, on_failed)
+
+
+def send_digest(bot, chat_id, messages, on_failed=None):
+    """Функция отправляет накопленные уведомления одной сводкой."""
+    window = DIGEST.windows.get(str(chat_id), 0) if DIGEST else 0
+    header = DIGEST_HEADER.format(minutes=max(1, round(window / 60)))
+    for text in join_messages([header, *messages]):
+        send_to_chat(bot, chat_id, text, on_failed)
+
+
+def send_message(bot, message):
+    """Функция отправляет сообщение в Telegram чат."""
+    send_to_chat(bot, TELEGRAM_CHAT_ID, message)
 
 
 def get_api_answer(current_timestamp):
     """Функция делает запрос к API-сервиса."""
+    return request_statuses(PRACTICUM_TOKEN, current_timestamp)
+
+
+def request_statuses(token, current_timestamp):
+    """Функция запрашивает статусы работ с токеном получателя."""
+    return request_api(token, current_timestamp).json()
+
+
+def request_raw_statuses(token, current_timestamp):
+    """Функция запрашивает статусы работ без разбора JSON."""
+    return request_api(token, current_timestamp).content
+
+
+def request_cached_statuses(token, current_timestamp):
+    """Функция запрашивает статусы, не разбирая неизменившийся ответ."""
+    statuses = request_api(
+        token, current_timestamp,
+        headers=RESPONSE_CACHE.conditional_headers(token, current_timestamp)
+    )
+    if statuses.status_code == HTTPStatus.NOT_MODIFIED:
+        return RESPONSE_CACHE.not_modified(token)
+    unchanged = RESPONSE_CACHE.check(token, current_timestamp,
+                                     statuses.content, statuses.headers)
+    return unchanged or statuses.json()
+
+
+def request_stream_statuses(token, current_timestamp):
+    """Функция запрашивает статусы и разбирает ответ по мере загрузки."""
+    statuses = request_api(token, current_timestamp, stream=True)
+    return HomeworkStream(statuses.iter_content(STREAM_CHUNK_SIZE),
+                          on_close=statuses.close)
+
+
+def request_api(token, current_timestamp, headers=None, **kwargs):
+    """Функция выполняет запрос к API и проверяет код ответа."""
     params = {'from_date': current_timestamp}
+    headers = {'Authorization': f'OAuth {token}', **(headers or {})}
+    http = HTTP_SESSION or requests
     try:
-        statuses = requests.get(ENDPOINT, headers=HEADERS, params=params)
-    except RequestException as error:
+        with API_SECONDS.time():
+            statuses = http.get(ENDPOINT, headers=headers, params=params,
+                                **kwargs)
+    except requests.RequestException as error:
+        API_RESPONSES.inc(code='error')
         raise ConnectionError(f'Ошибка доступа {error}. '
                               f'Проверить API: {ENDPOINT}, '
-                              f'токен авторизации: {HEADERS}, '
+                              f'токен авторизации: {headers}, '
                               f'апрос с момента времени: {params}')
-    if statuses.status_code != 200:
-        raise StatusCodeError(
+    API_RESPONSES.inc(code=int(statuses.status_code))
+    if statuses.status_code not in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+        message = (
             f'Ошибка ответа сервера. Проверить API: {ENDPOINT}, '
-            f'токен авторизации: {HEADERS}, '
+            f'токен авторизации: {headers}, '
             f'запрос с момента времени: {params},'
             f'код возврата {statuses.status_code}'
         )
-    return statuses.json()
+        if statuses.status_code in (HTTPStatus.TOO_MANY_REQUESTS,
+                                    HTTPStatus.SERVICE_UNAVAILABLE):
+            retry_after = getattr(statuses, 'headers', {}).get('Retry-After')
+            raise TooManyRequestsError(message, parse_retry_after(retry_after),
+                                       statuses.status_code)
+        raise StatusCodeError(message, statuses.status_code)
+    return statuses
 
 
 def check_response(response):
@@ -70,17 +362,31 @@ def check_response(response):
 
 def parse_status(homework):
     """Функция проверяет информацию о статусе домашней работы."""
-    name = homework['homework_name']
-    status = homework['status']
-    if status not in VERDICTS:
-        raise ValueError(f'Неизвестный статус домашней работы {status}')
-    return f'Изменился статус проверки работы "{name}". {VERDICTS[status]}'
+    return render_status(homework)
+
+
+def render_status(homework, locale=None):
+    """Функция готовит уведомление о статусе по шаблону локали."""
+    if 'homework_name' not in homework:
+        raise KeyError('Нет ключа homework_name у домашней работы')
+    check_status(homework['status'], locale)
+    return TEMPLATES.render(homework, locale)
+
+
+def check_status(status, locale=None):
+    """Функция проверяет, что для статуса есть шаблон уведомления."""
+    if not TEMPLATES.knows(status, locale):
+        UNKNOWN_STATUSES.inc()
+        raise UnknownStatusError(
+            f'Неизвестный статус домашней работы {status}'
+        )
 
 
 def check_tokens():
     """Функция проверяет доступность переменных окружения."""
     is_tokens = True
-    for name in TOKENS:
+    names = ['TELEGRAM_TOKEN'] if TENANTS_FILE else TOKENS
+    for name in names:
         if globals()[name] is None:
             logging.info(f'Проверьте {name} токен')
             is_tokens = False
@@ -89,40 +395,909 @@ def check_tokens():
     return True
 
 
+def load_tenants():
+    """Функция собирает реестр получателей из файла или окружения."""
+    now = int(time.time())
+    if TENANTS_FILE:
+        registry = TenantRegistry.from_file(
+            TENANTS_FILE, default_from_date=now
+        )
+    else:
+        registry = TenantRegistry([
+            Tenant('default', PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, now)
+        ])
+    for tenant in registry:
+        saved = STATE_STORE.load_cursor(tenant.tenant_id)
+        if saved is not None:
+            tenant.from_date = saved
+    return registry
+
+
+def join_messages(messages, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Функция объединяет сообщения в наименьшее число отправок."""
+    return list(iter_joined(messages, limit))
+
+
+def iter_joined(messages, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Функция склеивает сообщения, отдавая готовые части по мере набора."""
+    current = ''
+    for message in messages:
+        candidate = f'{current}\n\n{message}' if current else message
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            yield current
+        while len(message) > limit:
+            yield message[:limit]
+            message = message[limit:]
+        current = message
+    if current:
+        yield current
+
+
+def render_changes(homeworks, locale=None):
+    """Функция готовит тексты сообщений для всех работ из ответа.
+
+    Работы с неизвестным статусом пропускаются так же, как работы,
+    не прошедшие проверку схемы. Возвращает тройки (id работы,
+    статус, сообщение).
+    """
+    homeworks, *skipped = split_homeworks(homeworks, locale)
+    report_skipped(*skipped)
+    return render_homeworks(homeworks, locale)
+
+
+def render_homeworks(homeworks, locale=None):
+    """Функция отрисовывает тройки (id работы, статус, сообщение)."""
+    messages = TEMPLATES.render_many(homeworks, locale)
+    return [
+        (homework.get('id', homework['homework_name']), homework['status'],
+         message)
+        for homework, message in zip(homeworks, messages)
+    ]
+
+
+def split_homeworks(homeworks, locale=None):
+    """Функция отделяет работы, которые нельзя отправить.
+
+    Возвращает годные работы, нарушения схемы и неизвестные статусы.
+    Не пишет в лог и не трогает метрики, поэтому выполняется и в пуле
+    процессов: о пропущенном сообщает report_skipped в основном.
+    """
+    valid, invalid = HOMEWORK_SCHEMA.split(homeworks)
+    known, unknown = [], []
+    for index, homework in enumerate(valid):
+        if TEMPLATES.knows(homework['status'], locale):
+            known.append(homework)
+        else:
+            unknown.append(f'[{index}] {homework["status"]}')
+    return known, invalid, unknown
+
+
+def report_skipped(invalid, unknown):
+    """Функция пишет в лог и метрики пропущенные работы ответа.
+
+    Все нарушения ответа попадают в лог одной записью, а остальные
+    работы обрабатываются как обычно.
+    """
+    if invalid:
+        INVALID_HOMEWORKS.inc(len(invalid))
+        logging.warning(f'Пропущены некорректные работы: {describe(invalid)}')
+    if unknown:
+        UNKNOWN_STATUSES.inc(len(unknown))
+        logging.warning('Пропущены работы с неизвестным статусом: '
+                        + '; '.join(unknown))
+
+
+def collect_changes(tenant, rendered):
+    """Функция отбирает работы, статус которых ещё не отправлялся."""
+    # Опрос и событие webhook могут принести один статус одновременно.
+    with CHANGES_LOCK:
+        for homework_id, status, message in rendered:
+            SNAPSHOTS.record(tenant.tenant_id, homework_id, status, message)
+        changes = [
+            (homework_id, status, message)
+            for homework_id, status, message in rendered
+            if STATE_STORE.last_status(tenant.tenant_id,
+                                       homework_id) != status
+        ]
+        for homework_id, status, _ in changes:
+            STATE_STORE.save_status(tenant.tenant_id, homework_id, status)
+    return [message for _, _, message in changes]
+
+
+def decode_response(raw, locale=None):
+    """Функция разбирает байты ответа API: JSON, проверка, тексты.
+
+    Не обращается к состоянию процесса, поэтому выполняется в пуле.
+    Возвращает current_date, тройки render_homeworks и пропущенное
+    для report_skipped.
+    """
+    response = json.loads(raw)
+    homeworks, *skipped = split_homeworks(check_response(response), locale)
+    return (response.get('current_date'),
+            render_homeworks(homeworks, locale), skipped)
+
+
+def decode_job(job):
+    """Функция разбирает пару (байты ответа, локаль) в пуле процессов."""
+    return decode_response(*job)
+
+
+def handle_response(tenant, response):
+    """Функция разбирает ответ API и сдвигает курсор получателя."""
+    if isinstance(response, Unchanged):
+        return apply_changes(tenant, [], response.current_date)
+    try:
+        homeworks = check_response(response)
+    except (TypeError, KeyError):
+        CHECK_FAILURES.inc()
+        raise
+    # Статусы запоминаются только после разбора всего списка.
+    rendered = render_changes(homeworks, tenant.locale)
+    return apply_changes(tenant, rendered, response.get('current_date'))
+
+
+def apply_changes(tenant, rendered, current_date):
+    """Функция сверяет статусы с отправленными и сдвигает курсор."""
+    messages = []
+    if not rendered:
+        logging.info(NO_CHANGES_MESSAGE)
+    else:
+        messages = join_messages(collect_changes(tenant, rendered))
+    if current_date is not None:
+        tenant.from_date = current_date
+    STATE_STORE.save_cursor(tenant.tenant_id, tenant.from_date)
+    if RESPONSE_CACHE is not None:
+        RESPONSE_CACHE.confirm(tenant.token)
+    return messages
+
+
+def is_backfill(tenant):
+    """Функция определяет, что история получателя может быть длинной."""
+    return time.time() - tenant.from_date > STREAM_BACKFILL_AGE
+
+
+def stream_messages(tenant):
+    """Функция запрашивает статусы потоком для длинной истории.
+
+    Запрос выполняется сразу, а работы разбираются и превращаются
+    в сообщения по одной при итерации по результату.
+    """
+    stream = fetch_statuses(tenant, request_stream_statuses)
+    return iter_stream_messages(tenant, stream)
+
+
+def iter_stream_messages(tenant, stream):
+    """Функция отдаёт сообщения об изменениях по мере чтения ответа."""
+    def changes():
+        for homework in stream:
+            yield from collect_changes(tenant, render_changes(
+                [homework], tenant.locale
+            ))
+
+    changed = False
+    for message in iter_joined(changes()):
+        changed = True
+        yield message
+    if not changed:
+        logging.info(NO_CHANGES_MESSAGE)
+    if stream.current_date is not None:
+        tenant.from_date = stream.current_date
+    STATE_STORE.save_cursor(tenant.tenant_id, tenant.from_date)
+
+
+def count_decode_error(error):
+    """Функция учитывает в метриках ошибку разбора из пула процессов."""
+    if isinstance(error, (TypeError, KeyError)):
+        CHECK_FAILURES.inc()
+
+
+def is_api_outage(error):
+    """Функция отличает недоступность API от ошибок одного получателя."""
+    if isinstance(error, ConnectionError):
+        return True
+    status_code = getattr(error, 'status_code', None)
+    return status_code is not None and (
+        status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+        or status_code == HTTPStatus.TOO_MANY_REQUESTS
+    )
+
+
+def record_api_result(error=None):
+    """Функция передаёт итог запроса к API предохранителю."""
+    if error is not None and is_api_outage(error):
+        if API_BREAKER.record_failure():
+            logging.error('Опрос API приостановлен после серии сбоев.')
+    elif API_BREAKER.record_success():
+        logging.info('Опрос API возобновлён.')
+
+
+def default_request():
+    """Функция выбирает запрос статусов: с кэшем ответов или без."""
+    if RESPONSE_CACHE is None:
+        return request_statuses
+    return request_cached_statuses
+
+
+def guarded_request(request, token, from_date):
+    """Функция выполняет запрос статусов через предохранитель."""
+    if not API_BREAKER.allow():
+        raise CircuitOpenError('Опрос API приостановлен после серии сбоев',
+                               API_BREAKER.retry_after())
+    try:
+        response = request(token, from_date)
+    except Exception as error:
+        record_api_result(error)
+        raise
+    record_api_result()
+    return response
+
+
+def fetch_statuses(tenant, request=None):
+    """Функция запрашивает статусы получателя через предохранитель."""
+    return guarded_request(request or default_request(), tenant.token,
+                           tenant.from_date)
+
+
+def fetch_batch(pairs, request=None):
+    """Функция запрашивает статусы для пар (токен, from_date) пакетом.
+
+    Возвращает BatchResult в порядке пар: ошибка одного получателя
+    остаётся в его результате и не мешает остальным.
+    """
+    fetcher = BATCH_FETCHER or BatchFetcher()
+    return fetcher.fetch(
+        functools.partial(guarded_request, request or default_request()),
+        pairs
+    )
+
+
+def error_notice(tenant, error):
+    """Функция решает, сообщать ли получателю об ошибке.
+
+    Ошибки одного вида (класс и код ответа) подавляются в пределах
+    ERROR_REPEAT_WINDOW: в тексте меняются параметры запроса и адреса
+    объектов. Пока предохранитель разомкнут, получателям ничего
+    не пишется. Токены из текста в чат не попадают.
+    """
+    message = f'Сбой в работе программы: {error}'
+    logging.error(message)
+    if isinstance(error, CircuitOpenError):
+        return None
+    kind = (type(error).__name__, getattr(error, 'status_code', None))
+    if ERROR_NOTIFIER.should_report(tenant.tenant_id, kind):
+        return RedactingFilter((tenant.token, PRACTICUM_TOKEN)).redact(
+            message
+        )
+    return None
+
+
+def with_recovery_notice(tenant, messages):
+    """Функция добавляет сообщение о восстановлении после сбоев."""
+    if ERROR_NOTIFIER.recovered(tenant.tenant_id):
+        return itertools.chain([RECOVERY_MESSAGE], messages)
+    return messages
+
+
+def delivery_checkpoint(tenant):
+    """Функция запоминает курсор и статусы получателя перед опросом."""
+    return tenant.from_date, STATE_STORE.checkpoint(tenant.tenant_id)
+
+
+def undo_delivery(tenant, checkpoint):
+    """Функция возвращает состояние получателя к checkpoint.
+
+    Вызывается, когда сообщение о статусах не было доставлено или
+    опрос прервался: статусы снова считаются неотправленными, и
+    следующий опрос их повторит.
+    """
+    from_date, statuses = checkpoint
+    with CHANGES_LOCK:
+        changed = STATE_STORE.rollback(tenant.tenant_id, statuses, from_date)
+        changed = changed or tenant.from_date > from_date
+        tenant.from_date = min(tenant.from_date, from_date)
+    if not changed:
+        return
+    if RESPONSE_CACHE is not None:
+        RESPONSE_CACHE.forget(tenant.token)
+    logging.warning(f'Статусы получателя {tenant.tenant_id} не доставлены '
+                    'и будут отправлены повторно')
+
+
+def poll_tenant(bot, tenant):
+    """Функция опрашивает API для одного получателя.
+
+    Возвращает True, если получателю ушли новые статусы.
+    """
+    checkpoint = delivery_checkpoint(tenant)
+    if is_backfill(tenant):
+        messages = stream_messages(tenant)
+    else:
+        messages = handle_response(tenant, fetch_statuses(tenant))
+    return send_changes(bot, tenant, messages, checkpoint)
+
+
+def send_changes(bot, tenant, messages, checkpoint=None):
+    """Функция отправляет сообщения получателю и фиксирует состояние.
+
+    Если сообщение не будет доставлено, состояние получателя
+    возвращается к checkpoint. Возвращает True, если получателю
+    ушли новые статусы.
+    """
+    failed = []
+
+    def undo():
+        failed.append(True)
+        undo_delivery(tenant, checkpoint)
+
+    changed = False
+    try:
+        for message in with_recovery_notice(tenant, messages):
+            notify(bot, tenant.chat_id, message,
+                   undo if checkpoint is not None else None)
+            changed = changed or message is not RECOVERY_MESSAGE
+    except Exception:
+        # Поток ответа оборвался: статусы из недосланной части уже
+        # отмечены отправленными.
+        if checkpoint is not None:
+            undo_delivery(tenant, checkpoint)
+        raise
+    if failed:
+        # Потоковый разбор сдвигает курсор уже после отправки.
+        undo_delivery(tenant, checkpoint)
+    STATE_STORE.commit()
+    return changed
+
+
+def next_poll_delay(tenant, changed, error=None):
+    """Функция выбирает задержку до следующего опроса получателя."""
+    reviewing = STATE_STORE.has_status(tenant.tenant_id, 'reviewing')
+    state = 'reviewing' if reviewing else 'idle'
+    return POLLING_POLICY.next_interval(
+        tenant.tenant_id, state, changed,
+        getattr(error, 'retry_after', None)
+    )
+
+
+def poll_due_tenants(bot, registry, scheduler, now):
+    """Функция опрашивает получателей, чей срок опроса наступил.
+
+    Запросы к API идут пакетами по FETCH_BATCH_SIZE получателей.
+    Аренда проверяется перед каждым пакетом: длинный цикл может
+    пережить её запас, и тогда получатель ждёт перебалансировки.
+    """
+    due = [(registry.get(tenant_id), at)
+           for tenant_id, at in scheduler.pop_due(now)]
+    due = [(tenant, at) for tenant, at in due if tenant is not None]
+    size = max(1, FETCH_BATCH_SIZE)
+    for start in range(0, len(due), size):
+        if STOPPING.is_set():
+            break
+        batch = []
+        for tenant, at in due[start:start + size]:
+            if is_owned(tenant.tenant_id):
+                batch.append((tenant, at))
+            else:
+                scheduler.schedule(tenant.tenant_id, SHARD.next_rebalance)
+        if batch:
+            poll_batch(bot, batch, scheduler)
+
+
+def poll_batch(bot, due, scheduler):
+    """Функция опрашивает пакет получателей и назначает следующие опросы.
+
+    Ответы всего пакета запрашиваются одной операцией, разбираются
+    и отправляются по одному получателю, а сроки назначаются вместе.
+    """
+    backfill = {tenant.tenant_id for tenant, _ in due if is_backfill(tenant)}
+    batched = [tenant for tenant, _ in due
+               if tenant.tenant_id not in backfill]
+    now = time.time()
+    results = iter(fetch_batch(
+        (tenant.token, tenant.from_date) for tenant in batched
+    ))
+    delays = []
+    for tenant, at in due:
+        SCHEDULER_LAG.observe(max(0, now - at))
+        with log_context(tenant=tenant.tenant_id):
+            try:
+                if tenant.tenant_id in backfill:
+                    changed = poll_tenant(bot, tenant)
+                else:
+                    checkpoint = delivery_checkpoint(tenant)
+                    changed = send_changes(bot, tenant, handle_response(
+                        tenant, next(results).get()
+                    ), checkpoint)
+                delays.append(next_poll_delay(tenant, changed))
+            except Exception as error:
+                notice = error_notice(tenant, error)
+                if notice:
+                    send_to_chat(bot, tenant.chat_id, notice)
+                delays.append(next_poll_delay(tenant, False, error))
+    now = time.time()
+    for (tenant, _), delay in zip(due, delays):
+        scheduler.schedule(tenant.tenant_id, now + delay)
+
+
+def ingest_event(bot, registry, tenant_id, event):
+    """Функция отправляет изменения статусов из присланного события.
+
+    Событие может описывать только часть работ, поэтому курсор опроса
+    и кэш ответов не трогаются: сверочный опрос всё равно увидит
+    изменения, о которых событие не сообщило.
+    Возвращает False, если получатель неизвестен этому обработчику.
+    """
+    tenant = registry.get(tenant_id)
+    if tenant is None or not is_owned(tenant_id):
+        return False
+    WEBHOOK_EVENTS.inc()
+    with log_context(tenant=tenant_id):
+        checkpoint = delivery_checkpoint(tenant)
+        rendered = render_changes(check_response(event), tenant.locale)
+        undo = functools.partial(undo_delivery, tenant, checkpoint)
+        for message in join_messages(collect_changes(tenant, rendered)):
+            notify(bot, tenant.chat_id, message, undo)
+        STATE_STORE.commit()
+    return True
+
+
+def seed_snapshots(tenants):
+    """Функция заполняет снимок статусами из STATE_STORE.
+
+    Имени работы в состоянии нет, поэтому до первого опроса
+    в тексте вместо него стоит id работы.
+    """
+    for tenant in tenants:
+        rendered = [
+            (homework_id, status, TEMPLATES.render(
+                {'id': homework_id, 'homework_name': homework_id,
+                 'status': status}, tenant.locale
+            ))
+            for homework_id, status
+            in STATE_STORE.tenant_statuses(tenant.tenant_id).items()
+            if TEMPLATES.knows(status, tenant.locale)
+        ]
+        SNAPSHOTS.seed(tenant.tenant_id, rendered)
+
+
+def status_reply(tenant_ids):
+    """Функция отвечает на /status из снимка статусов."""
+    if not tenant_ids:
+        return [UNKNOWN_CHAT_MESSAGE]
+    messages = [message for tenant_id in tenant_ids
+                for message in SNAPSHOTS.latest(tenant_id)]
+    return join_messages(messages) or [NO_SNAPSHOT_MESSAGE]
+
+
+def history_reply(tenant_ids):
+    """Функция отвечает на /history из снимка статусов."""
+    if not tenant_ids:
+        return [UNKNOWN_CHAT_MESSAGE]
+    entries = sorted(entry for tenant_id in tenant_ids
+                     for entry in SNAPSHOTS.history(tenant_id))
+    messages = [
+        f'{time.strftime("%d.%m %H:%M", time.localtime(moment))} {message}'
+        for moment, message in entries
+    ]
+    return join_messages(messages) or [NO_SNAPSHOT_MESSAGE]
+
+
+def command_callbacks(bot, registry):
+    """Функция готовит обработчики команд /status и /history.
+
+    Ответы берутся из SNAPSHOTS, который пополняет опрос, поэтому
+    команды не обращаются к API.
+    """
+    def command(reply):
+        def callback(update, context):
+            chat_id = update.effective_chat.id
+            tenant_ids = registry.for_chat(chat_id)
+            # Чужих получателей опрашивают другие обработчики.
+            foreign = [registry.get(tenant_id) for tenant_id in tenant_ids
+                       if not is_owned(tenant_id)]
+            for tenant in foreign:
+                STATE_STORE.refresh(tenant.tenant_id)
+            seed_snapshots(foreign)
+            for text in reply(tenant_ids):
+                send_to_chat(bot, chat_id, text)
+        return callback
+
+    return {'status': command(status_reply),
+            'history': command(history_reply)}
+
+
+def start_commands(bot, registry):
+    """Функция запускает приём команд бота в фоновых потоках."""
+    from telegram.ext import CommandHandler, Updater
+
+    updater = Updater(bot=bot, use_context=True)
+    for name, callback in command_callbacks(bot, registry).items():
+        updater.dispatcher.add_handler(CommandHandler(name, callback))
+    updater.start_polling()
+    return updater
+
+
+def reconcile_policy():
+    """Функция задаёт редкий сверочный опрос, когда статусы приходят сами."""
+    interval = WEBHOOK_RECONCILE_INTERVAL
+    return AdaptivePolicy({'reviewing': (interval, interval),
+                           'idle': (interval, interval)},
+                          POLL_BACKOFF, POLL_JITTER)
+
+
+def is_owned(tenant_id):
+    """Функция проверяет, что получатель достался этому обработчику."""
+    return SHARD is None or SHARD.owns(tenant_id)
+
+
+def rebalance_shard(registry, scheduler, busy=()):
+    """Функция обновляет долю получателей этого обработчика."""
+    if SHARD is None or not SHARD.is_due():
+        return
+    added, removed = SHARD.rebalance(registry.ids(), busy)
+    for tenant_id in removed:
+        scheduler.cancel(tenant_id)
+    for tenant_id in added:
+        STATE_STORE.refresh(tenant_id)
+        saved = STATE_STORE.load_cursor(tenant_id)
+        if saved is not None:
+            registry.get(tenant_id).from_date = saved
+    scheduler.spread(added, time.time())
+    if added or removed:
+        logging.info(f'Обработчик {WORKER_ID}: получено {len(added)}, '
+                     f'отдано {len(removed)} получателей')
+
+
+def release_tenants(tenant_ids):
+    """Функция сохраняет состояние перед передачей получателей."""
+    STATE_STORE.flush()
+
+
+def seconds_until_next(scheduler):
+    """Функция считает, сколько спать до ближайшего события."""
+    moments = [scheduler.next_due()]
+    if SHARD is not None:
+        moments.append(SHARD.next_rebalance)
+    moments = [moment for moment in moments if moment is not None]
+    if not moments:
+        return RETRY_TIME
+    return max(0, min(moments) - time.time())
+
+
+def request_shutdown(signum=None, frame=None):
+    """Функция останавливает опрос по SIGTERM.
+
+    Начатый опрос доводится до конца, новые не запускаются, а на
+    отправку очереди и сохранение курсоров остаётся SHUTDOWN_TIMEOUT.
+    """
+    global SHUTDOWN_DEADLINE
+    if not STOPPING.is_set():
+        SHUTDOWN_DEADLINE = time.time() + SHUTDOWN_TIMEOUT
+        logging.info('Получен сигнал остановки, опрос завершается.')
+    STOPPING.set()
+    WAKEUP.set()
+
+
+def request_reload(signum=None, frame=None):
+    """Функция просит перечитать настройки и получателей по SIGHUP."""
+    RELOADING.set()
+    WAKEUP.set()
+
+
+def install_signal_handlers():
+    """Функция подключает обработчики SIGTERM и SIGHUP."""
+    signal.signal(signal.SIGTERM, request_shutdown)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, request_reload)
+
+
+def shutdown_time_left(default):
+    """Функция считает, сколько осталось до крайнего срока остановки."""
+    if SHUTDOWN_DEADLINE is None:
+        return default
+    return max(0, SHUTDOWN_DEADLINE - time.time())
+
+
+def reload_config():
+    """Функция перечитывает .env: файл получателей, интервалы, шаблоны."""
+    global TENANTS_FILE, POLL_INTERVALS, POLLING_POLICY, TEMPLATES
+    global DIGEST_CHATS
+    load_env(override=True)
+    TENANTS_FILE = os.getenv('TENANTS_FILE')
+    POLL_INTERVALS = json.loads(
+        os.getenv('POLL_INTERVALS', 'null')
+    ) or POLL_INTERVALS
+    previous = POLLING_POLICY
+    POLLING_POLICY = reconcile_policy() if WEBHOOK_PORT else AdaptivePolicy(
+        POLL_INTERVALS, POLL_BACKOFF, POLL_JITTER
+    )
+    # Накопленные интервалы переживают перечитывание настроек.
+    POLLING_POLICY.carry_from(previous)
+    DIGEST_CHATS = json.loads(os.getenv('DIGEST_CHATS', 'null')) or {}
+    if DIGEST is not None:
+        DIGEST.windows = DIGEST_CHATS
+    templates_file = os.getenv('TEMPLATES_FILE')
+    if templates_file:
+        TEMPLATES = TemplateCatalog.from_file(templates_file, DEFAULT_LOCALE)
+        restart_parse_pool()
+
+
+def restart_parse_pool():
+    """Функция заменяет пул разбора, чтобы процессы взяли новые шаблоны.
+
+    Процессы пула получают шаблоны при запуске; начатые пачки старый
+    пул доделывает.
+    """
+    global PARSE_POOL
+    if PARSE_POOL is None:
+        return
+    previous, PARSE_POOL = PARSE_POOL, ParsePool(
+        decode_job, PARSE_WORKERS, PARSE_BATCH_SIZE
+    )
+    previous.close(wait_pending=True)
+
+
+def reload_tenants(registry, scheduler):
+    """Функция применяет новый список получателей без перезапуска.
+
+    Курсор оставшихся получателей не откатывается, удалённые снимаются
+    с расписания, новые расставляются по периоду опроса.
+    """
+    RELOADING.clear()
+    try:
+        reload_config()
+        fresh = load_tenants()
+    except Exception as error:
+        logging.error(f'Не удалось перечитать настройки: {error}')
+        return
+    removed = set(registry.ids()) - set(fresh.ids())
+    for tenant_id in removed:
+        registry.remove(tenant_id)
+        scheduler.cancel(tenant_id)
+        SNAPSHOTS.forget(tenant_id)
+        POLLING_POLICY.forget(tenant_id)
+    added = []
+    for tenant in fresh:
+        current = registry.get(tenant.tenant_id)
+        if current is None:
+            added.append(tenant.tenant_id)
+        else:
+            tenant.from_date = max(tenant.from_date, current.from_date)
+        registry.add(tenant)
+    if LOGS is not None:
+        LOGS.add_secrets(tenant.token for tenant in fresh)
+    if SHARD is None:
+        scheduler.spread(added, time.time())
+    else:
+        SHARD.next_rebalance = 0
+    logging.info(f'Список получателей перечитан: добавлено {len(added)}, '
+                 f'удалено {len(removed)}')
+
+
+def wait_for_next(timeout):
+    """Функция спит до следующего опроса или до сигнала."""
+    WAKEUP.wait(timeout)
+    WAKEUP.clear()
+
+
+def run_polling(bot, registry, scheduler):
+    """Функция опрашивает получателей по расписанию в одном потоке.
+
+    Опустевшее расписание не останавливает опрос: получатели могут
+    вернуться по SIGHUP. Выход — только по SIGTERM.
+    """
+    while not STOPPING.is_set():
+        if RELOADING.is_set():
+            reload_tenants(registry, scheduler)
+        rebalance_shard(registry, scheduler)
+        with log_context(cycle=next(POLL_CYCLES)):
+            poll_due_tenants(bot, registry, scheduler, time.time())
+        wait_for_next(seconds_until_next(scheduler))
+
+
+async def poll_tenant_async(runner, bot, tenant):
+    """Корутина опрашивает API для одного получателя.
+
+    Возвращает задержку до следующего опроса.
+    """
+    checkpoint = delivery_checkpoint(tenant)
+    try:
+        if is_backfill(tenant):
+            messages = await runner.call(
+                lambda: list(stream_messages(tenant))
+            )
+        elif PARSE_POOL is None:
+            response = await runner.call(fetch_statuses, tenant)
+            messages = handle_response(tenant, response)
+        else:
+            messages = await fetch_in_pool(runner, tenant)
+        undo = functools.partial(undo_delivery, tenant, checkpoint)
+        for message in with_recovery_notice(tenant, messages):
+            await runner.call(notify, bot, tenant.chat_id, message, undo)
+        STATE_STORE.commit()
+        return next_poll_delay(tenant, bool(messages))
+    except Exception as error:
+        # Оборванный опрос мог отметить статусы отправленными.
+        undo_delivery(tenant, checkpoint)
+        notice = error_notice(tenant, error)
+        if notice:
+            await runner.call(send_to_chat, bot, tenant.chat_id, notice)
+        return next_poll_delay(tenant, False, error)
+
+
+async def fetch_in_pool(runner, tenant):
+    """Корутина получает байты ответа и разбирает их в пуле процессов."""
+    raw = await runner.call(fetch_statuses, tenant, request_raw_statuses)
+    try:
+        current_date, rendered, skipped = await PARSE_POOL.submit(
+            (raw, tenant.locale)
+        )
+    except Exception as error:
+        count_decode_error(error)
+        raise
+    report_skipped(*skipped)
+    return apply_changes(tenant, rendered, current_date)
+
+
+async def poll_and_reschedule(runner, bot, tenant, scheduler):
+    """Корутина опрашивает получателя и назначает следующий опрос."""
+    delay = await poll_tenant_async(runner, bot, tenant)
+    scheduler.schedule(tenant.tenant_id, time.time() + delay)
+
+
+async def run_polling_async(bot, registry, scheduler, runner, tick=1.0):
+    """Корутина запускает опросы по расписанию без ожидания ответов.
+
+    Как и run_polling, работает до SIGTERM, даже без получателей.
+    """
+    in_flight = {}
+    while not STOPPING.is_set():
+        if RELOADING.is_set():
+            reload_tenants(registry, scheduler)
+        rebalance_shard(registry, scheduler, busy=set(in_flight))
+        now = time.time()
+        cycle = next(POLL_CYCLES)
+        for tenant_id, due in scheduler.pop_due(now):
+            tenant = registry.get(tenant_id)
+            if tenant is None or not is_owned(tenant_id):
+                continue
+            SCHEDULER_LAG.observe(max(0, now - due))
+            # Задача получает копию контекста с полями для лога.
+            with log_context(tenant=tenant_id, cycle=cycle):
+                task = asyncio.create_task(
+                    poll_and_reschedule(runner, bot, tenant, scheduler)
+                )
+            in_flight[tenant_id] = task
+            task.add_done_callback(
+                lambda _, key=tenant_id: in_flight.pop(key, None)
+            )
+        await asyncio.sleep(min(seconds_until_next(scheduler), tick))
+    if in_flight:
+        # Начатые опросы успевают сохранить курсор и поставить сообщения.
+        await asyncio.wait(list(in_flight.values()),
+                           timeout=shutdown_time_left(None))
+
+
+def build_session():
+    """Функция создаёт пул соединений к API с настройками окружения."""
+    pool_size = HTTP_POOL_SIZE
+    if ASYNC_MODE:
+        pool_size = max(pool_size, MAX_CONCURRENCY)
+    return PooledSession(pool_size, CONNECT_TIMEOUT, READ_TIMEOUT)
+
+
+def build_outbox(bot):
+    """Функция создаёт очередь отправки сообщений через бота."""
+    def send(chat_id, text):
+        deliver(bot, chat_id, text)
+
+    return Outbox(send, TELEGRAM_CHAT_RATE, TELEGRAM_GLOBAL_RATE,
+                  limit=TELEGRAM_MESSAGE_LIMIT)
+
+
+def run(bot, registry):
+    """Функция запускает опрос в выбранном режиме."""
+    global PARSE_POOL, SCHEDULER
+    scheduler = SCHEDULER = TimerWheel(RETRY_TIME, SCHEDULER_RESOLUTION)
+    if SHARD is None:
+        scheduler.spread(registry.ids(), time.time())
+    if not ASYNC_MODE:
+        run_polling(bot, registry, scheduler)
+        return
+    runner = BoundedRunner(MAX_CONCURRENCY)
+    if PARSE_WORKERS:
+        PARSE_POOL = ParsePool(decode_job, PARSE_WORKERS,
+                               PARSE_BATCH_SIZE)
+    try:
+        asyncio.run(run_polling_async(bot, registry, scheduler, runner))
+    finally:
+        runner.close()
+        if PARSE_POOL is not None:
+            PARSE_POOL.close()
+
+
 def main():
     """Основная логика работы бота."""
+    global HTTP_SESSION, RESPONSE_CACHE, STATE_STORE, OUTBOX, SHARD
+    global POLLING_POLICY, BATCH_FETCHER, DIGEST
     if not check_tokens():
         raise ValueError('Проверьте значение токенов')
-    bot = Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-            if not homeworks:
-                logging.info("Новые статусы отсутствуют.")
-            else:
-                send_message(bot, parse_status(homeworks[0]))
-            current_timestamp = response.get(
-                'current_date', current_timestamp
-            )
-            time.sleep(RETRY_TIME)
-        except Exception as error:
-            logging.error(f'Сбой в работе программы: {error}')
-            send_message(bot, message=f'Сбой в работе программы: {error}')
-            time.sleep(RETRY_TIME)
+    if BOT_COMMANDS:
+        # Updater работает с настоящим Bot, откладывать его незачем.
+        bot = telegram.Bot(token=TELEGRAM_TOKEN)
+    else:
+        # Соединение с Telegram создаётся при первой отправке.
+        bot = LazyObject(lambda: telegram.Bot(token=TELEGRAM_TOKEN))
+    HTTP_SESSION = build_session()
+    BATCH_FETCHER = BatchFetcher(min(FETCH_BATCH_SIZE, HTTP_POOL_SIZE))
+    RESPONSE_CACHE = ResponseCache()
+    STATE_STORE = open_state_store(
+        STATE_PATH, sync_every=STATE_SYNC_EVERY,
+        sync_interval=STATE_SYNC_INTERVAL
+    )
+    if SHARD_DB and not isinstance(STATE_STORE, SQLiteStateStore):
+        raise ValueError('Для SHARD_DB нужно общее состояние: '
+                         'STATE_PATH с базой SQLite (.db)')
+    OUTBOX = build_outbox(bot)
+    OUTBOX.start()
+    DIGEST = DigestBuffer(DIGEST_CHATS,
+                          functools.partial(send_digest, bot))
+    DIGEST.start()
+    if METRICS_PORT:
+        start_http_server(METRICS, int(METRICS_PORT))
+    if SHARD_DB:
+        SHARD = ShardManager(WORKER_ID, SQLiteCoordinator(SHARD_DB, SHARD_TTL),
+                             SHARD_TTL, on_release=release_tenants)
+    registry = load_tenants()
+    if LOGS is not None:
+        LOGS.add_secrets(tenant.token for tenant in registry)
+    seed_snapshots(registry)
+    webhook = None
+    if WEBHOOK_PORT:
+        POLLING_POLICY = reconcile_policy()
+        webhook = start_webhook_server(
+            functools.partial(ingest_event, bot, registry),
+            int(WEBHOOK_PORT), WEBHOOK_HOST, WEBHOOK_SECRET
+        )
+    commands = None
+    if BOT_COMMANDS:
+        commands = start_commands(bot, registry)
+    install_signal_handlers()
+    try:
+        run(bot, registry)
+    finally:
+        # Сначала состояние и очередь: остановка команд может занять
+        # заметную часть срока на завершение.
+        if webhook is not None:
+            webhook.shutdown()
+        STATE_STORE.flush()
+        DIGEST.stop()
+        OUTBOX.stop(shutdown_time_left(OUTBOX_DRAIN_TIMEOUT))
+        # Недоставленные очередью статусы уже возвращены в состояние.
+        STATE_STORE.flush()
+        if commands is not None:
+            commands.stop()
+        if SHARD is not None:
+            SHARD.leave()
+        STATE_STORE.close()
+        BATCH_FETCHER.close()
 
 
 if __name__ == '__main__':
-    logger = logging.getLogger(__name__)
-    LOG_FILE = __file__ + '.log'
-    logging.basicConfig(
-        level=logging.INFO,
-        filename='homework_bot.log',
-        filemode='w',
-        format='%(asctime)s, %(levelname)s, %(name)s, %(message)s',
+    if '--profile-startup' in sys.argv[1:]:
+        print(format_import_profile('homework',
+                                    *profile_imports('homework')))
+        sys.exit()
+    LOGS = LogPipeline(
+        LOG_FILE, LOG_MAX_BYTES, LOG_BACKUPS,
+        secrets=(PRACTICUM_TOKEN, TELEGRAM_TOKEN),
+        sample={NO_CHANGES_MESSAGE: LOG_SAMPLE_NO_CHANGES},
     )
     try:
         main()
     except KeyboardInterrupt:
         print('Выход из программы')
+    finally:
+        LOGS.stop()
@@ -0,0 +1,192 @@
+"""Неблокирующая запись логов: очередь, JSON-строки, ротация, маскировка.
+
+Поток опроса только кладёт запись в очередь, а форматирование в JSON,
+маскировку секретов и запись в файл выполняет отдельный поток
+QueueListener. Поля tenant и cycle берутся из контекста (log_context),
+который задаётся вокруг опроса получателя.
+"""
+import contextlib
+import contextvars
+import copy
+import json
+import logging
+import queue
+import re
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_CONTEXT = contextvars.ContextVar('log_context', default={})
+CONTEXT_FIELDS = ('tenant', 'cycle')
+MASK = '***'
+PATTERNS = (
+    (re.compile(r'(OAuth\s+)[^\s\'",}]+'), r'\1' + MASK),
+    (re.compile(r'(?<!\d)\d{6,}:[\w-]{30,}'), MASK),
+)
+
+
+@contextlib.contextmanager
+def log_context(**fields):
+    """Добавляет поля ко всем записям лога внутри блока."""
+    token = LOG_CONTEXT.set({**LOG_CONTEXT.get(), **fields})
+    try:
+        yield
+    finally:
+        LOG_CONTEXT.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Переносит поля контекста в запись в потоке, который пишет лог."""
+
+    def filter(self, record):
+        """Дополняет запись полями из log_context."""
+        for name, value in LOG_CONTEXT.get().items():
+            setattr(record, name, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает одну из every записей с заданным текстом."""
+
+    def __init__(self, rules):
+        super().__init__()
+        self.rules = {message: every for message, every in rules.items()
+                      if every > 1}
+        self._counts = dict.fromkeys(self.rules, 0)
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        """Решает, попадёт ли запись в лог."""
+        every = self.rules.get(record.msg)
+        if every is None:
+            return True
+        with self._lock:
+            count = self._counts[record.msg]
+            self._counts[record.msg] = count + 1
+        record.sampled = every
+        return count % every == 0
+
+
+class RedactingFilter(logging.Filter):
+    """Заменяет токены и другие секреты в тексте записи на ***."""
+
+    def __init__(self, secrets=()):
+        super().__init__()
+        self._secrets = set()
+        self._pattern = None
+        self.add_secrets(secrets)
+
+    def add_secret(self, secret):
+        """Добавляет значение, которое нельзя писать в лог."""
+        self.add_secrets([secret])
+
+    def add_secrets(self, secrets):
+        """Добавляет значения пачкой; регулярное выражение строится раз."""
+        new = {secret for secret in secrets if secret} - self._secrets
+        if not new:
+            return
+        self._secrets |= new
+        self._pattern = re.compile('|'.join(
+            re.escape(value)
+            for value in sorted(self._secrets, key=len, reverse=True)
+        ))
+
+    def redact(self, text):
+        """Возвращает текст с замаскированными секретами."""
+        if self._pattern is not None:
+            text = self._pattern.sub(MASK, text)
+        for pattern, replacement in PATTERNS:
+            text = pattern.sub(replacement, text)
+        return text
+
+    def filter(self, record):
+        """Маскирует секреты в готовом тексте записи и трейсбеке."""
+        record.msg = self.redact(record.getMessage())
+        record.args = None
+        if record.exc_text:
+            record.exc_text = self.redact(record.exc_text)
+        return True
+
+
+class TracebackQueueHandler(QueueHandler):
+    """QueueHandler, который не вклеивает трейсбек в текст записи.
+
+    Стандартный prepare() дописывает трейсбек к msg и очищает exc_info,
+    и JsonFormatter не смог бы вынести его в поле exc. Здесь трейсбек
+    форматируется сразу и остаётся в exc_text.
+    """
+
+    _traceback_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        """Готовит запись к передаче в поток записи лога."""
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._traceback_formatter.formatException(
+                record.exc_info
+            )
+        record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись как одну JSON-строку."""
+
+    def format(self, record):
+        """Возвращает JSON-объект записи без переводов строк."""
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for name in CONTEXT_FIELDS + ('sampled',):
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LogPipeline:
+    """Очередь логов с фоновой записью в файл с ротацией."""
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5,
+                 level=logging.INFO, secrets=(), sample=None):
+        self.redactor = RedactingFilter(secrets)
+        file_handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count,
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(JsonFormatter())
+        file_handler.addFilter(self.redactor)
+        self.handler = TracebackQueueHandler(queue.SimpleQueue())
+        self.handler.addFilter(ContextFilter())
+        if sample:
+            self.handler.addFilter(SamplingFilter(sample))
+        self._listener = QueueListener(self.handler.queue, file_handler)
+        self._file_handler = file_handler
+        self._root = logging.getLogger()
+        self._root.setLevel(level)
+        self._root.addHandler(self.handler)
+        self._listener.start()
+
+    def add_secret(self, secret):
+        """Добавляет значение, которое нельзя писать в лог."""
+        self.redactor.add_secret(secret)
+
+    def add_secrets(self, secrets):
+        """Добавляет пачку значений, которые нельзя писать в лог."""
+        self.redactor.add_secrets(secrets)
+
+    def stop(self):
+        """Дописывает очередь в файл и отключает обработчик."""
+        if self.handler not in self._root.handlers:
+            return
+        self._root.removeHandler(self.handler)
+        self._listener.stop()
+        self._file_handler.close()
@@ -0,0 +1,168 @@
+"""Счётчики и гистограммы в текстовом формате Prometheus."""
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in labels)
+    return '{' + pairs + '}'
+
+
+class Counter:
+    """Монотонный счётчик, при необходимости с метками."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Увеличивает счётчик для набора меток."""
+        key = tuple(sorted((name, str(value))
+                           for name, value in labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Текущее значение счётчика для набора меток."""
+        key = tuple(sorted((name, str(value))
+                           for name, value in labels.items()))
+        return self._values.get(key, 0)
+
+    def samples(self):
+        """Строки для экспорта."""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(key)} {value}'
+                for key, value in items]
+
+
+class Gauge:
+    """Мгновенное значение, вычисляемое функцией при экспорте."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, function):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+
+    def samples(self):
+        """Строки для экспорта."""
+        return [f'{self.name} {self.function()}']
+
+
+class Histogram:
+    """Распределение значений по корзинам (накопительно)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Добавляет наблюдение."""
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+
+    @contextmanager
+    def time(self):
+        """Измеряет длительность блока with."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self):
+        """Строки для экспорта."""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f'{self.name}_sum {total}')
+        lines.append(f'{self.name}_count {count}')
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        """Добавляет метрику в экспорт и возвращает её."""
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation):
+        """Создаёт и регистрирует счётчик."""
+        return self.register(Counter(name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        """Создаёт и регистрирует гистограмму."""
+        return self.register(Histogram(name, documentation, buckets))
+
+    def gauge(self, name, documentation, function):
+        """Создаёт и регистрирует вычисляемое значение."""
+        return self.register(Gauge(name, documentation, function))
+
+    def render(self):
+        """Текст всех метрик в формате Prometheus."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+def start_http_server(registry, port, host='0.0.0.0'):
+    """Запускает в фоновом потоке HTTP-сервер с метриками на /metrics."""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type',
+                             'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever,
+                              name='metrics-http', daemon=True)
+    thread.start()
+    return server
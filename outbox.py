@@ -0,0 +1,245 @@
+"""Очередь исходящих сообщений Telegram с учётом лимитов частоты."""
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def wait_time(self):
+        """Через сколько секунд появится токен (0 — уже есть)."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Забирает токен; перед вызовом нужно убедиться в wait_time()==0."""
+        self._refill()
+        self.tokens -= 1
+
+    def is_full(self):
+        """Ведро полное, его состояние можно не хранить."""
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class Outbox:
+    """Очередь исходящих сообщений, которую разбирает отдельный поток.
+
+    На каждый чат и на бота целиком заведено по ведру токенов. Сообщения,
+    ожидающие отправки в один чат, склеиваются в одно, если помещаются
+    в limit символов. При флуд-контроле (у ошибки есть retry_after)
+    сообщение остаётся первым в очереди чата до истечения паузы, при
+    прочих ошибках — повторяется с экспоненциальной задержкой до
+    max_retries раз.
+
+    Сообщение, которое так и не ушло (исчерпаны попытки или очередь
+    остановлена раньше), попадает в undelivered, а его обработчики
+    on_failed вызываются, чтобы отправитель мог вернуть своё состояние.
+    """
+
+    def __init__(self, send, chat_rate=1.0, global_rate=30.0, limit=4096,
+                 max_retries=5, backoff=1.0, clock=time.monotonic):
+        self._send = send
+        self.chat_rate = chat_rate
+        self.limit = limit
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._clock = clock
+        self._global = TokenBucket(global_rate, clock=clock)
+        self._buckets = {}
+        self._queues = OrderedDict()
+        self._blocked_until = {}
+        self._sending = 0
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self.stats = {'sent': 0, 'coalesced': 0, 'retried': 0, 'dropped': 0}
+        self.undelivered = []
+
+    def put(self, chat_id, text, on_failed=None):
+        """Ставит сообщение в очередь чата, не дожидаясь отправки.
+
+        on_failed вызывается, если сообщение так и не будет доставлено.
+        """
+        callbacks = [on_failed] if on_failed is not None else []
+        with self._condition:
+            queue = self._queues.setdefault(chat_id, deque())
+            if queue:
+                last = queue[-1]
+                merged = f'{last[0]}\n\n{text}'
+                if len(merged) <= self.limit:
+                    last[0] = merged
+                    last[2].extend(callbacks)
+                    self.stats['coalesced'] += 1
+                    return
+            queue.append([text, 0, callbacks])
+            self._condition.notify()
+
+    def pending(self):
+        """Число сообщений в очередях и в процессе отправки."""
+        with self._condition:
+            return self._sending + sum(
+                len(queue) for queue in self._queues.values()
+            )
+
+    def _bucket(self, chat_id):
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(
+                self.chat_rate, clock=self._clock
+            )
+        return bucket
+
+    def _next_ready(self):
+        """Возвращает (chat_id, None) или (None, сколько ждать)."""
+        wait = self._global.wait_time()
+        if wait:
+            return None, wait
+        now = self._clock()
+        wait = None
+        for chat_id in self._queues:
+            chat_wait = max(
+                self._blocked_until.get(chat_id, now) - now,
+                self._bucket(chat_id).wait_time(),
+            )
+            if chat_wait <= 0:
+                return chat_id, None
+            wait = chat_wait if wait is None else min(wait, chat_wait)
+        return None, wait
+
+    def _take(self):
+        """Достаёт из очереди следующее готовое к отправке сообщение."""
+        with self._condition:
+            while True:
+                if self._stopping and not self._queues:
+                    return None, None
+                chat_id, wait = self._next_ready()
+                if chat_id is not None:
+                    break
+                self._condition.wait(timeout=wait)
+            self._global.take()
+            self._bucket(chat_id).take()
+            queue = self._queues.pop(chat_id)
+            item = queue.popleft()
+            if queue:
+                # Чат уходит в конец очереди: отправка по кругу.
+                self._queues[chat_id] = queue
+            self._sending += 1
+            return chat_id, item
+
+    def _requeue(self, chat_id, item, delay):
+        with self._condition:
+            self._queues.setdefault(chat_id, deque()).appendleft(item)
+            self._queues.move_to_end(chat_id, last=False)
+            self._blocked_until[chat_id] = self._clock() + delay
+            self._condition.notify()
+
+    def process_one(self):
+        """Отправляет одно сообщение; False, если очередь остановлена."""
+        chat_id, item = self._take()
+        if chat_id is None:
+            return False
+        try:
+            self._send(chat_id, item[0])
+            self.stats['sent'] += 1
+            logging.info(f'Бот отправил сообщение "{item[0]}"')
+        except Exception as error:
+            retry_after = getattr(error, 'retry_after', None)
+            if retry_after is None:
+                item[1] += 1
+                retry_after = self.backoff * 2 ** (item[1] - 1)
+            if item[1] > self.max_retries:
+                logging.error(f'{error}, Бот не отправил сообщение '
+                              f'{item[0]}', exc_info=True)
+                self._drop(chat_id, item)
+            else:
+                self.stats['retried'] += 1
+                self._requeue(chat_id, item, retry_after)
+        finally:
+            with self._condition:
+                self._sending -= 1
+                self._forget_idle(chat_id)
+                self._condition.notify_all()
+        return True
+
+    def _drop(self, chat_id, item):
+        """Учитывает недоставленное сообщение и сообщает отправителю."""
+        self.stats['dropped'] += 1
+        self.undelivered.append((chat_id, item[0]))
+        for on_failed in item[2]:
+            try:
+                on_failed()
+            except Exception as error:
+                logging.error(f'{error}, не удалось вернуть состояние '
+                              f'недоставленного сообщения', exc_info=True)
+
+    def _forget_idle(self, chat_id):
+        if chat_id in self._queues:
+            return
+        self._blocked_until.pop(chat_id, None)
+        if self._bucket(chat_id).is_full():
+            del self._buckets[chat_id]
+
+    def _run(self):
+        while self.process_one():
+            pass
+
+    def start(self):
+        """Запускает поток отправки."""
+        self._thread = threading.Thread(
+            target=self._run, name='telegram-outbox', daemon=True
+        )
+        self._thread.start()
+
+    def drain(self, timeout=None):
+        """Ждёт опустошения очереди; True, если успели за timeout."""
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._condition:
+            while self._queues or self._sending:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - self._clock()
+                    if remaining <= 0:
+                        return False
+                self._condition.wait(timeout=remaining)
+        return True
+
+    def stop(self, timeout=None):
+        """Дожидается отправки очереди и останавливает поток.
+
+        Не успевшие уйти сообщения попадают в undelivered; возвращает
+        True, если очередь опустела за timeout.
+        """
+        drained = self.drain(timeout)
+        with self._condition:
+            self._stopping = True
+            left = [(chat_id, item) for chat_id, queue in self._queues.items()
+                    for item in queue]
+            self._queues.clear()
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if left:
+            logging.error(f'Очередь остановлена, не отправлено сообщений: '
+                          f'{len(left)}')
+        for chat_id, item in left:
+            self._drop(chat_id, item)
+        return drained
@@ -0,0 +1,89 @@
+"""Пул процессов для CPU-части цикла опроса в asyncio-режиме."""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+
+def run_batch(function, items):
+    """Применяет function к каждому элементу пачки в процессе пула.
+
+    Ошибка одного элемента не прерывает пачку: возвращаются пары
+    (успех, результат или исключение).
+    """
+    results = []
+    for item in items:
+        try:
+            results.append((True, function(item)))
+        except Exception as error:
+            results.append((False, error))
+    return results
+
+
+class ParsePool:
+    """Собирает элементы в пачки и обрабатывает их в пуле процессов.
+
+    Пачка уходит в пул, когда набралось batch_size элементов или прошло
+    max_delay секунд с первого элемента. Сетевые вызовы остаются в цикле
+    событий, в процессы передаются только байты ответов.
+    """
+
+    def __init__(self, function, workers=None, batch_size=64,
+                 max_delay=0.005, executor=None):
+        self.function = function
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.batches = 0
+        self._executor = executor or ProcessPoolExecutor(workers)
+        self._batch = []
+        self._timer = None
+
+    async def submit(self, item):
+        """Обрабатывает элемент в пуле и возвращает результат."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append((item, future))
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        self.batches += 1
+        done = asyncio.get_running_loop().run_in_executor(
+            self._executor, run_batch, self.function,
+            [item for item, _ in batch]
+        )
+        done.add_done_callback(lambda result: self._deliver(batch, result))
+
+    @staticmethod
+    def _deliver(batch, done):
+        if done.cancelled() or done.exception() is not None:
+            error = (asyncio.CancelledError() if done.cancelled()
+                     else done.exception())
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), (ok, value) in zip(batch, done.result()):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def close(self, wait_pending=False):
+        """Останавливает пул процессов.
+
+        При wait_pending=True накопленная пачка отправляется в пул,
+        а начатые доделываются; иначе они отменяются.
+        """
+        if wait_pending:
+            self._flush()
+        self._executor.shutdown(wait=False, cancel_futures=not wait_pending)
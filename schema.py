@@ -0,0 +1,70 @@
+"""Декларативные схемы ответов API и собранные из них валидаторы."""
+
+
+class Field:
+    """Описание поля объекта: допустимые типы и обязательность."""
+
+    def __init__(self, types, required=True):
+        self.types = types if isinstance(types, tuple) else (types,)
+        self.required = required
+
+
+def _type_names(types):
+    return ' или '.join(kind.__name__ for kind in types)
+
+
+class Schema:
+    """Схема объекта, один раз собранная в функцию проверки.
+
+    Вызов schema(item) возвращает список всех нарушений элемента
+    (пустой, если элемент корректен), а не останавливается на первом.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self._checks = tuple(
+            (name, field.types, field.required, _type_names(field.types))
+            for name, field in fields.items()
+        )
+
+    def __call__(self, item):
+        """Возвращает список нарушений элемента."""
+        if type(item) is not dict:
+            return [f'ожидался объект, получен {type(item).__name__}']
+        violations = []
+        for name, types, required, expected in self._checks:
+            value = item.get(name)
+            if value is None:
+                if required and name not in item:
+                    violations.append(f'нет поля {name}')
+                elif required:
+                    violations.append(f'{name}: пустое значение')
+            elif not isinstance(value, types):
+                violations.append(
+                    f'{name}: ожидался {expected}, '
+                    f'получен {type(value).__name__}'
+                )
+        return violations
+
+    def split(self, items):
+        """Делит элементы за один проход на корректные и нарушения.
+
+        Возвращает (корректные элементы, [(индекс, нарушения)]).
+        """
+        valid = []
+        invalid = []
+        for index, item in enumerate(items):
+            violations = self(item)
+            if violations:
+                invalid.append((index, violations))
+            else:
+                valid.append(item)
+        return valid, invalid
+
+
+def describe(invalid):
+    """Собирает нарушения всех элементов в одну строку для лога."""
+    return '; '.join(
+        f'[{index}] ' + ', '.join(violations)
+        for index, violations in invalid
+    )
@@ -0,0 +1,228 @@
+"""Распределение получателей между процессами-обработчиками.
+
+Получатели раскладываются по живым обработчикам консистентным
+хешированием, а право опрашивать получателя подтверждается арендой
+(lease) в общем координаторе. Пока аренда не освобождена старым
+владельцем или не истекла, новый владелец её не получит, поэтому при
+перебалансировке получателя не опрашивают дважды. Аренда, брошенная
+упавшим процессом, истекает через ttl, поэтому получатель не теряется.
+"""
+import abc
+import bisect
+import contextlib
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+def _hash(value):
+    return int.from_bytes(
+        hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big'
+    )
+
+
+class HashRing:
+    """Кольцо консистентного хеширования с виртуальными узлами."""
+
+    def __init__(self, nodes=(), replicas=64):
+        self.replicas = replicas
+        self._points = []
+        self._owners = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        """Добавляет узел на кольцо."""
+        for replica in range(self.replicas):
+            point = _hash(f'{node}#{replica}')
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def node_for(self, key):
+        """Возвращает узел, отвечающий за ключ, или None."""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+class Coordinator(abc.ABC):
+    """Интерфейс координатора: участники и аренды получателей."""
+
+    @abc.abstractmethod
+    def heartbeat(self, worker_id):
+        """Отмечает обработчик живым."""
+
+    @abc.abstractmethod
+    def members(self):
+        """Возвращает идентификаторы живых обработчиков."""
+
+    @abc.abstractmethod
+    def leave(self, worker_id):
+        """Удаляет обработчик и все его аренды."""
+
+    @abc.abstractmethod
+    def claim(self, tenant_id, worker_id):
+        """Берёт или продлевает аренду; True, если она у worker_id."""
+
+    @abc.abstractmethod
+    def release(self, tenant_id, worker_id):
+        """Освобождает аренду, если она принадлежит worker_id."""
+
+    def transaction(self):
+        """Объединяет вызовы внутри блока with в одну операцию."""
+        return contextlib.nullcontext()
+
+
+class SQLiteCoordinator(Coordinator):
+    """Координатор на общем файле SQLite для обработчиков одного узла.
+
+    Атомарность аренды обеспечивают файловые блокировки SQLite.
+    """
+
+    def __init__(self, path, ttl=30.0, clock=time.time):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(
+            path, timeout=ttl, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(
+            'CREATE TABLE IF NOT EXISTS workers ('
+            ' worker_id TEXT PRIMARY KEY, seen REAL NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS leases ('
+            ' tenant_id TEXT PRIMARY KEY, worker_id TEXT NOT NULL,'
+            ' expires REAL NOT NULL);'
+        )
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._connection.execute(sql, params)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Выполняет вызовы внутри блока with одной транзакцией."""
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+
+    def heartbeat(self, worker_id):
+        """Отмечает обработчик живым."""
+        self._execute('INSERT OR REPLACE INTO workers VALUES (?, ?)',
+                      (worker_id, self._clock()))
+
+    def members(self):
+        """Возвращает обработчики, отмечавшиеся не позже ttl назад."""
+        rows = self._execute(
+            'SELECT worker_id FROM workers WHERE seen >= ? ORDER BY worker_id',
+            (self._clock() - self.ttl,)
+        ).fetchall()
+        return [worker_id for worker_id, in rows]
+
+    def leave(self, worker_id):
+        """Удаляет обработчик и все его аренды."""
+        self._execute('DELETE FROM leases WHERE worker_id = ?', (worker_id,))
+        self._execute('DELETE FROM workers WHERE worker_id = ?', (worker_id,))
+
+    def claim(self, tenant_id, worker_id):
+        """Берёт свободную или просроченную аренду либо продлевает свою."""
+        now = self._clock()
+        cursor = self._execute(
+            'INSERT INTO leases VALUES (?, ?, ?) '
+            'ON CONFLICT(tenant_id) DO UPDATE SET '
+            ' worker_id = excluded.worker_id, expires = excluded.expires '
+            'WHERE leases.worker_id = excluded.worker_id '
+            ' OR leases.expires < ?',
+            (tenant_id, worker_id, now + self.ttl, now)
+        )
+        return cursor.rowcount == 1
+
+    def release(self, tenant_id, worker_id):
+        """Освобождает аренду, если она принадлежит worker_id."""
+        self._execute(
+            'DELETE FROM leases WHERE tenant_id = ? AND worker_id = ?',
+            (tenant_id, worker_id)
+        )
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        self._connection.close()
+
+
+class ShardManager:
+    """Набор получателей, который опрашивает данный обработчик.
+
+    rebalance() вызывается раз в ttl/3 секунд: отмечает обработчик
+    живым, отдаёт чужих по кольцу получателей (кроме занятых опросом
+    прямо сейчас) и берёт аренду на своих — всё одной транзакцией
+    координатора.
+    """
+
+    def __init__(self, worker_id, coordinator, ttl=30.0, on_release=None,
+                 clock=time.time, replicas=64):
+        self.worker_id = worker_id
+        self.coordinator = coordinator
+        self.ttl = ttl
+        self.on_release = on_release
+        self.replicas = replicas
+        self.next_rebalance = 0.0
+        self._clock = clock
+        self._owned = {}
+
+    def owns(self, tenant_id):
+        """Действует ли ещё аренда на получателя (с запасом в ttl/3)."""
+        expires = self._owned.get(tenant_id)
+        return expires is not None and self._clock() < expires - self.ttl / 3
+
+    def owned(self):
+        """Получатели с действующей арендой."""
+        return [tenant_id for tenant_id in self._owned if self.owns(tenant_id)]
+
+    def is_due(self):
+        """Пора ли перебалансировать."""
+        return self._clock() >= self.next_rebalance
+
+    def rebalance(self, tenant_ids, busy=()):
+        """Пересчитывает свою долю; возвращает (добавленные, снятые)."""
+        with self.coordinator.transaction():
+            return self._rebalance(tenant_ids, busy)
+
+    def _rebalance(self, tenant_ids, busy):
+        now = self._clock()
+        self.coordinator.heartbeat(self.worker_id)
+        ring = HashRing(self.coordinator.members(), self.replicas)
+        tenant_ids = set(tenant_ids)
+        mine = {tenant_id for tenant_id in tenant_ids
+                if ring.node_for(tenant_id) == self.worker_id}
+        removed = [tenant_id for tenant_id in self._owned
+                   if tenant_id not in mine and tenant_id not in busy]
+        if removed and self.on_release is not None:
+            self.on_release(removed)
+        for tenant_id in removed:
+            self.coordinator.release(tenant_id, self.worker_id)
+            del self._owned[tenant_id]
+        added = []
+        for tenant_id in mine | (set(self._owned) & set(busy)):
+            if self.coordinator.claim(tenant_id, self.worker_id):
+                if tenant_id not in self._owned:
+                    added.append(tenant_id)
+                self._owned[tenant_id] = now + self.ttl
+            elif self._owned.pop(tenant_id, None) is not None:
+                removed.append(tenant_id)
+        self.next_rebalance = now + self.ttl / 3
+        return added, removed
+
+    def leave(self):
+        """Отдаёт все аренды при остановке обработчика."""
+        if self._owned and self.on_release is not None:
+            self.on_release(list(self._owned))
+        self.coordinator.leave(self.worker_id)
+        self._owned.clear()
@@ -0,0 +1,79 @@
+"""Снимки статусов работ для ответов на команды бота.
+
+Снимок пополняет опрос (и webhook), а команды только читают его:
+запрос студента никогда не превращается в запрос к API.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from state import STATUSES, homework_key
+
+
+@dataclass(slots=True)
+class StatusSnapshot:
+    """Последний статус работы: код статуса и готовый текст."""
+
+    code: int
+    message: str
+
+
+class SnapshotCache:
+    """Последние статусы и история изменений по получателям."""
+
+    def __init__(self, history_limit=20, clock=time.time):
+        self.history_limit = history_limit
+        self._clock = clock
+        self._latest = {}
+        self._history = {}
+        self._lock = threading.Lock()
+
+    def record(self, tenant_id, homework_id, status, message):
+        """Запоминает статус работы; в историю попадают только изменения."""
+        homework_id = homework_key(homework_id)
+        with self._lock:
+            latest = self._latest.setdefault(tenant_id, {})
+            previous = latest.get(homework_id)
+            code = STATUSES.code(status)
+            if previous is not None and previous.code == code:
+                # Текст мог быть восстановлен из состояния без полей работы.
+                previous.message = message
+                return
+            latest[homework_id] = StatusSnapshot(code, message)
+            self._history.setdefault(
+                tenant_id, deque(maxlen=self.history_limit)
+            ).append((self._clock(), message))
+
+    def seed(self, tenant_id, rendered):
+        """Заполняет снимок сохранёнными статусами, не трогая историю.
+
+        rendered — тройки (id работы, статус, сообщение); статусы,
+        которые снимок уже знает, не заменяются.
+        """
+        with self._lock:
+            latest = self._latest.setdefault(tenant_id, {})
+            for homework_id, status, message in rendered:
+                code = STATUSES.code(status)
+                previous = latest.get(homework_key(homework_id))
+                if previous is None or previous.code != code:
+                    latest[homework_key(homework_id)] = StatusSnapshot(
+                        code, message
+                    )
+
+    def latest(self, tenant_id):
+        """Тексты последних статусов всех работ получателя."""
+        with self._lock:
+            return [snapshot.message for snapshot
+                    in self._latest.get(tenant_id, {}).values()]
+
+    def history(self, tenant_id):
+        """Изменения статусов получателя: пары (время, текст)."""
+        with self._lock:
+            return list(self._history.get(tenant_id, ()))
+
+    def forget(self, tenant_id):
+        """Удаляет снимок получателя."""
+        with self._lock:
+            self._latest.pop(tenant_id, None)
+            self._history.pop(tenant_id, None)
@@ -0,0 +1,100 @@
+"""Быстрый старт: отложенный импорт, отложенные объекты, замер импорта."""
+import importlib.util
+import subprocess
+import sys
+import threading
+import time
+
+
+def lazy_import(name):
+    """Возвращает модуль, который загрузится при первом обращении к нему.
+
+    Уже загруженный модуль возвращается как есть.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f'Модуль {name} не найден', name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class LazyObject:
+    """Заместитель объекта, который создаётся при первом обращении.
+
+    factory вызывается один раз, даже если первыми к объекту обратились
+    несколько потоков сразу; дальше атрибуты берутся у созданного объекта.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    @property
+    def created(self):
+        """Объект уже создан."""
+        return self._target is not None
+
+    def resolve(self):
+        """Создаёт объект, если его ещё нет, и возвращает его."""
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._factory()
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+
+def profile_imports(module):
+    """Импортирует module в отдельном процессе с -X importtime.
+
+    Возвращает время запуска процесса в секундах и строки замера:
+    (собственное время, суммарное время в микросекундах, глубина, модуль).
+    """
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True,
+    )
+    elapsed = time.perf_counter() - started
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(own), int(cumulative), depth, name.strip()))
+    return elapsed, rows
+
+
+def format_import_profile(module, elapsed, rows, top=20):
+    """Сводка замера: итог и самые долгие прямые импорты модуля."""
+    index = next((index for index, row in enumerate(rows)
+                  if row[3] == module), None)
+    if index is None:
+        return f'Модуль {module} не найден в замере импорта'
+    _, total, depth, _ = rows[index]
+    # Вложенные импорты печатаются перед модулем, с большим отступом.
+    start = index
+    while start and rows[start - 1][2] > depth:
+        start -= 1
+    direct = sorted((row for row in rows[start:index]
+                     if row[2] == depth + 1),
+                    key=lambda row: row[1], reverse=True)
+    lines = [
+        f'Запуск интерпретатора с импортом {module}: {elapsed * 1000:.0f} мс',
+        f'Импорт {module}: {total / 1000:.1f} мс',
+        f'{"суммарно, мс":>14} {"своё, мс":>10}  модуль',
+    ]
+    for own, cumulative, _, name in direct[:top]:
+        lines.append(f'{cumulative / 1000:>14.1f} {own / 1000:>10.1f}  {name}')
+    return '\n'.join(lines)
@@ -0,0 +1,499 @@
+"""Хранилище курсоров from_date и последних отправленных статусов."""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+
+
+class StatusTable:
+    """Статусы работ, сведённые к небольшим целым кодам.
+
+    Каждая строка статуса хранится один раз, а в состоянии получателей
+    лежат коды — малые int, которые CPython не создаёт заново.
+    """
+
+    def __init__(self, statuses=()):
+        self._names = []
+        self._codes = {}
+        self._lock = threading.Lock()
+        for status in statuses:
+            self.code(status)
+
+    def code(self, status):
+        """Возвращает код статуса, заводя новый при первой встрече."""
+        code = self._codes.get(status)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(status)
+                if code is None:
+                    code = len(self._names)
+                    self._names.append(sys.intern(status))
+                    self._codes[self._names[code]] = code
+        return code
+
+    def name(self, code):
+        """Возвращает строку статуса по коду."""
+        return self._names[code]
+
+    def __len__(self):
+        return len(self._names)
+
+
+STATUSES = StatusTable()
+
+
+def homework_key(homework_id):
+    """Ключ работы: число для числовых id, иначе строка."""
+    text = str(homework_id)
+    if text.isdigit() and (text == '0' or text[0] != '0'):
+        return int(text)
+    return text
+
+
+class StatusRow:
+    """Коды статусов работ одного получателя.
+
+    Числовые id работ лежат в одном массиве int64 парами (id, код),
+    прочие ключи — в словаре, который заводится только для них.
+    """
+
+    __slots__ = ('_pairs', '_other')
+
+    def __init__(self):
+        self._pairs = array('q')
+        self._other = None
+
+    @staticmethod
+    def _packable(key):
+        return type(key) is int and -2 ** 63 <= key < 2 ** 63
+
+    def _find(self, key):
+        start = 0
+        while True:
+            try:
+                index = self._pairs.index(key, start)
+            except ValueError:
+                return -1
+            if index % 2 == 0:
+                return index
+            # Совпал код статуса, а не id: ищем дальше.
+            start = index + 1
+
+    def get(self, key, default=None):
+        """Возвращает код статуса работы или default."""
+        if self._packable(key):
+            index = self._find(key)
+            return default if index < 0 else self._pairs[index + 1]
+        return default if self._other is None else self._other.get(
+            key, default
+        )
+
+    def __setitem__(self, key, code):
+        if not self._packable(key):
+            if self._other is None:
+                self._other = {}
+            self._other[key] = code
+            return
+        index = self._find(key)
+        if index < 0:
+            self._pairs.extend((key, code))
+        else:
+            self._pairs[index + 1] = code
+
+    def pop(self, key, default=None):
+        """Удаляет работу и возвращает её код или default."""
+        if not self._packable(key):
+            return default if self._other is None else self._other.pop(
+                key, default
+            )
+        index = self._find(key)
+        if index < 0:
+            return default
+        code = self._pairs[index + 1]
+        del self._pairs[index:index + 2]
+        return code
+
+    def items(self):
+        """Пары (ключ работы, код статуса)."""
+        pairs = self._pairs
+        result = [(pairs[index], pairs[index + 1])
+                  for index in range(0, len(pairs), 2)]
+        if self._other:
+            result.extend(self._other.items())
+        return result
+
+    def values(self):
+        """Коды статусов работ."""
+        return [code for _, code in self.items()]
+
+    def __iter__(self):
+        return iter([key for key, _ in self.items()])
+
+    def __len__(self):
+        return len(self._pairs) // 2 + len(self._other or ())
+
+
+class CursorTable:
+    """Курсоры from_date в массиве int64 с индексом по получателю."""
+
+    MISSING = -2 ** 63
+
+    def __init__(self):
+        self._slots = {}
+        self._values = array('q')
+
+    def get(self, tenant_id, default=None):
+        """Возвращает курсор получателя или default."""
+        slot = self._slots.get(tenant_id)
+        if slot is None or self._values[slot] == self.MISSING:
+            return default
+        return self._values[slot]
+
+    def __setitem__(self, tenant_id, from_date):
+        slot = self._slots.get(tenant_id)
+        if slot is None:
+            self._slots[tenant_id] = len(self._values)
+            self._values.append(int(from_date))
+        else:
+            self._values[slot] = int(from_date)
+
+    def __contains__(self, tenant_id):
+        return self.get(tenant_id) is not None
+
+    def __len__(self):
+        return len(self._slots)
+
+    def items(self):
+        """Пары (получатель, курсор)."""
+        return [(tenant_id, self._values[slot])
+                for tenant_id, slot in self._slots.items()]
+
+
+class StateStore:
+    """Состояние в памяти; базовый класс для постоянных хранилищ.
+
+    Изменения копятся до вызова commit() в конце цикла опроса. Наследники
+    записывают их в commit() и делают fsync пачкой: раз в sync_every
+    циклов или раз в sync_interval секунд, что наступит раньше.
+    """
+
+    def __init__(self, sync_every=50, sync_interval=5.0, clock=time.monotonic):
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.syncs = 0
+        self._clock = clock
+        self._cursors = CursorTable()
+        self._statuses = {}
+        self._pending = []
+        self._unsynced = 0
+        self._last_sync = clock()
+        self._lock = threading.Lock()
+
+    def load_cursor(self, tenant_id):
+        """Возвращает сохранённый from_date получателя или None."""
+        return self._cursors.get(tenant_id)
+
+    def save_cursor(self, tenant_id, from_date):
+        """Запоминает курсор получателя до ближайшего commit()."""
+        with self._lock:
+            if self._cursors.get(tenant_id) == from_date:
+                return
+            self._cursors[tenant_id] = from_date
+            self._pending.append({'t': tenant_id, 'c': from_date})
+
+    def last_status(self, tenant_id, homework_id):
+        """Возвращает последний отправленный статус работы или None."""
+        code = self._statuses.get(tenant_id, {}).get(homework_key(homework_id))
+        return None if code is None else STATUSES.name(code)
+
+    def tenant_statuses(self, tenant_id):
+        """Возвращает последние отправленные статусы всех работ."""
+        return {str(homework_id): STATUSES.name(code) for homework_id, code
+                in self._statuses.get(tenant_id, {}).items()}
+
+    def has_status(self, tenant_id, status):
+        """Есть ли у получателя работа с таким отправленным статусом."""
+        return STATUSES.code(status) in self._statuses.get(
+            tenant_id, {}
+        ).values()
+
+    def save_status(self, tenant_id, homework_id, status):
+        """Запоминает отправленный статус работы до commit()."""
+        homework_id = str(homework_id)
+        with self._lock:
+            self._set_status(tenant_id, homework_id, status)
+            self._pending.append({'t': tenant_id, 'h': homework_id,
+                                  's': status})
+
+    def checkpoint(self, tenant_id):
+        """Возвращает копию отправленных статусов получателя."""
+        with self._lock:
+            return dict(self._statuses.get(tenant_id, {}).items())
+
+    def rollback(self, tenant_id, checkpoint, from_date):
+        """Возвращает статусы к checkpoint() и курсор не дальше from_date.
+
+        Нужен, когда сообщение о статусах так и не было доставлено:
+        следующий опрос снова увидит эти статусы и отправит их.
+        Возвращает True, если состояние пришлось менять.
+        """
+        changed = False
+        with self._lock:
+            current = self._statuses.get(tenant_id, {})
+            for key in set(current) | set(checkpoint):
+                code = checkpoint.get(key)
+                if current.get(key) == code:
+                    continue
+                status = None if code is None else STATUSES.name(code)
+                self._set_status(tenant_id, key, status)
+                self._pending.append({'t': tenant_id, 'h': str(key),
+                                      's': status})
+                changed = True
+            cursor = self._cursors.get(tenant_id)
+            if cursor is not None and cursor > from_date:
+                self._cursors[tenant_id] = from_date
+                self._pending.append({'t': tenant_id, 'c': from_date})
+                changed = True
+        return changed
+
+    def _set_status(self, tenant_id, homework_id, status):
+        if status is None:
+            self._statuses.get(tenant_id, {}).pop(
+                homework_key(homework_id), None
+            )
+            return
+        row = self._statuses.get(tenant_id)
+        if row is None:
+            row = self._statuses[tenant_id] = StatusRow()
+        row[homework_key(homework_id)] = STATUSES.code(status)
+
+    def _all_statuses(self):
+        for tenant_id, statuses in self._statuses.items():
+            for homework_id, code in statuses.items():
+                yield tenant_id, str(homework_id), STATUSES.name(code)
+
+    def commit(self):
+        """Записывает изменения цикла, fsync выполняется пачкой."""
+        with self._lock:
+            records, self._pending = self._pending, []
+            if records:
+                try:
+                    self._write(records)
+                except Exception:
+                    # Изменения не потеряются: их запишет следующий commit().
+                    self._pending = records + self._pending
+                    raise
+                self._unsynced += 1
+            due = (self._unsynced >= self.sync_every
+                   or self._clock() - self._last_sync >= self.sync_interval)
+            if self._unsynced and due:
+                self._sync_locked()
+
+    def flush(self):
+        """Принудительно записывает и синхронизирует всё накопленное."""
+        self.commit()
+        with self._lock:
+            if self._unsynced:
+                self._sync_locked()
+
+    def close(self):
+        """Сбрасывает изменения на диск и закрывает хранилище."""
+        self.flush()
+
+    def refresh(self, tenant_id):
+        """Перечитывает состояние получателя, записанное другим процессом."""
+
+    def _sync_locked(self):
+        self._sync()
+        self.syncs += 1
+        self._unsynced = 0
+        self._last_sync = self._clock()
+
+    def _apply(self, record):
+        if 'c' in record:
+            self._cursors[record['t']] = record['c']
+        else:
+            self._set_status(record['t'], record['h'], record['s'])
+
+    def _write(self, records):
+        pass
+
+    def _sync(self):
+        pass
+
+
+class FileStateStore(StateStore):
+    """Журнал JSON-строк, дописываемый в конец файла.
+
+    Журнал сжимается при открытии и после commit(), когда в нём больше
+    compact_after строк и вдвое больше, чем актуальных записей.
+    """
+
+    def __init__(self, path, compact_after=10000, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.compact_after = compact_after
+        self._lines = 0
+        if os.path.exists(path):
+            with open(path, 'r+b') as file:
+                good = 0
+                for line in file:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('нет конца строки')
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        # Недописанную при аварии строку отрезаем, иначе
+                        # новые записи склеятся с ней и тоже потеряются.
+                        file.truncate(good)
+                        break
+                    good += len(line)
+                    self._lines += 1
+        self._file = open(path, 'a', encoding='utf-8')
+        self._compact_at = self._next_compaction()
+        if self._lines >= self._compact_at:
+            self.compact()
+
+    def _live_records(self):
+        return len(self._cursors) + sum(
+            len(statuses) for statuses in self._statuses.values()
+        )
+
+    def _next_compaction(self):
+        return max(self.compact_after, 2 * self._live_records())
+
+    def _write(self, records):
+        self._file.write(''.join(
+            json.dumps(record, ensure_ascii=False) + '\n'
+            for record in records
+        ))
+        self._lines += len(records)
+
+    def commit(self):
+        """Записывает изменения цикла и при росте журнала сжимает его."""
+        super().commit()
+        if self._lines >= self._compact_at:
+            self.compact()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def compact(self):
+        """Переписывает журнал, оставляя только актуальные записи.
+
+        Несохранённые изменения уже есть в памяти и попадают в новый
+        журнал вместе с остальными.
+        """
+        with self._lock:
+            self._pending = []
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                for tenant_id, from_date in self._cursors.items():
+                    file.write(json.dumps({'t': tenant_id, 'c': from_date})
+                               + '\n')
+                for tenant_id, homework_id, status in self._all_statuses():
+                    file.write(json.dumps({'t': tenant_id, 'h': homework_id,
+                                           's': status}) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+            self._file.close()
+            os.replace(temp_path, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._unsynced = 0
+            self._last_sync = self._clock()
+            self._lines = self._live_records()
+            self._compact_at = self._next_compaction()
+
+    def close(self):
+        """Сбрасывает журнал на диск и закрывает файл."""
+        super().close()
+        self._file.close()
+
+
+class SQLiteStateStore(StateStore):
+    """Состояние в SQLite: короткая транзакция на каждый commit().
+
+    Базу могут делить несколько обработчиков (SHARD_DB), поэтому
+    блокировка записи не держится между циклами. Пачечную надёжность
+    даёт synchronous=NORMAL в режиме WAL: fsync выполняется при
+    контрольной точке, которую _sync() делает раз в sync_every циклов.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            'CREATE TABLE IF NOT EXISTS cursors ('
+            ' tenant_id TEXT PRIMARY KEY, from_date INTEGER NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS statuses ('
+            ' tenant_id TEXT, homework_id TEXT, status TEXT NOT NULL,'
+            ' PRIMARY KEY (tenant_id, homework_id));'
+        )
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        for tenant_id, from_date in self._connection.execute(
+            'SELECT tenant_id, from_date FROM cursors'
+        ):
+            self._cursors[tenant_id] = from_date
+        for tenant_id, homework_id, status in self._connection.execute(
+            'SELECT tenant_id, homework_id, status FROM statuses'
+        ):
+            self._set_status(tenant_id, homework_id, status)
+
+    def refresh(self, tenant_id):
+        """Перечитывает курсор и статусы получателя из базы."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT from_date FROM cursors WHERE tenant_id = ?',
+                (tenant_id,)
+            ).fetchone()
+            if row is not None:
+                self._cursors[tenant_id] = row[0]
+            self._statuses.pop(tenant_id, None)
+            for homework_id, status in self._connection.execute(
+                'SELECT homework_id, status FROM statuses '
+                'WHERE tenant_id = ?', (tenant_id,)
+            ):
+                self._set_status(tenant_id, homework_id, status)
+
+    def _write(self, records):
+        # Транзакция фиксируется сразу, ошибка откатывает её целиком.
+        with self._connection:
+            for record in records:
+                if 'c' in record:
+                    self._connection.execute(
+                        'INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+                        (record['t'], record['c'])
+                    )
+                elif record['s'] is None:
+                    self._connection.execute(
+                        'DELETE FROM statuses '
+                        'WHERE tenant_id = ? AND homework_id = ?',
+                        (record['t'], record['h'])
+                    )
+                else:
+                    self._connection.execute(
+                        'INSERT OR REPLACE INTO statuses VALUES (?, ?, ?)',
+                        (record['t'], record['h'], record['s'])
+                    )
+
+    def _sync(self):
+        self._connection.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+    def close(self):
+        """Делает контрольную точку и закрывает соединение."""
+        super().close()
+        self._connection.close()
+
+
+def open_state_store(path=None, **kwargs):
+    """Открывает хранилище по пути: .db/.sqlite — SQLite, иначе журнал."""
+    if not path:
+        return StateStore(**kwargs)
+    if path.endswith(('.db', '.sqlite', '.sqlite3')):
+        return SQLiteStateStore(path, **kwargs)
+    return FileStateStore(path, **kwargs)
@@ -0,0 +1,138 @@
+"""Потоковый разбор ответа API: работы из homeworks по одной."""
+import codecs
+import json
+from json.decoder import scanstring
+
+WHITESPACE = ' \t\n\r'
+_DECODER = json.JSONDecoder()
+
+
+def _scan_key(text, position):
+    if text[position:position + 1] != '"':
+        raise ValueError('Ожидался ключ объекта')
+    return scanstring(text, position + 1)
+
+
+class HomeworkStream:
+    """Итератор по элементам массива homeworks из потока байтов.
+
+    Держит в памяти только текущий элемент и недочитанный хвост, поэтому
+    расход памяти не зависит от длины истории. Остальные ключи верхнего
+    уровня доступны после итерации (current_date). Ошибки структуры
+    повторяют check_response: не объект — TypeError, нет homeworks —
+    KeyError, homeworks не список — TypeError.
+    """
+
+    def __init__(self, chunks, on_close=None):
+        self.current_date = None
+        self.fields = {}
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._position = 0
+        self._eof = False
+        self._on_close = on_close
+
+    def _read(self):
+        """Дочитывает следующий кусок; False, если поток закончился."""
+        if self._eof:
+            return False
+        self._buffer = self._buffer[self._position:]
+        self._position = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self._buffer += text
+                return True
+        self._buffer += self._decoder.decode(b'', final=True)
+        self._eof = True
+        return True
+
+    def _peek(self):
+        """Первый непробельный символ или '' в конце потока."""
+        while True:
+            while (self._position < len(self._buffer)
+                   and self._buffer[self._position] in WHITESPACE):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read():
+                return ''
+
+    def _expect(self, char, error):
+        if self._peek() != char:
+            raise error
+        self._position += 1
+
+    def _decode(self, decode):
+        """Разбирает значение, дочитывая поток, пока его не хватает."""
+        while True:
+            self._peek()
+            try:
+                value, end = decode(self._buffer, self._position)
+            except ValueError:
+                if self._read():
+                    continue
+                raise json.JSONDecodeError(
+                    'Ответ API оборвался', self._buffer, self._position
+                )
+            # Число в конце буфера может продолжаться в следующем куске.
+            if end == len(self._buffer) and not self._eof:
+                self._read()
+                continue
+            self._position = end
+            return value
+
+    def _key(self):
+        return self._decode(_scan_key)
+
+    def _value(self):
+        return self._decode(_DECODER.raw_decode)
+
+    def __iter__(self):
+        try:
+            yield from self._parse()
+        finally:
+            self.close()
+
+    def _parse(self):
+        self._expect('{', TypeError(
+            'В ответ от сервиса API нет корректных данных.'
+        ))
+        seen_homeworks = False
+        while self._peek() != '}':
+            if self._peek() == ',':
+                self._position += 1
+            key = self._key()
+            self._expect(':', json.JSONDecodeError(
+                'Ожидалось ":"', self._buffer, self._position
+            ))
+            if key == 'homeworks':
+                seen_homeworks = True
+                yield from self._homeworks()
+            else:
+                self.fields[key] = self._value()
+        if not seen_homeworks:
+            raise KeyError('Нет ключа homeworks в ответе от сервиса API')
+        self.current_date = self.fields.get('current_date')
+
+    def _homeworks(self):
+        self._expect('[', TypeError(
+            'Домашняя работа нет представлена списком.'
+        ))
+        while self._peek() != ']':
+            if self._peek() == ',':
+                self._position += 1
+                continue
+            if not self._peek():
+                raise json.JSONDecodeError(
+                    'Ответ API оборвался', self._buffer, self._position
+                )
+            yield self._value()
+        self._position += 1
+
+    def close(self):
+        """Закрывает исходный поток (HTTP-ответ)."""
+        if self._on_close is not None:
+            self._on_close()
+            self._on_close = None
@@ -0,0 +1,100 @@
+"""Шаблоны уведомлений о статусах, собранные один раз при запуске.
+
+Каталог — словарь локалей: для каждой локали общий шаблон сообщения
+и вердикты по статусам. Шаблон может ссылаться на {verdict}, {status}
+и поля работы из ответа API ({homework_name}, {lesson_name},
+{reviewer_comment}). При сборке вердикт подставляется заранее, а
+шаблон разбирается на куски, так что отрисовка сообщения — одно
+склеивание строк без повторного разбора формата.
+"""
+import json
+from string import Formatter
+
+DEFAULT_LOCALE = 'ru'
+MESSAGE = 'Изменился статус проверки работы "{homework_name}". {verdict}'
+
+
+def compile_template(template, constants):
+    """Разбирает шаблон и подставляет известные заранее значения.
+
+    Возвращает кортеж кусков: строки-литералы и имена полей работы
+    в виде (имя,).
+    """
+    parts = []
+    literal = ''
+    for text, field, spec, conversion in Formatter().parse(template):
+        literal += text
+        if field is None:
+            continue
+        if spec or conversion:
+            raise ValueError(f'Формат поля {field} не поддерживается')
+        if field in constants:
+            literal += constants[field]
+            continue
+        if literal:
+            parts.append(literal)
+            literal = ''
+        parts.append((field,))
+    if literal:
+        parts.append(literal)
+    return tuple(parts)
+
+
+def render_parts(parts, homework):
+    """Склеивает собранный шаблон с полями работы."""
+    return ''.join(
+        part if type(part) is str else str(homework.get(part[0], ''))
+        for part in parts
+    )
+
+
+class TemplateCatalog:
+    """Собранные шаблоны уведомлений по локалям и статусам."""
+
+    def __init__(self, locales, default_locale=DEFAULT_LOCALE):
+        if default_locale not in locales:
+            raise ValueError(f'Нет шаблонов для локали {default_locale}')
+        self.default_locale = default_locale
+        self._compiled = {}
+        default = self._compile(locales[default_locale])
+        for locale, config in locales.items():
+            # Статусы без перевода берутся из локали по умолчанию.
+            self._compiled[locale] = {**default, **self._compile(config)}
+
+    @staticmethod
+    def _compile(config):
+        message = config.get('message', MESSAGE)
+        return {
+            status: compile_template(
+                config.get('messages', {}).get(status, message),
+                {'verdict': verdict, 'status': status}
+            )
+            for status, verdict in config.get('verdicts', {}).items()
+        }
+
+    @classmethod
+    def from_file(cls, path, default_locale=DEFAULT_LOCALE):
+        """Загружает каталог из JSON-файла {локаль: настройки}."""
+        with open(path, encoding='utf-8') as file:
+            return cls(json.load(file), default_locale)
+
+    def knows(self, status, locale=None):
+        """Есть ли в локали шаблон для статуса."""
+        return status in self._templates(locale)
+
+    def _templates(self, locale):
+        return self._compiled.get(locale) or self._compiled[
+            self.default_locale
+        ]
+
+    def render(self, homework, locale=None):
+        """Возвращает текст уведомления; KeyError для неизвестного статуса."""
+        return render_parts(
+            self._templates(locale)[homework['status']], homework
+        )
+
+    def render_many(self, homeworks, locale=None):
+        """Отрисовывает пачку уведомлений одной локали."""
+        templates = self._templates(locale)
+        return [render_parts(templates[homework['status']], homework)
+                for homework in homeworks]
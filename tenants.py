@@ -0,0 +1,138 @@
+"""Реестр получателей уведомлений и планировщик опроса API."""
+import heapq
+import itertools
+import json
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Tenant:
+    """Получатель: токен Практикума, чат Telegram, курсор и локаль."""
+
+    tenant_id: str
+    token: str
+    chat_id: int
+    from_date: int = 0
+    locale: str = None
+
+
+class TenantRegistry:
+    """Набор получателей, которых опрашивает один процесс."""
+
+    def __init__(self, tenants=()):
+        self._tenants = {}
+        self._chats = {}
+        for tenant in tenants:
+            self.add(tenant)
+
+    @classmethod
+    def from_file(cls, path, default_from_date=0):
+        """Загружает получателей из JSON-файла со списком объектов."""
+        with open(path, encoding='utf-8') as file:
+            entries = json.load(file)
+        return cls(
+            Tenant(
+                tenant_id=str(entry.get('id', entry['chat_id'])),
+                token=entry['token'],
+                chat_id=entry['chat_id'],
+                from_date=entry.get('from_date', default_from_date),
+                locale=entry.get('locale'),
+            )
+            for entry in entries
+        )
+
+    def add(self, tenant):
+        """Добавляет получателя или заменяет существующего."""
+        self.remove(tenant.tenant_id)
+        self._tenants[tenant.tenant_id] = tenant
+        self._chats.setdefault(str(tenant.chat_id), []).append(
+            tenant.tenant_id
+        )
+
+    def remove(self, tenant_id):
+        """Удаляет получателя, если он есть в реестре."""
+        tenant = self._tenants.pop(tenant_id, None)
+        if tenant is not None:
+            chat = self._chats[str(tenant.chat_id)]
+            chat.remove(tenant_id)
+            if not chat:
+                del self._chats[str(tenant.chat_id)]
+        return tenant
+
+    def for_chat(self, chat_id):
+        """Возвращает идентификаторы получателей, пишущих в чат."""
+        return list(self._chats.get(str(chat_id), ()))
+
+    def get(self, tenant_id):
+        """Возвращает получателя по идентификатору или None."""
+        return self._tenants.get(tenant_id)
+
+    def ids(self):
+        """Возвращает идентификаторы всех получателей."""
+        return list(self._tenants)
+
+    def __contains__(self, tenant_id):
+        return tenant_id in self._tenants
+
+    def __iter__(self):
+        return iter(list(self._tenants.values()))
+
+    def __len__(self):
+        return len(self._tenants)
+
+
+class PollScheduler:
+    """Очередь сроков опроса, равномерно распределённых по периоду."""
+
+    def __init__(self, period):
+        self.period = period
+        self._heap = []
+        self._due = {}
+        self._counter = itertools.count()
+
+    def spread(self, tenant_ids, start):
+        """Расставляет опросы с равным шагом внутри одного периода."""
+        tenant_ids = list(tenant_ids)
+        if not tenant_ids:
+            return
+        step = self.period / len(tenant_ids)
+        for index, tenant_id in enumerate(tenant_ids):
+            self.schedule(tenant_id, start + index * step)
+
+    def schedule(self, tenant_id, at):
+        """Назначает (или переносит) срок опроса получателя."""
+        self._due[tenant_id] = at
+        heapq.heappush(self._heap, (at, next(self._counter), tenant_id))
+
+    def cancel(self, tenant_id):
+        """Снимает получателя с расписания."""
+        self._due.pop(tenant_id, None)
+
+    def _is_current(self, at, tenant_id):
+        return self._due.get(tenant_id) == at
+
+    def _drop_stale(self):
+        while self._heap and not self._is_current(
+            self._heap[0][0], self._heap[0][2]
+        ):
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now):
+        """Возвращает пары (tenant_id, срок) для наступивших сроков."""
+        due = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            at, _, tenant_id = heapq.heappop(self._heap)
+            if self._is_current(at, tenant_id):
+                del self._due[tenant_id]
+                due.append((tenant_id, at))
+            self._drop_stale()
+        return due
+
+    def next_due(self):
+        """Ближайший срок опроса или None, если расписание пусто."""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        return len(self._due)
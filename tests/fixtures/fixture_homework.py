@@ -0,0 +1,40 @@
+import pytest
+
+from breaker import CircuitBreaker, ErrorNotifier
+from snapshots import SnapshotCache
+from state import StateStore
+
+# reload_config меняет эти настройки модуля — их нужно вернуть после теста.
+RELOADABLE = ('TENANTS_FILE', 'POLL_INTERVALS', 'POLLING_POLICY',
+              'TEMPLATES', 'DIGEST_CHATS')
+
+
+@pytest.fixture
+def homework_settings():
+    """Глобальные переменные homework, которые тест задаёт сам.
+
+    Переопределяется в классе или модуле тестов и возвращает словарь
+    {имя: значение}; значения создаются заново для каждого теста.
+    """
+    return {}
+
+
+@pytest.fixture
+def homework(monkeypatch, homework_settings):
+    import homework
+
+    monkeypatch.setattr(homework, 'STATE_STORE', StateStore())
+    monkeypatch.setattr(homework, 'SNAPSHOTS', SnapshotCache())
+    monkeypatch.setattr(homework, 'API_BREAKER', CircuitBreaker())
+    monkeypatch.setattr(homework, 'ERROR_NOTIFIER', ErrorNotifier())
+    monkeypatch.setattr(homework, 'OUTBOX', None)
+    monkeypatch.setattr(homework, 'DIGEST', None)
+    monkeypatch.setattr(homework, 'STREAM_BACKFILL_AGE', float('inf'))
+    monkeypatch.setattr(homework, 'SHUTDOWN_DEADLINE', None)
+    for name in RELOADABLE:
+        monkeypatch.setattr(homework, name, getattr(homework, name))
+    for name, value in homework_settings.items():
+        monkeypatch.setattr(homework, name, value)
+    yield homework
+    for event in (homework.STOPPING, homework.RELOADING, homework.WAKEUP):
+        event.clear()
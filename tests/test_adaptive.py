@@ -0,0 +1,66 @@
+from adaptive import AdaptivePolicy, parse_retry_after
+from exceptions import TooManyRequestsError
+from tenants import Tenant
+
+BOUNDS = {'reviewing': (60, 300), 'idle': (600, 3600)}
+
+
+class TestAdaptivePolicy:
+
+    def test_backoff_while_unchanged(self):
+        policy = AdaptivePolicy(BOUNDS, factor=2, jitter=0)
+        delays = [policy.next_interval('a', 'idle', False) for _ in range(5)]
+        assert delays == [600, 1200, 2400, 3600, 3600], (
+            'Без изменений интервал должен расти до верхней границы'
+        )
+
+    def test_change_resets_to_state_minimum(self):
+        policy = AdaptivePolicy(BOUNDS, factor=2, jitter=0)
+        for _ in range(3):
+            policy.next_interval('a', 'idle', False)
+        assert policy.next_interval('a', 'reviewing', True) == 60
+        assert policy.next_interval('a', 'reviewing', False) == 120
+
+    def test_reviewing_capped_lower(self):
+        policy = AdaptivePolicy(BOUNDS, factor=10, jitter=0)
+        policy.next_interval('a', 'reviewing', True)
+        assert policy.next_interval('a', 'reviewing', False) == 300
+
+    def test_jitter_bounds(self):
+        low = AdaptivePolicy(BOUNDS, jitter=0.1, rand=lambda: 0.0)
+        high = AdaptivePolicy(BOUNDS, jitter=0.1, rand=lambda: 1.0)
+        assert low.next_interval('a', 'idle', True) == 540
+        assert high.next_interval('a', 'idle', True) == 660
+
+    def test_retry_after_is_honored(self):
+        policy = AdaptivePolicy(BOUNDS, jitter=0)
+        assert policy.next_interval('a', 'reviewing', True, 900) == 900
+
+    def test_parse_retry_after(self):
+        assert parse_retry_after('120') == 120
+        assert parse_retry_after(None) is None
+        assert parse_retry_after('garbage') is None
+        moment = 'Wed, 21 Oct 2015 07:28:00 GMT'
+        assert parse_retry_after(moment, now=1445412480 - 30) == 30
+
+    def test_429_raises_with_retry_after(self, homework, monkeypatch):
+        class TooMany:
+            status_code = 429
+            headers = {'Retry-After': '42'}
+
+        monkeypatch.setattr(homework, 'HTTP_SESSION', None)
+        monkeypatch.setattr(homework.requests, 'get',
+                            lambda *args, **kwargs: TooMany())
+        try:
+            homework.request_statuses('tok', 0)
+        except TooManyRequestsError as error:
+            assert error.retry_after == 42
+        else:
+            assert False, 'Ответ 429 должен приводить к TooManyRequestsError'
+
+    def test_reviewing_tenant_polled_more_often(self, homework, monkeypatch):
+        monkeypatch.setattr(homework, 'POLLING_POLICY',
+                            AdaptivePolicy(BOUNDS, jitter=0))
+        homework.STATE_STORE.save_status('a', 1, 'reviewing')
+        assert homework.next_poll_delay(Tenant('a', 't', 1), True) == 60
+        assert homework.next_poll_delay(Tenant('b', 't', 2), True) == 600
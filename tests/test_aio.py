@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from aio import BoundedRunner
+from tenants import PollScheduler, Tenant, TenantRegistry
+from utils import RecordingBot
+
+
+class TestBoundedRunner:
+
+    def test_concurrency_is_capped(self):
+        runner = BoundedRunner(concurrency=3)
+
+        async def scenario():
+            await asyncio.gather(
+                *(runner.call(time.sleep, 0.02) for _ in range(12))
+            )
+
+        asyncio.run(scenario())
+        runner.close()
+        assert runner.peak == 3, (
+            'Одновременно должно выполняться не больше concurrency вызовов'
+        )
+        assert runner.in_flight == 0
+
+    def test_coroutine_functions_are_awaited(self):
+        runner = BoundedRunner(concurrency=1)
+
+        async def double(value):
+            return value * 2
+
+        assert asyncio.run(runner.call(double, 21)) == 42
+        runner.close()
+
+    def test_async_poll_sends_and_moves_cursor(self, homework, monkeypatch):
+        monkeypatch.setattr(
+            homework, 'request_statuses',
+            lambda token, from_date: {
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': from_date + 1,
+            }
+        )
+        bot = RecordingBot()
+        registry = TenantRegistry([
+            Tenant(str(chat), f't{chat}', chat, 10) for chat in range(5)
+        ])
+        runner = BoundedRunner(concurrency=2)
+
+        async def scenario():
+            await asyncio.gather(*(
+                homework.poll_tenant_async(runner, bot, tenant)
+                for tenant in registry
+            ))
+
+        asyncio.run(scenario())
+        runner.close()
+        assert sorted(chat for chat, _ in bot.sent) == list(range(5))
+        assert all(tenant.from_date == 11 for tenant in registry)
+        assert runner.peak <= 2
+
+    def test_async_scheduler_dispatches_due(self, homework, monkeypatch):
+        polled = []
+
+        async def fake_poll(runner, bot, tenant):
+            polled.append(tenant.tenant_id)
+            return 600
+
+        monkeypatch.setattr(homework, 'poll_tenant_async', fake_poll)
+        registry = TenantRegistry([Tenant('a', 't', 1), Tenant('b', 't', 2)])
+        scheduler = PollScheduler(period=600)
+        scheduler.spread(registry.ids(), start=time.time() - 600)
+        runner = BoundedRunner(concurrency=2)
+
+        async def scenario():
+            task = asyncio.create_task(
+                homework.run_polling_async(None, registry, scheduler, runner)
+            )
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        asyncio.run(scenario())
+        runner.close()
+        assert sorted(polled) == ['a', 'b']
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from batch import BatchFetcher
+from breaker import CircuitBreaker, ErrorNotifier
+from exceptions import StatusCodeError
+from tenants import Tenant, TenantRegistry
+from timerwheel import TimerWheel
+
+
+def request(token, from_date):
+    if token == 'bad':
+        raise StatusCodeError('Ошибка ответа сервера', 401)
+    time.sleep(0.01 * (3 - from_date))
+    return {'token': token, 'from_date': from_date}
+
+
+class TestBatchFetcher:
+
+    @pytest.mark.parametrize('workers', [0, 3])
+    def test_results_in_order_with_partial_failure(self, workers):
+        fetcher = BatchFetcher(workers)
+        results = fetcher.fetch(request, [('a', 0), ('bad', 1), ('c', 2)])
+        fetcher.close()
+        assert [result.item for result in results] == [
+            ('a', 0), ('bad', 1), ('c', 2)
+        ], 'Результаты пакета должны идти в порядке запросов'
+        assert [result.ok for result in results] == [True, False, True]
+        assert results[2].get() == {'token': 'c', 'from_date': 2}
+        with pytest.raises(StatusCodeError):
+            results[1].get()
+
+    def test_requests_overlap(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def slow(token, from_date):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+        fetcher = BatchFetcher(4)
+        fetcher.fetch(slow, [(str(index), 0) for index in range(8)])
+        fetcher.close()
+        assert peak[0] == 4, 'Пакет должен занимать весь пул соединений'
+
+
+class TestPollBatch:
+
+    @pytest.fixture
+    def homework_settings(self):
+        return {'API_BREAKER': CircuitBreaker(100),
+                'ERROR_NOTIFIER': ErrorNotifier(60), 'FETCH_BATCH_SIZE': 2}
+
+    def test_failure_stays_with_its_tenant(self, homework, monkeypatch):
+        calls = []
+
+        def statuses(token, from_date):
+            calls.append(token)
+            if token == 'bad':
+                raise StatusCodeError('Ошибка ответа сервера', 401)
+            return {'homeworks': [{'id': 1, 'homework_name': token,
+                                   'status': 'approved'}],
+                    'current_date': 10}
+
+        monkeypatch.setattr(homework, 'request_statuses', statuses)
+        sent = []
+        monkeypatch.setattr(
+            homework, 'send_to_chat',
+            lambda bot, chat_id, message, *args: sent.append(chat_id)
+        )
+        registry = TenantRegistry([
+            Tenant('a', 'ok-a', 1), Tenant('b', 'bad', 2),
+            Tenant('c', 'ok-c', 3),
+        ])
+        scheduler = TimerWheel(600)
+        scheduler.spread(registry.ids(), 0)
+        homework.poll_due_tenants(None, registry, scheduler, now=600)
+        assert calls == ['ok-a', 'bad', 'ok-c']
+        assert sent == [1, 2, 3], (
+            'Ошибка одного получателя не должна мешать остальным'
+        )
+        assert registry.get('a').from_date == 10
+        assert registry.get('b').from_date == 0
+        assert len(scheduler) == 3
@@ -0,0 +1,135 @@
+import pytest
+
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ErrorNotifier
+from exceptions import CircuitOpenError, StatusCodeError
+from tenants import Tenant
+from utils import FakeClock, RecordingBot
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=3, clock=FakeClock())
+        assert not breaker.record_failure()
+        assert not breaker.record_failure()
+        assert breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+    def test_half_open_single_probe(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10,
+                                 clock=clock)
+        breaker.record_failure()
+        clock.now = 4
+        assert breaker.retry_after() == 6
+        clock.now = 10
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow(), 'В half_open допустим один пробный запрос'
+        assert breaker.record_success()
+        assert breaker.state == CLOSED
+        assert not breaker.record_success()
+
+    def test_failed_probe_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10,
+                                 clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        assert breaker.allow()
+        assert breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.retry_after() == 10
+
+
+class TestErrorNotifier:
+
+    def test_identical_errors_suppressed_in_window(self):
+        clock = FakeClock()
+        notifier = ErrorNotifier(window=60, clock=clock)
+        assert notifier.should_report('a', 'boom')
+        assert not notifier.should_report('a', 'boom')
+        assert notifier.should_report('a', 'other')
+        assert notifier.should_report('b', 'boom')
+        clock.now = 60
+        assert notifier.should_report('a', 'boom')
+
+    def test_recovery_once(self):
+        notifier = ErrorNotifier()
+        notifier.should_report('a', 'boom')
+        assert notifier.recovered('a')
+        assert not notifier.recovered('a')
+        notifier.should_report('b', 'boom')
+        assert notifier.recovered_all() == ['b']
+
+
+class TestOutageNotifications:
+
+    @pytest.fixture
+    def homework_settings(self):
+        return {'API_BREAKER': CircuitBreaker(failure_threshold=2)}
+
+    def test_outage_reported_once_and_recovery_sent(self, homework,
+                                                    monkeypatch):
+        calls = []
+
+        def failing(token, from_date):
+            calls.append(token)
+            raise StatusCodeError('код возврата 500', 500)
+
+        monkeypatch.setattr(homework, 'request_statuses', failing)
+        bot = RecordingBot()
+        tenant = Tenant('a', 't', 1)
+        for _ in range(4):
+            try:
+                homework.poll_tenant(bot, tenant)
+            except Exception as error:
+                notice = homework.error_notice(tenant, error)
+                if notice:
+                    homework.send_to_chat(bot, tenant.chat_id, notice)
+        assert len(calls) == 2, 'Разомкнутый предохранитель не пускает запросы'
+        assert len(bot.sent) == 1, 'Одинаковые ошибки не должны повторяться'
+
+        homework.API_BREAKER.record_success()
+        monkeypatch.setattr(homework, 'request_statuses',
+                            lambda token, from_date: {'homeworks': []})
+        homework.poll_tenant(bot, tenant)
+        homework.poll_tenant(bot, tenant)
+        assert bot.sent[1:] == [(1, homework.RECOVERY_MESSAGE)]
+
+    def test_client_errors_do_not_open_breaker(self, homework, monkeypatch):
+        def unauthorized(token, from_date):
+            raise StatusCodeError('код возврата 401', 401)
+
+        monkeypatch.setattr(homework, 'request_statuses', unauthorized)
+        for _ in range(5):
+            with pytest.raises(StatusCodeError):
+                homework.fetch_statuses(Tenant('a', 't', 1))
+        assert homework.API_BREAKER.state == CLOSED
+
+    def test_open_breaker_is_silent(self, homework):
+        homework.API_BREAKER.record_failure()
+        homework.API_BREAKER.record_failure()
+        with pytest.raises(CircuitOpenError) as info:
+            homework.fetch_statuses(Tenant('a', 't', 1))
+        assert info.value.retry_after > 0
+        assert homework.error_notice(Tenant('a', 't', 1), info.value) is None
+
+    def test_notice_keyed_by_kind_without_token(self, homework):
+        tenant = Tenant('a', 'secret-token', 1)
+        first = StatusCodeError(
+            "Ошибка ответа сервера, токен авторизации: "
+            "{'Authorization': 'OAuth secret-token'}, from_date 1", 500
+        )
+        notice = homework.error_notice(tenant, first)
+        assert notice and 'secret-token' not in notice, (
+            'Токен не должен уходить в чат'
+        )
+        second = StatusCodeError('Ошибка ответа сервера, from_date 2', 500)
+        assert homework.error_notice(tenant, second) is None, (
+            'Ошибки одного вида с разными параметрами не повторяются'
+        )
+        assert homework.error_notice(
+            tenant, StatusCodeError('Ошибка ответа сервера', 401)
+        )
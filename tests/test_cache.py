@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+from cache import ResponseCache, Unchanged, body_digest
+from tenants import Tenant
+
+
+def body(current_date, homeworks=()):
+    return json.dumps({'homeworks': list(homeworks),
+                       'current_date': current_date}).encode()
+
+
+class TestResponseCache:
+
+    def test_digest_ignores_current_date(self):
+        first, date = body_digest(body(1))
+        second, _ = body_digest(body(2))
+        assert first == second and date == 1
+        assert body_digest(body(1, [{'id': 1}]))[0] != first
+
+    def test_hit_only_after_confirm(self):
+        cache = ResponseCache()
+        assert cache.check('t', 0, body(1)) is None
+        assert cache.check('t', 1, body(2)) is None, (
+            'Неподтверждённый ответ не должен пропускать разбор'
+        )
+        cache.confirm('t')
+        assert cache.check('t', 2, body(3)) == Unchanged(3)
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_failed_response_not_promoted_by_hit(self):
+        cache = ResponseCache()
+        cache.check('t', 0, body(1))
+        cache.confirm('t')
+        changed = body(2, [{'id': 1}])
+        assert cache.check('t', 1, changed) is None
+        assert cache.check('t', 1, body(3)) == Unchanged(3)
+        cache.confirm('t')
+        assert cache.check('t', 3, changed) is None, (
+            'Ответ, обработка которого упала, нужно разобрать заново'
+        )
+
+    def test_conditional_headers_for_same_from_date(self):
+        cache = ResponseCache()
+        cache.check('t', 5, b'{"homeworks": []}',
+                    {'ETag': '"v1"', 'Last-Modified': 'Mon'})
+        assert cache.conditional_headers('t', 5) == {}
+        cache.confirm('t')
+        assert cache.conditional_headers('t', 5) == {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon'
+        }
+        assert cache.conditional_headers('t', 6) == {}
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class TestCachedPolling:
+
+    @pytest.fixture
+    def homework_settings(self):
+        return {'RESPONSE_CACHE': ResponseCache()}
+
+    def test_unchanged_body_skips_decode(self, homework, monkeypatch):
+        responses = []
+
+        class FakeHttp:
+            def get(self, url, headers=None, params=None):
+                return responses.pop(0)
+
+        class NoDecode(FakeResponse):
+            def json(self):
+                raise AssertionError('Неизменный ответ не должен разбираться')
+
+        monkeypatch.setattr(homework, 'HTTP_SESSION', FakeHttp())
+        tenant = Tenant('a', 't', 1, 0)
+        responses.append(FakeResponse(200, body(10), {'ETag': '"e"'}))
+        assert homework.handle_response(
+            tenant, homework.fetch_statuses(tenant)
+        ) == []
+        assert tenant.from_date == 10
+        responses.append(NoDecode(200, body(20)))
+        assert homework.handle_response(
+            tenant, homework.fetch_statuses(tenant)
+        ) == []
+        assert tenant.from_date == 20, 'Курсор сдвигается и без разбора'
+        assert homework.RESPONSE_CACHE.hits == 1
+
+    def test_not_modified(self, homework, monkeypatch):
+        seen = []
+        responses = [FakeResponse(200, b'{"homeworks": []}', {'ETag': '"e"'}),
+                     FakeResponse(304)]
+
+        class FakeHttp:
+            def get(self, url, headers=None, params=None):
+                seen.append(headers.get('If-None-Match'))
+                return responses.pop(0)
+
+        monkeypatch.setattr(homework, 'HTTP_SESSION', FakeHttp())
+        tenant = Tenant('a', 't', 1, 5)
+        for _ in range(2):
+            homework.handle_response(tenant, homework.fetch_statuses(tenant))
+        assert seen == [None, '"e"']
+        assert tenant.from_date == 5
+        assert homework.RESPONSE_CACHE.hits == 1
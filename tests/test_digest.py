@@ -0,0 +1,113 @@
+import functools
+import threading
+
+from digest import DigestBuffer
+from tenants import Tenant
+from utils import FakeClock
+
+
+class TestDigestBuffer:
+
+    def test_window_collects_messages(self):
+        clock = FakeClock()
+        flushed = []
+        digest = DigestBuffer({'-100': 60}, lambda chat, messages, *args:
+                              flushed.append((chat, messages)), clock)
+        assert not digest.add(7, 'личный чат'), (
+            'Чаты без сводки должны получать уведомления сразу'
+        )
+        assert digest.add(-100, 'первое')
+        clock.now = 30
+        assert digest.add(-100, 'второе')
+        digest.flush_due()
+        assert flushed == [] and digest.pending() == 2
+        clock.now = 60
+        digest.flush_due()
+        assert flushed == [(-100, ['первое', 'второе'])]
+        assert digest.pending() == 0
+
+    def test_stop_flushes_open_windows(self):
+        flushed = threading.Event()
+        digest = DigestBuffer({'1': 3600},
+                              lambda chat, messages, *args: flushed.set())
+        digest.start()
+        digest.add(1, 'текст')
+        digest.stop()
+        assert flushed.is_set(), 'При остановке сводка не должна теряться'
+
+    def test_thread_sends_after_window(self):
+        flushed = threading.Event()
+        digest = DigestBuffer({'1': 0.05},
+                              lambda chat, messages, *args: flushed.set())
+        digest.start()
+        digest.add(1, 'текст')
+        assert flushed.wait(2)
+        digest.stop()
+
+
+class TestDigestMode:
+
+    def test_one_summary_for_many_changes(self, homework, monkeypatch):
+        clock = FakeClock()
+        sent = []
+        monkeypatch.setattr(
+            homework, 'send_to_chat',
+            lambda bot, chat, message, *args: sent.append((chat, message))
+        )
+        digest = DigestBuffer(
+            {'-100': 600},
+            functools.partial(homework.send_digest, None),
+            clock,
+        )
+        monkeypatch.setattr(homework, 'DIGEST', digest)
+        for index in range(200):
+            tenant = Tenant(str(index), 't', -100)
+            homework.send_changes(None, tenant, homework.handle_response(
+                tenant, {'homeworks': [{
+                    'id': index, 'homework_name': f'hw{index}',
+                    'status': 'approved',
+                }]}
+            ))
+        assert sent == []
+        clock.now = 600
+        digest.flush_due()
+        assert 1 < len(sent) < 10, (
+            'Уведомления чата должны уходить сводкой, разбитой по лимиту'
+        )
+        assert all(len(text) <= homework.TELEGRAM_MESSAGE_LIMIT
+                   for _, text in sent)
+        assert sent[0][1].startswith(
+            homework.DIGEST_HEADER.format(minutes=10)
+        )
+        assert sum(text.count('"hw') for _, text in sent) == 200
+
+    def test_undelivered_summary_rolls_back(self, homework, monkeypatch):
+        clock = FakeClock()
+        attempts = []
+
+        def send_to_chat(bot, chat_id, message, on_failed=None):
+            attempts.append(message)
+            on_failed()
+
+        monkeypatch.setattr(homework, 'send_to_chat', send_to_chat)
+        digest = DigestBuffer(
+            {'-100': 600}, functools.partial(homework.send_digest, None),
+            clock,
+        )
+        monkeypatch.setattr(homework, 'DIGEST', digest)
+        tenant = Tenant('a', 't', -100)
+        checkpoint = homework.delivery_checkpoint(tenant)
+        homework.send_changes(None, tenant, homework.handle_response(
+            tenant, {'homeworks': [{
+                'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+            }], 'current_date': 100}
+        ), checkpoint)
+        assert homework.STATE_STORE.last_status('a', 1) == 'approved'
+        clock.now = 600
+        digest.flush_due()
+        assert attempts, 'Сводка должна была уйти в чат'
+        assert homework.STATE_STORE.tenant_statuses('a') == {}, (
+            'Недоставленная сводка должна вернуть статусы, '
+            'чтобы следующий опрос их повторил'
+        )
+        assert tenant.from_date == 0
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+import time
+
+from tenants import PollScheduler, Tenant, TenantRegistry
+
+
+class TestShutdown:
+
+    def test_sigterm_interrupts_sleep(self, homework):
+        registry = TenantRegistry([Tenant('a', 't', 1)])
+        scheduler = PollScheduler(600)
+        scheduler.schedule('a', time.time() + 600)
+        thread = threading.Thread(target=homework.run_polling,
+                                  args=(None, registry, scheduler))
+        thread.start()
+        time.sleep(0.05)
+        homework.request_shutdown()
+        thread.join(timeout=2)
+        assert not thread.is_alive(), (
+            'После SIGTERM опрос должен завершиться, не дожидаясь срока'
+        )
+        assert 0 < homework.shutdown_time_left(0) <= (
+            homework.SHUTDOWN_TIMEOUT
+        )
+
+    def test_async_waits_for_in_flight_polls(self, homework, monkeypatch):
+        finished = []
+
+        async def slow_poll(runner, bot, tenant, scheduler):
+            homework.request_shutdown()
+            await asyncio.sleep(0.05)
+            finished.append(tenant.tenant_id)
+
+        monkeypatch.setattr(homework, 'poll_and_reschedule', slow_poll)
+        registry = TenantRegistry([Tenant('a', 't', 1)])
+        scheduler = PollScheduler(600)
+        scheduler.schedule('a', 0)
+        runner = homework.BoundedRunner(2)
+        asyncio.run(homework.run_polling_async(None, registry, scheduler,
+                                               runner, tick=0.01))
+        runner.close()
+        assert finished == ['a'], 'Начатый опрос доводится до конца'
+
+    def test_empty_schedule_waits_for_sigterm(self, homework):
+        thread = threading.Thread(
+            target=homework.run_polling,
+            args=(None, TenantRegistry([]), PollScheduler(600))
+        )
+        thread.start()
+        time.sleep(0.05)
+        assert thread.is_alive(), (
+            'Без получателей опрос ждёт SIGHUP, а не завершается'
+        )
+        homework.request_shutdown()
+        thread.join(timeout=2)
+        assert not thread.is_alive()
+
+    def test_async_empty_schedule_waits_for_sigterm(self, homework):
+        async def scenario():
+            task = asyncio.create_task(homework.run_polling_async(
+                None, TenantRegistry([]), PollScheduler(600), runner,
+                tick=0.01
+            ))
+            await asyncio.sleep(0.05)
+            assert not task.done(), (
+                'Без получателей опрос ждёт SIGHUP, а не завершается'
+            )
+            homework.request_shutdown()
+            await asyncio.wait_for(task, timeout=2)
+
+        runner = homework.BoundedRunner(2)
+        asyncio.run(scenario())
+        runner.close()
+
+
+class TestReload:
+
+    def test_sighup_reloads_tenants(self, homework, monkeypatch, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'id': 'a', 'token': 't1', 'chat_id': 1},
+            {'id': 'c', 'token': 't3', 'chat_id': 3},
+        ]), encoding='utf-8')
+        monkeypatch.setenv('TENANTS_FILE', str(path))
+        registry = TenantRegistry([Tenant('a', 'old', 1, 50),
+                                   Tenant('b', 't2', 2, 50)])
+        homework.STATE_STORE.save_cursor('a', 50)
+        scheduler = PollScheduler(600)
+        scheduler.spread(registry.ids(), 0)
+        homework.request_reload()
+        assert homework.RELOADING.is_set()
+        homework.reload_tenants(registry, scheduler)
+        assert not homework.RELOADING.is_set()
+        assert sorted(registry.ids()) == ['a', 'c']
+        assert registry.get('a').token == 't1'
+        assert registry.get('a').from_date == 50, 'Курсор не откатывается'
+        assert registry.for_chat(2) == [] and registry.for_chat(3) == ['c']
+        assert len(scheduler) == 2
+        due = dict(scheduler.pop_due(float('inf')))
+        assert set(due) == {'a', 'c'}
+
+    def test_broken_file_keeps_tenants(self, homework, monkeypatch,
+                                       tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text('[{', encoding='utf-8')
+        monkeypatch.setenv('TENANTS_FILE', str(path))
+        registry = TenantRegistry([Tenant('a', 't', 1)])
+        homework.reload_tenants(registry, PollScheduler(600))
+        assert registry.ids() == ['a']
+
+    def test_reload_keeps_intervals(self, homework, monkeypatch, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([{'id': 'a', 'token': 't', 'chat_id': 1}]),
+                        encoding='utf-8')
+        monkeypatch.setenv('TENANTS_FILE', str(path))
+        monkeypatch.setattr(homework, 'POLL_INTERVALS', {'idle': (10, 80)})
+        monkeypatch.setattr(homework, 'POLL_JITTER', 0)
+        monkeypatch.setattr(homework, 'POLL_BACKOFF', 2)
+        policy = homework.AdaptivePolicy({'idle': (10, 80)}, 2, 0)
+        monkeypatch.setattr(homework, 'POLLING_POLICY', policy)
+        for tenant_id in ('a', 'a', 'b', 'b'):
+            policy.next_interval(tenant_id, 'idle', False)
+        registry = TenantRegistry([Tenant('a', 't', 1), Tenant('b', 't', 2)])
+        homework.reload_tenants(registry, PollScheduler(600))
+        assert homework.POLLING_POLICY is not policy
+        assert homework.POLLING_POLICY.next_interval(
+            'a', 'idle', False
+        ) == 40, 'Интервал получателя не должен сбрасываться по SIGHUP'
+        assert homework.POLLING_POLICY.next_interval(
+            'b', 'idle', False
+        ) == 10, (
+            'Интервал удалённого получателя должен забываться'
+        )
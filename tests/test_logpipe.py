@@ -0,0 +1,121 @@
+import asyncio
+import json
+import logging
+import re
+
+import pytest
+
+from aio import BoundedRunner
+from logpipe import LogPipeline, RedactingFilter, log_context
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    created = []
+
+    def make(**kwargs):
+        pipe = LogPipeline(tmp_path / 'bot.log', **kwargs)
+        created.append(pipe)
+        return pipe
+
+    yield make
+    for pipe in created:
+        pipe.stop()
+
+
+def read_lines(path):
+    return [json.loads(line)
+            for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+class TestLogPipeline:
+
+    def test_json_lines_with_context(self, pipeline, tmp_path):
+        pipe = pipeline()
+        with log_context(tenant='a', cycle=3):
+            logging.info('Опрос %s', 'готов')
+        logging.warning('Без контекста')
+        pipe.stop()
+        first, second = read_lines(tmp_path / 'bot.log')
+        assert first['message'] == 'Опрос готов'
+        assert (first['tenant'], first['cycle']) == ('a', 3)
+        assert first['level'] == 'INFO'
+        assert 'tenant' not in second
+
+    def test_secrets_redacted(self, pipeline, tmp_path):
+        pipe = pipeline(secrets=('s3cret',))
+        pipe.add_secret('tenant-token')
+        logging.error("токен: {'Authorization': 'OAuth abc123'}")
+        logging.error('s3cret и tenant-token')
+        pipe.stop()
+        text = (tmp_path / 'bot.log').read_text(encoding='utf-8')
+        for secret in ('abc123', 's3cret', 'tenant-token'):
+            assert secret not in text, 'Секреты не должны попадать в лог'
+        assert 'OAuth ***' in text
+
+    def test_traceback_in_own_field(self, pipeline, tmp_path):
+        pipe = pipeline(secrets=('s3cret',))
+        try:
+            raise ValueError('ответ с s3cret')
+        except ValueError:
+            logging.exception('Сбой опроса')
+        pipe.stop()
+        (entry,) = read_lines(tmp_path / 'bot.log')
+        assert entry['message'] == 'Сбой опроса', (
+            'Трейсбек не должен попадать в текст сообщения'
+        )
+        assert entry['exc'].startswith('Traceback')
+        assert 'ValueError: ответ с ***' in entry['exc'], (
+            'Секреты в трейсбеке тоже маскируются'
+        )
+
+    def test_bot_token_redacted(self):
+        redactor = RedactingFilter()
+        token = '123456789:' + 'A' * 35
+        assert redactor.redact(f'url /bot{token}/send') == 'url /bot***/send'
+
+    def test_secrets_added_in_one_batch(self, monkeypatch):
+        redactor = RedactingFilter()
+        compiled = []
+        compile_pattern = re.compile
+        monkeypatch.setattr(re, 'compile', lambda *args: compiled.append(
+            args) or compile_pattern(*args))
+        redactor.add_secrets(f'token-{index}' for index in range(2000))
+        redactor.add_secrets(['token-1', ''])
+        assert len(compiled) == 1, (
+            'Пачка секретов должна собираться в одно выражение'
+        )
+        assert redactor.redact('token-1999 и token-7') == '*** и ***'
+
+    def test_sampling(self, pipeline, tmp_path):
+        pipe = pipeline(sample={'Новые статусы отсутствуют.': 10})
+        for _ in range(25):
+            logging.info('Новые статусы отсутствуют.')
+        logging.info('Другое')
+        pipe.stop()
+        lines = read_lines(tmp_path / 'bot.log')
+        assert len(lines) == 4, 'Из 25 повторов остаются 1-й, 11-й и 21-й'
+        assert lines[0]['sampled'] == 10
+
+    def test_rotation_appends(self, pipeline, tmp_path):
+        path = tmp_path / 'bot.log'
+        path.write_text('{"message": "старый запуск"}\n', encoding='utf-8')
+        pipe = pipeline(max_bytes=300, backup_count=2)
+        for index in range(20):
+            logging.info('запись %d', index)
+        pipe.stop()
+        assert (tmp_path / 'bot.log.1').exists()
+        assert not (tmp_path / 'bot.log.3').exists()
+
+    def test_context_reaches_runner_threads(self, pipeline, tmp_path):
+        pipe = pipeline()
+        runner = BoundedRunner(2)
+
+        async def scenario():
+            with log_context(tenant='b'):
+                await runner.call(logging.info, 'из потока')
+
+        asyncio.run(scenario())
+        runner.close()
+        pipe.stop()
+        assert read_lines(tmp_path / 'bot.log')[0]['tenant'] == 'b'
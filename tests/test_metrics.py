@@ -0,0 +1,58 @@
+import urllib.request
+
+import pytest
+
+from metrics import Registry, start_http_server
+
+
+class TestMetrics:
+
+    def test_counter_with_labels(self):
+        registry = Registry()
+        counter = registry.counter('api_total', 'Ответы')
+        counter.inc(code=200)
+        counter.inc(code=200)
+        counter.inc(code=500)
+        assert counter.value(code=200) == 2
+        text = registry.render()
+        assert '# TYPE api_total counter' in text
+        assert 'api_total{code="200"} 2' in text
+        assert 'api_total{code="500"} 1' in text
+
+    def test_histogram_is_cumulative(self):
+        registry = Registry()
+        histogram = registry.histogram('latency', 'Время', buckets=(1, 5))
+        for value in (0.5, 2, 3, 10):
+            histogram.observe(value)
+        lines = histogram.samples()
+        assert lines == [
+            'latency_bucket{le="1"} 1',
+            'latency_bucket{le="5"} 3',
+            'latency_bucket{le="+Inf"} 4',
+            'latency_sum 15.5',
+            'latency_count 4',
+        ]
+
+    def test_http_endpoint(self):
+        registry = Registry()
+        registry.gauge('pending', 'Очередь', lambda: 7)
+        server = start_http_server(registry, 0, host='127.0.0.1')
+        try:
+            url = f'http://127.0.0.1:{server.server_port}/metrics'
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'pending 7' in body
+
+    def test_bot_is_instrumented(self, homework):
+        unknown = homework.UNKNOWN_STATUSES.value()
+        failures = homework.CHECK_FAILURES.value()
+        with pytest.raises(ValueError):
+            homework.parse_status({'homework_name': 'hw', 'status': 'x'})
+        with pytest.raises(KeyError):
+            homework.handle_response(None, {})
+        assert homework.UNKNOWN_STATUSES.value() == unknown + 1
+        assert homework.CHECK_FAILURES.value() == failures + 1
+        assert 'homework_api_request_seconds_count' in homework.METRICS.render()
@@ -0,0 +1,142 @@
+import threading
+
+from breaker import CircuitBreaker
+from outbox import Outbox, TokenBucket
+from tenants import Tenant
+from utils import FakeClock
+
+
+class FloodError(Exception):
+
+    def __init__(self, retry_after):
+        super().__init__('Flood control exceeded')
+        self.retry_after = retry_after
+
+
+class TestTokenBucket:
+
+    def test_rate_limit(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+        bucket.take()
+        bucket.take()
+        assert bucket.wait_time() == 0.5
+        clock.now = 0.5
+        assert bucket.wait_time() == 0
+        assert not bucket.is_full()
+        clock.now = 10
+        assert bucket.is_full()
+
+
+class TestOutbox:
+
+    def test_queued_messages_for_chat_are_coalesced(self):
+        sent = []
+        outbox = Outbox(lambda chat, text: sent.append((chat, text)))
+        outbox.put(1, 'first')
+        outbox.put(1, 'second')
+        outbox.put(2, 'other')
+        assert outbox.pending() == 2
+        while outbox.pending():
+            outbox.process_one()
+        assert sent == [(1, 'first\n\nsecond'), (2, 'other')], (
+            'Сообщения одному чату должны склеиваться в одно'
+        )
+        assert outbox.stats['coalesced'] == 1
+
+    def test_coalescing_respects_limit(self):
+        outbox = Outbox(lambda chat, text: None, limit=10)
+        outbox.put(1, 'a' * 6)
+        outbox.put(1, 'b' * 6)
+        assert outbox.pending() == 2
+
+    def test_flood_wait_blocks_only_that_chat(self):
+        clock = FakeClock()
+        sent = []
+        errors = [FloodError(5)]
+
+        def send(chat, text):
+            if chat == 1 and errors:
+                raise errors.pop()
+            sent.append(chat)
+
+        outbox = Outbox(send, chat_rate=100, global_rate=100, clock=clock)
+        outbox.put(1, 'a')
+        outbox.put(2, 'b')
+        outbox.process_one()
+        outbox.process_one()
+        assert sent == [2], 'Пауза флуд-контроля не должна задерживать другие чаты'
+        assert outbox.stats['retried'] == 1
+        clock.now = 5
+        outbox.process_one()
+        assert sent == [2, 1]
+
+    def test_other_errors_dropped_after_retries(self):
+        clock = FakeClock()
+
+        def send(chat, text):
+            raise RuntimeError('boom')
+
+        outbox = Outbox(send, max_retries=2, clock=clock)
+        outbox.put(1, 'a')
+        for _ in range(3):
+            outbox.process_one()
+            clock.now += 100
+        assert outbox.pending() == 0
+        assert outbox.stats == {'sent': 0, 'coalesced': 0,
+                                'retried': 2, 'dropped': 1}
+
+    def test_stop_reports_undelivered(self):
+        failed = []
+        outbox = Outbox(lambda chat, text: None)
+        outbox.put(1, 'a', on_failed=lambda: failed.append('a'))
+        outbox.put(1, 'b', on_failed=lambda: failed.append('b'))
+        outbox.put(2, 'c')
+        assert not outbox.stop(timeout=0)
+        assert outbox.stats['dropped'] == 2
+        assert sorted(outbox.undelivered) == [(1, 'a\n\nb'), (2, 'c')], (
+            'Недоставленные сообщения не должны пропадать бесследно'
+        )
+        assert failed == ['a', 'b']
+
+    def test_worker_drains_in_background(self):
+        sent = []
+        release = threading.Event()
+
+        def send(chat, text):
+            release.wait(1)
+            sent.append(text)
+
+        outbox = Outbox(send, chat_rate=1000, global_rate=1000)
+        outbox.start()
+        outbox.put(1, 'a')
+        outbox.put(2, 'b')
+        assert len(sent) < 2, 'Отправка не должна блокировать put()'
+        release.set()
+        assert outbox.stop(timeout=2)
+        assert sorted(sent) == ['a', 'b']
+
+    def test_send_to_chat_uses_outbox(self, homework, monkeypatch):
+        outbox = Outbox(lambda chat, text: None)
+        monkeypatch.setattr(homework, 'OUTBOX', outbox)
+        homework.send_to_chat(None, 5, 'hello')
+        assert outbox.pending() == 1
+
+    def test_undelivered_statuses_are_resent(self, homework, monkeypatch):
+        outbox = Outbox(lambda chat, text: None)
+        monkeypatch.setattr(homework, 'OUTBOX', outbox)
+        monkeypatch.setattr(homework, 'API_BREAKER', CircuitBreaker(100))
+        monkeypatch.setattr(homework, 'request_statuses', lambda token, ts: {
+            'homeworks': [{'id': 1, 'homework_name': 'hw',
+                           'status': 'approved'}],
+            'current_date': 50,
+        })
+        tenant = Tenant('a', 't', 1, 10)
+        assert homework.poll_tenant(None, tenant)
+        assert tenant.from_date == 50
+        outbox.stop(timeout=0)
+        assert tenant.from_date == 10
+        assert homework.STATE_STORE.last_status('a', 1) is None, (
+            'Статус отмечается отправленным только после доставки'
+        )
+        assert homework.poll_tenant(None, tenant)
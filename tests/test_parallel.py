@@ -0,0 +1,145 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from parallel import ParsePool, run_batch
+from tenants import Tenant
+
+
+def square(value):
+    if value < 0:
+        raise ValueError('negative')
+    return value * value
+
+
+class TestParsePool:
+
+    def test_run_batch_isolates_errors(self):
+        results = run_batch(square, [2, -1, 3])
+        assert results[0] == (True, 4)
+        assert results[1][0] is False
+        assert results[2] == (True, 9)
+
+    def test_items_are_batched(self):
+        pool = ParsePool(square, batch_size=4, max_delay=0.01,
+                         executor=ThreadPoolExecutor(2))
+
+        async def scenario():
+            return await asyncio.gather(
+                *(pool.submit(value) for value in range(10)),
+                return_exceptions=True
+            )
+
+        assert asyncio.run(scenario()) == [value * value
+                                           for value in range(10)]
+        assert pool.batches == 3, (
+            'Элементы должны уходить в пул пачками по batch_size'
+        )
+        pool.close()
+
+    def test_process_pool_decodes_responses(self, homework):
+        pool = ParsePool(homework.decode_response, workers=2, batch_size=2)
+        good = json.dumps({
+            'homeworks': [{'id': 1, 'homework_name': 'hw',
+                           'status': 'approved'}],
+            'current_date': 5,
+        }).encode()
+        bad = json.dumps({'homeworks': [{'homework_name': 'hw',
+                                         'status': 'unknown'}]}).encode()
+
+        async def scenario():
+            return await asyncio.gather(pool.submit(good), pool.submit(bad),
+                                        return_exceptions=True)
+
+        decoded, skipped = asyncio.run(scenario())
+        pool.close()
+        current_date, rendered, _ = decoded
+        assert current_date == 5
+        assert rendered[0][:2] == (1, 'approved')
+        assert rendered[0][2].startswith('Изменился статус проверки работы')
+        assert skipped == (None, [], [[], ['[0] unknown']]), (
+            'Работа с неизвестным статусом пропускается, а не роняет ответ'
+        )
+
+    def test_pool_path_in_async_poll(self, homework, monkeypatch):
+        raw = json.dumps({
+            'homeworks': [{'id': 1, 'homework_name': 'hw',
+                           'status': 'rejected'}],
+            'current_date': 9,
+        }).encode()
+        monkeypatch.setattr(homework, 'request_raw_statuses',
+                            lambda token, from_date: raw)
+        monkeypatch.setattr(homework, 'PARSE_POOL', ParsePool(
+            homework.decode_job, executor=ThreadPoolExecutor(1)
+        ))
+        runner = homework.BoundedRunner(2)
+        tenant = Tenant('a', 't', 1, 0)
+        messages = asyncio.run(homework.fetch_in_pool(runner, tenant))
+        runner.close()
+        homework.PARSE_POOL.close()
+        assert len(messages) == 1 and '"hw"' in messages[0]
+        assert tenant.from_date == 9
+
+    def test_pool_skips_counted_in_parent(self, homework, monkeypatch):
+        raw = json.dumps({'homeworks': [
+            {'id': 1, 'homework_name': 'hw', 'status': 'unknown'},
+            {'id': 2, 'status': 'approved'},
+        ]}).encode()
+        monkeypatch.setattr(homework, 'request_raw_statuses',
+                            lambda token, from_date: raw)
+        monkeypatch.setattr(homework, 'PARSE_POOL', ParsePool(
+            homework.decode_job, workers=1
+        ))
+        unknown = homework.UNKNOWN_STATUSES.value()
+        invalid = homework.INVALID_HOMEWORKS.value()
+        runner = homework.BoundedRunner(2)
+        messages = asyncio.run(
+            homework.fetch_in_pool(runner, Tenant('a', 't', 1, 0))
+        )
+        runner.close()
+        homework.PARSE_POOL.close()
+        assert messages == []
+        assert homework.UNKNOWN_STATUSES.value() == unknown + 1, (
+            'Пропуски из процессов пула должны учитываться в основном'
+        )
+        assert homework.INVALID_HOMEWORKS.value() == invalid + 1
+
+    def test_pool_restarted_on_template_reload(self, homework, monkeypatch,
+                                               tmp_path):
+        templates = tmp_path / 'templates.json'
+        templates.write_text(json.dumps(
+            {'ru': {'verdicts': {'approved': 'Новый вердикт'}}}
+        ), encoding='utf-8')
+        monkeypatch.setenv('TEMPLATES_FILE', str(templates))
+        monkeypatch.setattr(homework, 'load_env', lambda **kwargs: None)
+        monkeypatch.setattr(homework, 'PARSE_WORKERS', 1)
+        for name in ('TEMPLATES', 'TENANTS_FILE', 'POLL_INTERVALS',
+                     'POLLING_POLICY', 'DIGEST_CHATS'):
+            monkeypatch.setattr(homework, name, getattr(homework, name))
+        raw = json.dumps({'homeworks': [
+            {'id': 1, 'homework_name': 'hw', 'status': 'approved'},
+        ]}).encode()
+
+        async def decode():
+            return await homework.PARSE_POOL.submit((raw, None))
+
+        async def scenario():
+            before = await decode()
+            homework.reload_config()
+            return before, await decode()
+
+        monkeypatch.setattr(homework, 'PARSE_POOL', ParsePool(
+            homework.decode_job, workers=1
+        ))
+        before, after = asyncio.run(scenario())
+        homework.PARSE_POOL.close()
+        assert 'Новый вердикт' not in before[1][0][2]
+        assert 'Новый вердикт' in after[1][0][2], (
+            'После SIGHUP процессы пула должны разбирать новыми шаблонами'
+        )
+
+    def test_unknown_status_is_value_error(self, homework):
+        with pytest.raises(ValueError):
+            homework.parse_status({'homework_name': 'hw', 'status': '?'})
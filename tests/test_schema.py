@@ -0,0 +1,59 @@
+from schema import Field, Schema, describe
+from tenants import Tenant
+
+SCHEMA = Schema({
+    'homework_name': Field(str),
+    'status': Field(str),
+    'id': Field(int, required=False),
+})
+
+
+class TestSchema:
+
+    def test_valid_item(self):
+        assert SCHEMA({'homework_name': 'hw', 'status': 'approved'}) == []
+        assert SCHEMA({'homework_name': 'hw', 'status': 'approved',
+                       'id': 1}) == []
+
+    def test_all_violations_reported(self):
+        violations = SCHEMA({'homework_name': 5, 'id': 'x'})
+        assert len(violations) == 3, (
+            'Проверка должна сообщать все нарушения элемента сразу'
+        )
+        assert 'нет поля status' in violations
+
+    def test_not_a_dict(self):
+        assert SCHEMA(['hw']) == ['ожидался объект, получен list']
+
+    def test_split(self):
+        items = [{'homework_name': 'a', 'status': 'approved'},
+                 {'homework_name': 'b'},
+                 'garbage']
+        valid, invalid = SCHEMA.split(items)
+        assert valid == items[:1]
+        assert [index for index, _ in invalid] == [1, 2]
+        assert describe(invalid).startswith('[1] нет поля status')
+
+
+class TestMalformedHomeworks:
+
+    def test_malformed_item_skipped(self, homework, caplog):
+        response = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                {'id': 2, 'status': 'approved'},
+                {'id': 3, 'homework_name': 'hw3', 'status': None},
+            ],
+            'current_date': 5,
+        }
+        tenant = Tenant('a', 't', 1, 0)
+        before = homework.INVALID_HOMEWORKS.value()
+        messages = homework.handle_response(tenant, response)
+        assert len(messages) == 1 and '"hw1"' in messages[0], (
+            'Корректные работы обрабатываются, несмотря на битые соседние'
+        )
+        assert homework.INVALID_HOMEWORKS.value() == before + 2
+        assert tenant.from_date == 5
+        warnings = [record for record in caplog.records
+                    if 'Пропущены некорректные работы' in record.message]
+        assert len(warnings) == 1, 'Нарушения ответа логируются одной записью'
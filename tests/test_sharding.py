@@ -0,0 +1,154 @@
+import pytest
+
+from sharding import Coordinator, HashRing, ShardManager, SQLiteCoordinator
+from tenants import Tenant, TenantRegistry
+from timerwheel import TimerWheel
+from utils import FakeClock
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(1000.0)
+
+
+@pytest.fixture
+def coordinator(tmp_path, clock):
+    coordinator = SQLiteCoordinator(str(tmp_path / 'shard.db'), ttl=30,
+                                    clock=clock)
+    yield coordinator
+    coordinator.close()
+
+
+TENANTS = [str(index) for index in range(200)]
+
+
+class TestHashRing:
+
+    def test_adding_node_moves_small_share(self):
+        before = HashRing(['a', 'b', 'c'])
+        after = HashRing(['a', 'b', 'c', 'd'])
+        moved = [key for key in TENANTS
+                 if before.node_for(key) != after.node_for(key)]
+        assert all(after.node_for(key) == 'd' for key in moved), (
+            'Ключи должны переезжать только на новый узел'
+        )
+        assert len(moved) < len(TENANTS) / 2
+
+    def test_empty_ring(self):
+        assert HashRing().node_for('x') is None
+
+
+class TestCoordinator:
+
+    def test_lease_is_exclusive_until_expiry(self, coordinator, clock):
+        assert coordinator.claim('t', 'a')
+        assert not coordinator.claim('t', 'b')
+        assert coordinator.claim('t', 'a'), 'Владелец может продлить аренду'
+        clock.now += 31
+        assert coordinator.claim('t', 'b'), 'Просроченную аренду можно взять'
+
+    def test_release(self, coordinator):
+        coordinator.claim('t', 'a')
+        coordinator.release('t', 'b')
+        assert not coordinator.claim('t', 'b')
+        coordinator.release('t', 'a')
+        assert coordinator.claim('t', 'b')
+
+    def test_members_expire(self, coordinator, clock):
+        coordinator.heartbeat('a')
+        clock.now += 20
+        coordinator.heartbeat('b')
+        assert coordinator.members() == ['a', 'b']
+        clock.now += 15
+        assert coordinator.members() == ['b']
+
+    def test_interface_is_abstract(self):
+        with pytest.raises(TypeError):
+            Coordinator()
+
+
+class TestShardManager:
+
+    def check_partition(self, managers):
+        owned = [set(manager.owned()) for manager in managers]
+        for index, first in enumerate(owned):
+            for second in owned[index + 1:]:
+                assert not first & second, (
+                    'Получатель не должен принадлежать двум обработчикам'
+                )
+        return set().union(*owned)
+
+    def test_rebalance_on_join_and_leave(self, coordinator, clock):
+        released = []
+        first = ShardManager('a', coordinator, ttl=30, clock=clock,
+                             on_release=released.extend)
+        first.rebalance(TENANTS)
+        assert self.check_partition([first]) == set(TENANTS)
+
+        second = ShardManager('b', coordinator, ttl=30, clock=clock)
+        second.rebalance(TENANTS)
+        self.check_partition([first, second])
+        first.rebalance(TENANTS)
+        assert released, 'Старый владелец должен отдать часть получателей'
+        second.rebalance(TENANTS)
+        assert self.check_partition([first, second]) == set(TENANTS)
+        assert second.owned()
+
+        second.leave()
+        first.rebalance(TENANTS)
+        assert self.check_partition([first]) == set(TENANTS)
+
+    def test_crashed_worker_leases_expire(self, coordinator, clock):
+        crashed = ShardManager('a', coordinator, ttl=30, clock=clock)
+        crashed.rebalance(TENANTS)
+        survivor = ShardManager('b', coordinator, ttl=30, clock=clock)
+        survivor.rebalance(TENANTS)
+        assert set(survivor.owned()) != set(TENANTS)
+        clock.now += 31
+        survivor.rebalance(TENANTS)
+        assert set(survivor.owned()) == set(TENANTS)
+        assert crashed.owned() == [], (
+            'Процесс с просроченной арендой не должен опрашивать получателей'
+        )
+
+    def test_busy_tenants_kept_until_idle(self, coordinator, clock):
+        first = ShardManager('a', coordinator, ttl=30, clock=clock)
+        first.rebalance(TENANTS)
+        ShardManager('b', coordinator, ttl=30, clock=clock).rebalance(TENANTS)
+        busy = set(TENANTS)
+        added, removed = first.rebalance(TENANTS, busy=busy)
+        assert removed == [] and set(first.owned()) == busy
+        added, removed = first.rebalance(TENANTS)
+        assert removed
+
+    def test_rebalance_is_one_transaction(self, coordinator, clock):
+        statements = []
+        coordinator._connection.set_trace_callback(statements.append)
+        ShardManager('a', coordinator, ttl=30, clock=clock).rebalance(TENANTS)
+        assert statements.count('COMMIT') == 1, (
+            'Перебалансировка должна фиксироваться одной транзакцией'
+        )
+
+    def test_lease_rechecked_before_each_batch(self, homework, monkeypatch):
+        shard = ShardManager('a', None, ttl=30)
+        shard.next_rebalance = 500
+        monkeypatch.setattr(homework, 'SHARD', shard)
+        monkeypatch.setattr(homework, 'FETCH_BATCH_SIZE', 1)
+        owned = {'a', 'b'}
+        monkeypatch.setattr(homework, 'is_owned', owned.__contains__)
+        polled = []
+
+        def poll_batch(bot, batch, scheduler):
+            polled.extend(tenant.tenant_id for tenant, _ in batch)
+            owned.discard('b')
+
+        monkeypatch.setattr(homework, 'poll_batch', poll_batch)
+        registry = TenantRegistry([Tenant('a', 't', 1), Tenant('b', 't', 2)])
+        scheduler = TimerWheel(600)
+        scheduler.schedule('a', 0)
+        scheduler.schedule('b', 1)
+        homework.poll_due_tenants(None, registry, scheduler, now=10)
+        assert polled == ['a'], (
+            'Получатель с истёкшей арендой не должен опрашиваться'
+        )
+        assert scheduler.next_due() == 500
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+
+from snapshots import SnapshotCache
+from tenants import Tenant, TenantRegistry
+
+
+class TestSnapshotCache:
+
+    def test_latest_and_history(self):
+        clock = iter(range(100)).__next__
+        cache = SnapshotCache(history_limit=2, clock=clock)
+        cache.record('a', 1, 'reviewing', 'hw1 на проверке')
+        cache.record('a', 1, 'reviewing', 'hw1 на проверке')
+        cache.record('a', 2, 'approved', 'hw2 принята')
+        cache.record('a', 1, 'rejected', 'hw1 вернули')
+        assert cache.latest('a') == ['hw1 вернули', 'hw2 принята']
+        assert cache.history('a') == [(1, 'hw2 принята'), (2, 'hw1 вернули')]
+        assert cache.latest('b') == [] and cache.history('b') == []
+        cache.forget('a')
+        assert cache.latest('a') == []
+
+
+class TestCommands:
+
+    @pytest.fixture
+    def homework_settings(self):
+        def no_api(*args, **kwargs):
+            raise AssertionError('Команды не должны обращаться к API')
+
+        return {'request_api': no_api}
+
+    def run_command(self, homework, monkeypatch, registry, name, chat_id):
+        sent = []
+        monkeypatch.setattr(
+            homework, 'send_to_chat',
+            lambda bot, chat, text: sent.append((chat, text))
+        )
+        callback = homework.command_callbacks(None, registry)[name]
+        update = SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id))
+        callback(update, None)
+        return sent
+
+    def test_status_from_snapshot(self, homework, monkeypatch):
+        tenant = Tenant('a', 't', 7)
+        registry = TenantRegistry([tenant])
+        assert self.run_command(homework, monkeypatch, registry,
+                                'status', 7) == [
+            (7, homework.NO_SNAPSHOT_MESSAGE)
+        ]
+        homework.handle_response(tenant, {'homeworks': [
+            {'id': 1, 'homework_name': 'hw', 'status': 'reviewing'},
+        ]})
+        homework.handle_response(tenant, {'homeworks': [
+            {'id': 1, 'homework_name': 'hw', 'status': 'approved'},
+        ]})
+        (chat, text), = self.run_command(homework, monkeypatch, registry,
+                                         'status', 7)
+        assert chat == 7 and text == homework.parse_status(
+            {'homework_name': 'hw', 'status': 'approved'}
+        )
+        (_, text), = self.run_command(homework, monkeypatch, registry,
+                                      'history', 7)
+        assert text.count('"hw"') == 2, 'История хранит оба изменения'
+
+    def test_unknown_chat(self, homework, monkeypatch):
+        registry = TenantRegistry([Tenant('a', 't', 7)])
+        assert self.run_command(homework, monkeypatch, registry,
+                                'history', 8) == [
+            (8, homework.UNKNOWN_CHAT_MESSAGE)
+        ]
+
+    def test_seeded_from_state(self, homework, monkeypatch):
+        homework.STATE_STORE.save_status('a', 1, 'reviewing')
+        tenant = Tenant('a', 't', 7)
+        registry = TenantRegistry([tenant])
+        homework.seed_snapshots(registry)
+        (_, text), = self.run_command(homework, monkeypatch, registry,
+                                      'status', 7)
+        assert text == homework.parse_status(
+            {'homework_name': '1', 'status': 'reviewing'}
+        ), (
+            'После перезапуска /status должен отвечать из сохранённого '
+            'состояния'
+        )
+        homework.handle_response(tenant, {'homeworks': [
+            {'id': 1, 'homework_name': 'hw', 'status': 'reviewing'},
+        ]})
+        assert homework.SNAPSHOTS.latest('a') == [homework.parse_status(
+            {'homework_name': 'hw', 'status': 'reviewing'}
+        )]
+        assert homework.SNAPSHOTS.history('a') == []
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'benchmarks'))
+
+from standin import StandIn  # noqa: E402
+
+
+class TestStandIn:
+
+    def test_statuses_since_from_date(self):
+        standin = StandIn(tenants=2, homeworks=2, change_rate=1000, seed=1)
+        code, body = standin.statuses('token-0', from_date=1)
+        assert code == 200 and body['homeworks'] == []
+        standin.tick(1)
+        code, body = standin.statuses('token-0', from_date=1)
+        assert len(body['homeworks']) == 1
+        assert body['homeworks'][0]['status'] == 'rejected'
+        assert standin.statuses('unknown', 0)[0] == 401
+
+    def test_error_rate(self):
+        standin = StandIn(tenants=1, error_rate=1.0)
+        assert standin.statuses('token-0', 0)[0] == 500
+        assert standin.stats()['errors'] == 1
+
+    def test_latency_measured_on_delivery(self):
+        standin = StandIn(tenants=1, homeworks=1, change_rate=1000, seed=1)
+        standin.tick(1)
+        standin.message(1, 'Изменился статус проверки работы "hw-0-0". ...')
+        standin.message(1, 'Изменился статус проверки работы "hw-0-0". ...')
+        stats = standin.stats()
+        assert stats['sends'] == 2
+        assert len(stats['latencies']) == 1, (
+            'Задержка считается один раз на изменение статуса'
+        )
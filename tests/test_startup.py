@@ -0,0 +1,88 @@
+import subprocess
+import sys
+import threading
+import time
+
+from startup import (LazyObject, format_import_profile, lazy_import,
+                     profile_imports)
+
+
+class TestLazyImport:
+
+    def test_module_loads_on_first_access(self, tmp_path, monkeypatch):
+        marker = tmp_path / 'loaded'
+        (tmp_path / 'heavy_module.py').write_text(
+            f'open({str(marker)!r}, "w").close()\nLOADED = True\n',
+            encoding='utf-8'
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.delitem(sys.modules, 'heavy_module', raising=False)
+        module = lazy_import('heavy_module')
+        assert not marker.exists(), (
+            'Модуль не должен выполняться до первого обращения'
+        )
+        assert module.LOADED and marker.exists()
+        assert lazy_import('heavy_module') is module
+
+    def test_loaded_module_returned_as_is(self):
+        assert lazy_import('json') is sys.modules['json']
+
+
+class TestLazyObject:
+
+    def test_factory_called_once(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            time.sleep(0.01)
+            return 'bot'
+
+        lazy = LazyObject(factory)
+        assert not lazy.created
+        threads = [threading.Thread(target=lazy.resolve) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert calls == [1], 'Объект должен создаваться один раз'
+        assert lazy.created and lazy.upper() == 'BOT'
+
+
+class TestImportProfile:
+
+    def test_breakdown_of_module_subtree(self):
+        rows = [
+            (30, 30, 1, 'site_dependency'),
+            (1, 31, 0, 'site'),
+            (5, 5, 2, 'nested'),
+            (10, 15, 1, 'light'),
+            (40, 40, 1, 'heavy'),
+            (2, 57, 0, 'app'),
+        ]
+        report = format_import_profile('app', 0.2, rows)
+        lines = report.splitlines()
+        assert 'app: 0.1 мс' in lines[1]
+        assert lines[3].endswith('heavy') and lines[4].endswith('light')
+        assert 'site_dependency' not in report
+
+    def test_profile_real_import(self):
+        elapsed, rows = profile_imports('json')
+        assert elapsed > 0
+        assert any(name == 'json' for _, _, _, name in rows)
+
+
+class TestHomeworkStartup:
+
+    def test_import_defers_heavy_modules(self):
+        probe = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, homework; '
+             'print(*(name in sys.modules and not isinstance('
+             'sys.modules[name], type(homework.telegram)) '
+             'for name in ("telegram", "dotenv")))'],
+            capture_output=True, text=True, check=True,
+        )
+        assert probe.stdout.split() == ['False', 'False'], (
+            'telegram и dotenv не должны загружаться при импорте бота'
+        )
@@ -0,0 +1,293 @@
+import pytest
+
+from state import (CursorTable, FileStateStore, SQLiteStateStore, StateStore,
+                   StatusRow, StatusTable, homework_key, open_state_store)
+from tenants import Tenant
+
+
+@pytest.fixture(params=['state.log', 'state.db'])
+def store_path(request, tmp_path):
+    return str(tmp_path / request.param)
+
+
+class TestStateStore:
+
+    def test_restart_resumes_cursor_and_statuses(self, store_path):
+        store = open_state_store(store_path)
+        store.save_cursor('a', 100)
+        store.save_status('a', 1, 'reviewing')
+        store.commit()
+        store.save_cursor('a', 200)
+        store.save_status('a', 1, 'approved')
+        store.close()
+
+        store = open_state_store(store_path)
+        assert store.load_cursor('a') == 200, (
+            'После перезапуска курсор должен продолжаться с места остановки'
+        )
+        assert store.last_status('a', '1') == 'approved'
+        assert store.last_status('a', 2) is None
+        store.close()
+
+    def test_rollback_survives_restart(self, store_path):
+        store = open_state_store(store_path)
+        store.save_cursor('a', 100)
+        store.save_status('a', 1, 'reviewing')
+        store.commit()
+        checkpoint = store.checkpoint('a')
+        store.save_cursor('a', 200)
+        store.save_status('a', 1, 'approved')
+        store.save_status('a', 2, 'reviewing')
+        store.rollback('a', checkpoint, 100)
+        store.close()
+
+        store = open_state_store(store_path)
+        assert store.load_cursor('a') == 100
+        assert store.tenant_statuses('a') == {'1': 'reviewing'}, (
+            'Недоставленные статусы должны снова считаться неотправленными'
+        )
+        store.close()
+
+    def test_backend_by_extension(self, tmp_path):
+        assert type(open_state_store()) is StateStore
+        db = open_state_store(str(tmp_path / 'x.sqlite'))
+        log = open_state_store(str(tmp_path / 'x.jsonl'))
+        assert isinstance(db, SQLiteStateStore)
+        assert isinstance(log, FileStateStore)
+        db.close()
+        log.close()
+
+    def test_fsync_is_batched(self, store_path):
+        store = open_state_store(store_path, sync_every=3,
+                                 sync_interval=3600)
+        for cycle in range(7):
+            store.save_cursor('a', cycle)
+            store.commit()
+        assert store.syncs == 2, (
+            'fsync должен выполняться раз в sync_every циклов'
+        )
+        store.close()
+        assert store.syncs == 3
+
+    def test_shared_database_is_not_locked(self, tmp_path):
+        path = str(tmp_path / 'state.db')
+        first = SQLiteStateStore(path, sync_every=100, sync_interval=3600)
+        second = SQLiteStateStore(path, sync_every=100, sync_interval=3600)
+        for cycle in range(3):
+            first.save_cursor('a', cycle)
+            first.commit()
+            second.save_cursor('b', cycle)
+            second.commit()
+        first.close()
+        second.close()
+        store = SQLiteStateStore(path)
+        assert (store.load_cursor('a'), store.load_cursor('b')) == (2, 2), (
+            'Обработчики с общей базой не должны блокировать друг друга'
+        )
+        store.close()
+
+    def test_failed_write_keeps_pending(self, store_path, monkeypatch):
+        store = open_state_store(store_path)
+        write = store._write
+
+        def broken(records):
+            raise OSError('disk full')
+
+        monkeypatch.setattr(store, '_write', broken)
+        store.save_cursor('a', 100)
+        with pytest.raises(OSError):
+            store.commit()
+        monkeypatch.setattr(store, '_write', write)
+        store.commit()
+        store.close()
+        store = open_state_store(store_path)
+        assert store.load_cursor('a') == 100, (
+            'Несохранённые изменения нужно повторить в следующем commit()'
+        )
+        store.close()
+
+    def test_torn_tail_is_ignored(self, tmp_path):
+        path = str(tmp_path / 'state.log')
+        store = FileStateStore(path)
+        store.save_cursor('a', 5)
+        store.close()
+        with open(path, 'a') as file:
+            file.write('{"t": "a", "c"')
+        store = FileStateStore(path)
+        assert store.load_cursor('a') == 5
+        store.save_cursor('a', 6)
+        store.close()
+        store = FileStateStore(path)
+        assert store.load_cursor('a') == 6, (
+            'Недописанная строка должна отрезаться, а не склеиваться '
+            'с новыми записями'
+        )
+        store.close()
+
+    def test_compact_keeps_latest(self, tmp_path):
+        path = str(tmp_path / 'state.log')
+        store = FileStateStore(path)
+        for cycle in range(10):
+            store.save_cursor('a', cycle)
+            store.commit()
+        store.compact()
+        store.close()
+        with open(path) as file:
+            assert len(file.readlines()) == 1
+        assert FileStateStore(path).load_cursor('a') == 9
+
+    def test_unchanged_cursor_not_written(self, tmp_path):
+        path = str(tmp_path / 'state.log')
+        store = FileStateStore(path)
+        for _ in range(5):
+            store.save_cursor('a', 7)
+            store.commit()
+        store.close()
+        with open(path) as file:
+            assert len(file.readlines()) == 1, (
+                'Неизменившийся курсор не должен дописываться в журнал'
+            )
+
+    def test_journal_compacted_by_size(self, tmp_path):
+        path = str(tmp_path / 'state.log')
+        store = FileStateStore(path, compact_after=10)
+        for cycle in range(25):
+            store.save_cursor('a', cycle)
+            store.commit()
+        store.close()
+        with open(path) as file:
+            assert len(file.readlines()) < 10, (
+                'Журнал должен сжиматься, не дожидаясь вызова compact()'
+            )
+        assert FileStateStore(path).load_cursor('a') == 24
+
+    def test_journal_compacted_on_open(self, tmp_path):
+        path = str(tmp_path / 'state.log')
+        store = FileStateStore(path, compact_after=1000)
+        for cycle in range(20):
+            store.save_cursor('a', cycle)
+            store.commit()
+        store.close()
+        store = FileStateStore(path, compact_after=10)
+        store.close()
+        with open(path) as file:
+            assert len(file.readlines()) == 1
+        assert FileStateStore(path).load_cursor('a') == 19
+
+    def test_already_sent_status_is_not_replayed(self, homework):
+        tenant = Tenant('a', 't', 1, 0)
+        response = {
+            'homeworks': [{'id': 7, 'homework_name': 'hw',
+                           'status': 'approved'}],
+            'current_date': 50,
+        }
+        assert len(homework.handle_response(tenant, response)) == 1
+        assert homework.handle_response(tenant, response) == [], (
+            'Уже отправленный статус не должен отправляться повторно'
+        )
+        assert homework.STATE_STORE.load_cursor('a') == 50
+
+
+class TestCompactState:
+
+    def test_status_codes_are_shared(self):
+        table = StatusTable(['approved'])
+        assert table.code('approved') == 0
+        assert table.code(''.join(['revie', 'wing'])) == 1
+        assert table.name(1) is table.name(table.code('reviewing'))
+        assert len(table) == 2
+
+    def test_homework_key(self):
+        assert homework_key(7) == homework_key('7') == 7
+        assert homework_key('007') == '007', 'Ведущие нули сохраняются'
+        assert homework_key('hw-1') == 'hw-1'
+
+    def test_cursor_table(self):
+        cursors = CursorTable()
+        cursors['a'] = 10
+        cursors['b'] = 20
+        cursors['a'] = 15
+        assert cursors.get('a') == 15 and 'b' in cursors
+        assert cursors.get('c', 0) == 0 and 'c' not in cursors
+        assert sorted(cursors.items()) == [('a', 15), ('b', 20)]
+
+    def test_status_row(self):
+        row = StatusRow()
+        row[1] = 5
+        row[5] = 2
+        row['hw-1'] = 1
+        row[2 ** 70] = 3
+        row[5] = 4
+        assert row.get(5) == 4, 'Код статуса не должен находиться как id'
+        assert row.get(1) == 5 and row.get(2) is None
+        assert sorted(row, key=str) == sorted([1, 5, 'hw-1', 2 ** 70],
+                                              key=str)
+        assert row.pop(1) == 5 and row.pop(1) is None
+        assert dict(row.items()) == {5: 4, 'hw-1': 1, 2 ** 70: 3}
+        assert len(row) == 3 and sorted(row.values()) == [1, 3, 4]
+
+    def test_store_answers_by_status(self):
+        store = StateStore()
+        store.save_status('a', 1, 'reviewing')
+        store.save_status('a', '2', 'approved')
+        assert store.last_status('a', '1') == 'reviewing'
+        assert store.has_status('a', 'reviewing')
+        assert not store.has_status('a', 'rejected')
+        assert not store.has_status('b', 'reviewing')
+
+    def test_tenant_has_no_dict(self):
+        tenant = Tenant('a', 't', 1)
+        assert not hasattr(tenant, '__dict__'), (
+            'Tenant должен хранить поля в __slots__'
+        )
+
+
+class TestAllHomeworks:
+
+    def test_every_changed_homework_in_one_message(self, homework):
+        tenant = Tenant('a', 't', 1, 0)
+        homework.STATE_STORE.save_status('a', 2, 'reviewing')
+        response = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'reviewing'},
+                {'id': 3, 'homework_name': 'hw3', 'status': 'rejected'},
+            ],
+            'current_date': 50,
+        }
+        messages = homework.handle_response(tenant, response)
+        assert len(messages) == 1, (
+            'Изменения из одного ответа должны уходить одним сообщением'
+        )
+        assert '"hw1"' in messages[0] and '"hw3"' in messages[0]
+        assert '"hw2"' not in messages[0], (
+            'Работа с неизменившимся статусом не должна попадать в сообщение'
+        )
+
+    def test_unknown_status_skipped(self, homework):
+        tenant = Tenant('a', 't', 1, 0)
+        response = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'unknown'},
+            ],
+        }
+        unknown = homework.UNKNOWN_STATUSES.value()
+        messages = homework.handle_response(tenant, response)
+        assert len(messages) == 1 and '"hw1"' in messages[0], (
+            'Неизвестный статус одной работы не должен терять остальные'
+        )
+        assert homework.UNKNOWN_STATUSES.value() == unknown + 1
+        assert homework.STATE_STORE.last_status('a', 2) is None
+
+    def test_statuses_not_saved_when_parsing_fails(self, homework):
+        tenant = Tenant('a', 't', 1, 0)
+        with pytest.raises(TypeError):
+            homework.handle_response(tenant, {'homeworks': 'hw1'})
+        assert homework.STATE_STORE.tenant_statuses('a') == {}
+
+    def test_join_messages_respects_limit(self, homework):
+        chunks = homework.join_messages(['a' * 6, 'b' * 6, 'c' * 25],
+                                        limit=14)
+        assert chunks == ['a' * 6 + '\n\n' + 'b' * 6,
+                          'c' * 14, 'c' * 11]
@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+
+from breaker import CircuitBreaker
+from streaming import HomeworkStream
+from tenants import Tenant
+
+
+def chunked(data, size):
+    return (data[start:start + size] for start in range(0, len(data), size))
+
+
+def history(count):
+    return {
+        'current_date': 100,
+        'homeworks': [
+            {'id': index, 'homework_name': f'работа {index}',
+             'status': 'approved', 'lesson_name': 'x' * 10}
+            for index in range(count)
+        ],
+    }
+
+
+class TestHomeworkStream:
+
+    @pytest.mark.parametrize('size', [1, 3, 7, 4096])
+    def test_same_result_for_any_chunking(self, size):
+        body = history(20)
+        stream = HomeworkStream(chunked(json.dumps(
+            body, ensure_ascii=False).encode(), size))
+        assert list(stream) == body['homeworks'], (
+            'Разбор по частям должен совпадать с json.loads'
+        )
+        assert stream.current_date == 100
+
+    def test_current_date_after_homeworks(self):
+        data = b'{"homeworks": [{"id": 1}], "current_date": 7}'
+        stream = HomeworkStream(chunked(data, 5))
+        assert list(stream) == [{'id': 1}]
+        assert stream.current_date == 7
+
+    def test_items_yielded_before_end_of_body(self):
+        read = []
+
+        def chunks():
+            for chunk in chunked(json.dumps(history(1000)).encode(), 256):
+                read.append(len(chunk))
+                yield chunk
+
+        stream = iter(HomeworkStream(chunks()))
+        assert next(stream)['id'] == 0
+        assert len(read) < 5, (
+            'Первая работа должна быть отдана без чтения всего ответа'
+        )
+
+    @pytest.mark.parametrize('data, error', [
+        (b'[]', TypeError),
+        (b'{"current_date": 1}', KeyError),
+        (b'{"homeworks": {}}', TypeError),
+        (b'{"homeworks": [{"id": 1}', json.JSONDecodeError),
+    ])
+    def test_errors_match_check_response(self, data, error):
+        with pytest.raises(error):
+            list(HomeworkStream(chunked(data, 4)))
+
+    def test_close_called_after_iteration(self):
+        closed = []
+        list(HomeworkStream([b'{"homeworks": []}'],
+                            on_close=lambda: closed.append(True)))
+        assert closed == [True]
+
+
+class TestBackfill:
+
+    @pytest.fixture
+    def homework_settings(self):
+        return {'STREAM_BACKFILL_AGE': 0}
+
+    def test_backfill_poll_streams_and_moves_cursor(self, homework,
+                                                    monkeypatch):
+        data = json.dumps(history(3), ensure_ascii=False).encode()
+        monkeypatch.setattr(
+            homework, 'request_stream_statuses',
+            lambda token, from_date: HomeworkStream(chunked(data, 16))
+        )
+        sent = []
+        monkeypatch.setattr(
+            homework, 'send_to_chat',
+            lambda bot, chat_id, message, *args: sent.append(message)
+        )
+        tenant = Tenant('a', 't', 1, 0)
+        assert homework.is_backfill(tenant)
+        assert homework.poll_tenant(None, tenant)
+        assert len(sent) == 1, 'Изменения склеиваются в одно сообщение'
+        assert all(f'работа {index}' in sent[0] for index in range(3))
+        assert tenant.from_date == 100
+        sent.clear()
+        tenant.from_date = 0
+        assert not homework.poll_tenant(None, tenant), (
+            'Повторные статусы из истории не отправляются'
+        )
+        assert sent == []
+
+    @pytest.mark.parametrize('mode', ['sync', 'async'])
+    def test_broken_stream_rolls_back(self, homework, monkeypatch, mode):
+        body = json.dumps(history(3), ensure_ascii=False).encode()
+        data = [body[:-20]]
+        monkeypatch.setattr(homework, 'API_BREAKER', CircuitBreaker(100))
+        monkeypatch.setattr(
+            homework, 'request_stream_statuses',
+            lambda token, from_date: HomeworkStream(chunked(data[0], 16))
+        )
+        sent = []
+        monkeypatch.setattr(
+            homework, 'send_to_chat',
+            lambda bot, chat_id, message, *args: sent.append(message)
+        )
+        tenant = Tenant('a', 't', 1, 0)
+        if mode == 'sync':
+            with pytest.raises(json.JSONDecodeError):
+                homework.poll_tenant(None, tenant)
+        else:
+            runner = homework.BoundedRunner(2)
+            asyncio.run(homework.poll_tenant_async(runner, None, tenant))
+            runner.close()
+        assert homework.STATE_STORE.tenant_statuses('a') == {}, (
+            'Статусы из оборванного ответа не должны считаться отправленными'
+        )
+        assert tenant.from_date == 0
+        sent.clear()
+        data[0] = body
+        assert homework.poll_tenant(None, tenant)
+        assert all(f'работа {index}' in sent[-1] for index in range(3)), (
+            'Повторный опрос должен отправить статусы из оборванного ответа'
+        )
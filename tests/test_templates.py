@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+import templates
+from exceptions import UnknownStatusError
+from templates import TemplateCatalog, compile_template
+from tenants import Tenant, TenantRegistry
+
+CATALOG = {
+    'ru': {
+        'verdicts': {'approved': 'Принято.', 'revision': 'Нужна доработка.'},
+        'messages': {
+            'revision': 'Работа "{homework_name}" ({lesson_name}): {verdict}',
+        },
+    },
+    'en': {
+        'message': 'Homework "{homework_name}": {verdict}',
+        'verdicts': {'approved': 'Approved.'},
+    },
+}
+
+
+class TestTemplates:
+
+    def test_compile_substitutes_constants(self):
+        parts = compile_template('{verdict} "{homework_name}"!',
+                                 {'verdict': 'Ок'})
+        assert parts == ('Ок "', ('homework_name',), '"!')
+
+    def test_locales_and_custom_status(self):
+        catalog = TemplateCatalog(CATALOG)
+        homework = {'homework_name': 'hw', 'status': 'approved',
+                    'lesson_name': 'Спринт 1'}
+        assert catalog.render(homework) == (
+            'Изменился статус проверки работы "hw". Принято.'
+        )
+        assert catalog.render(homework, 'en') == 'Homework "hw": Approved.'
+        homework['status'] = 'revision'
+        assert catalog.render(homework) == (
+            'Работа "hw" (Спринт 1): Нужна доработка.'
+        )
+        assert catalog.render(homework, 'en') == catalog.render(homework), (
+            'Статус без перевода берётся из локали по умолчанию'
+        )
+        assert catalog.render(homework, 'de') == catalog.render(homework)
+
+    def test_from_file(self, tmp_path):
+        path = tmp_path / 'templates.json'
+        path.write_text(json.dumps(CATALOG), encoding='utf-8')
+        catalog = TemplateCatalog.from_file(path)
+        assert catalog.knows('revision', 'en')
+        assert not catalog.knows('unknown')
+        catalog = TemplateCatalog.from_file(path, 'en')
+        assert not catalog.knows('revision'), (
+            'Локаль по умолчанию задаёт набор известных статусов'
+        )
+
+    def test_batch_does_not_reparse_templates(self, monkeypatch):
+        catalog = TemplateCatalog(CATALOG)
+        parsed = []
+        original = templates.Formatter.parse
+        monkeypatch.setattr(
+            templates.Formatter, 'parse',
+            lambda self, text: parsed.append(text) or original(self, text)
+        )
+        homeworks = [{'homework_name': f'hw{index}', 'status': 'revision'}
+                     for index in range(1000)]
+        assert len(catalog.render_many(homeworks)) == 1000
+        assert parsed == [], 'Шаблоны разбираются один раз при загрузке'
+
+
+class TestLocalizedTenants:
+
+    def test_tenant_locale_from_file(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'id': 'a', 'token': 't', 'chat_id': 1, 'locale': 'en'},
+        ]), encoding='utf-8')
+        assert TenantRegistry.from_file(path).get('a').locale == 'en'
+
+    def test_handle_response_uses_tenant_locale(self, homework, monkeypatch):
+        monkeypatch.setattr(homework, 'TEMPLATES', TemplateCatalog(CATALOG))
+        tenant = Tenant('a', 't', 1, locale='en')
+        messages = homework.handle_response(tenant, {'homeworks': [
+            {'id': 1, 'homework_name': 'hw', 'status': 'approved'},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'revision'},
+        ]})
+        assert messages == [
+            'Homework "hw": Approved.\n\nРабота "hw2" (): Нужна доработка.'
+        ]
+        with pytest.raises(UnknownStatusError):
+            homework.parse_status({'homework_name': 'hw', 'status': 'x'})
@@ -0,0 +1,66 @@
+import json
+
+from tenants import PollScheduler, Tenant, TenantRegistry
+
+
+class TestTenants:
+
+    def test_registry_from_file(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'id': 'a', 'token': 't1', 'chat_id': 1, 'from_date': 5},
+            {'token': 't2', 'chat_id': 2},
+        ]))
+        registry = TenantRegistry.from_file(path, default_from_date=100)
+        assert len(registry) == 2
+        assert registry.get('a').from_date == 5
+        assert registry.get('2').from_date == 100, (
+            'Без id получатель должен получать идентификатор по chat_id, '
+            'а без from_date — значение по умолчанию'
+        )
+
+    def test_spread_is_even(self):
+        scheduler = PollScheduler(period=600)
+        scheduler.spread(['a', 'b', 'c', 'd'], start=1000)
+        due = scheduler.pop_due(now=2000)
+        assert [at for _, at in due] == [1000, 1150, 1300, 1450], (
+            'Опросы должны быть равномерно распределены внутри периода'
+        )
+
+    def test_pop_due_only_expired(self):
+        scheduler = PollScheduler(period=600)
+        scheduler.spread(['a', 'b'], start=0)
+        assert scheduler.pop_due(now=0) == [('a', 0)]
+        assert scheduler.next_due() == 300
+        assert len(scheduler) == 1
+
+    def test_reschedule_and_cancel(self):
+        scheduler = PollScheduler(period=600)
+        scheduler.schedule('a', 10)
+        scheduler.schedule('a', 50)
+        scheduler.schedule('b', 20)
+        scheduler.cancel('b')
+        assert scheduler.pop_due(now=30) == []
+        assert scheduler.pop_due(now=60) == [('a', 50)]
+        assert scheduler.next_due() is None
+
+    def test_cursor_is_per_tenant(self, homework, monkeypatch):
+        responses = {
+            't1': {'homeworks': [], 'current_date': 111},
+            't2': {'homeworks': [], 'current_date': 222},
+        }
+        monkeypatch.setattr(
+            homework, 'request_statuses',
+            lambda token, from_date: responses[token]
+        )
+        registry = TenantRegistry([
+            Tenant('a', 't1', 1, 0), Tenant('b', 't2', 2, 0)
+        ])
+        scheduler = PollScheduler(period=600)
+        scheduler.spread(registry.ids(), start=0)
+        homework.poll_due_tenants(None, registry, scheduler, now=300)
+        assert registry.get('a').from_date == 111
+        assert registry.get('b').from_date == 222
+        assert len(scheduler) == 2, (
+            'После опроса получатель должен снова попасть в расписание'
+        )
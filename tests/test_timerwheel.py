@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from tenants import PollScheduler
+from timerwheel import TimerWheel
+
+
+class TestTimerWheel:
+
+    def test_spread_is_even(self):
+        wheel = TimerWheel(period=600)
+        wheel.spread(['a', 'b', 'c', 'd'], start=1000)
+        due = wheel.pop_due(now=2000)
+        assert [at for _, at in due] == [1000, 1150, 1300, 1450]
+
+    def test_pop_due_only_expired(self):
+        wheel = TimerWheel(period=600, resolution=10)
+        wheel.schedule('a', 0)
+        wheel.schedule('b', 5)
+        assert wheel.pop_due(now=3) == [('a', 0)], (
+            'Срок внутри текущего тика не должен наступать раньше времени'
+        )
+        assert wheel.next_due() == 5
+        assert wheel.pop_due(now=5) == [('b', 5)]
+        assert len(wheel) == 0 and wheel.next_due() is None
+
+    def test_reschedule_and_cancel(self):
+        wheel = TimerWheel(period=600)
+        wheel.schedule('a', 10)
+        wheel.schedule('a', 50)
+        wheel.schedule('b', 20)
+        wheel.cancel('b')
+        wheel.cancel('missing')
+        assert wheel.pop_due(now=30) == []
+        assert wheel.pop_due(now=60) == [('a', 50)]
+        assert wheel.next_due() is None
+
+    def test_far_deadlines(self):
+        wheel = TimerWheel(period=600, slots=4, levels=2)
+        deadlines = {'near': 2, 'mid': 9, 'later': 100, 'far': 1000}
+        wheel.schedule('start', 0)
+        for tenant_id, at in deadlines.items():
+            wheel.schedule(tenant_id, at)
+        assert wheel.next_due() == 0
+        assert wheel.pop_due(now=50) == [
+            ('start', 0), ('near', 2), ('mid', 9)
+        ]
+        assert wheel.next_due() == 100
+        assert wheel.pop_due(now=float('inf')) == [
+            ('later', 100), ('far', 1000)
+        ]
+
+    def test_lag(self):
+        wheel = TimerWheel(period=600)
+        assert wheel.lag(100) == 0.0
+        wheel.schedule('a', 40)
+        assert wheel.lag(30) == 0.0
+        assert wheel.lag(100) == 60
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_matches_heap_scheduler(self, seed):
+        rnd = random.Random(seed)
+        heap = PollScheduler(period=600)
+        wheel = TimerWheel(period=600, slots=8, levels=2)
+        now = 1000.0
+        for tenant in range(200):
+            at = now + rnd.uniform(0, 2000)
+            heap.schedule(tenant, at)
+            wheel.schedule(tenant, at)
+        for _ in range(300):
+            now += rnd.uniform(0, 20)
+            action = rnd.random()
+            tenant = rnd.randrange(250)
+            if action < 0.3:
+                at = now + rnd.expovariate(1 / 300)
+                heap.schedule(tenant, at)
+                wheel.schedule(tenant, at)
+            elif action < 0.4:
+                heap.cancel(tenant)
+                wheel.cancel(tenant)
+            due = wheel.pop_due(now)
+            assert due == heap.pop_due(now), (
+                'Колесо должно отдавать те же сроки, что и куча'
+            )
+            assert wheel.next_due() == heap.next_due()
+            assert len(wheel) == len(heap)
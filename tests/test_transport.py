@@ -0,0 +1,78 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from transport import PooledSession
+
+
+class StatusesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StatusesHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+class TestPooledSession:
+
+    def test_connection_is_reused(self, local_url):
+        session = PooledSession(pool_size=2)
+        for _ in range(5):
+            assert session.get(local_url).json()['current_date'] == 1
+        assert session.stats() == {'hits': 4, 'misses': 1}, (
+            'Повторные запросы должны идти по соединению из пула'
+        )
+        session.close()
+
+    def test_default_timeout(self):
+        calls = []
+
+        class FakeSession:
+            def mount(self, prefix, adapter):
+                pass
+
+            def get(self, url, **kwargs):
+                calls.append(kwargs)
+
+        session = PooledSession(connect_timeout=1, read_timeout=2,
+                                session=FakeSession())
+        session.get('http://example')
+        session.get('http://example', timeout=9)
+        assert calls == [{'timeout': (1, 2)}, {'timeout': 9}]
+
+    def test_homework_uses_injected_session(self, homework, monkeypatch):
+        seen = []
+
+        class FakeResponse:
+            status_code = 200
+
+            def json(self):
+                return {'homeworks': [], 'current_date': 7}
+
+        class FakeHttp:
+            def get(self, url, headers=None, params=None):
+                seen.append((headers['Authorization'], params['from_date']))
+                return FakeResponse()
+
+        monkeypatch.setattr(homework, 'HTTP_SESSION', FakeHttp())
+        assert homework.request_statuses('tok', 3)['current_date'] == 7
+        assert seen == [('OAuth tok', 3)]
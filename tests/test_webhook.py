@@ -0,0 +1,110 @@
+import http.client
+import json
+from urllib.parse import urlsplit
+
+import pytest
+
+from tenants import Tenant, TenantRegistry
+from webhook import SIGNATURE_HEADER, sign, start_webhook_server
+
+SECRET = 'webhook-secret'
+EVENT = {
+    'homeworks': [{'id': 1, 'homework_name': 'hw', 'status': 'approved'}],
+    'current_date': 50,
+}
+
+
+def post(url, payload, secret=SECRET, length=None):
+    """Отправляет событие; length='' — запрос без Content-Length."""
+    body = payload if isinstance(payload, bytes) else json.dumps(
+        payload).encode()
+    if length is None:
+        length = str(len(body))
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port,
+                                            timeout=5)
+    try:
+        connection.putrequest('POST', parts.path)
+        if length:
+            connection.putheader('Content-Length', length)
+        if secret:
+            connection.putheader(SIGNATURE_HEADER, sign(secret, body))
+        connection.endheaders(body)
+        return connection.getresponse().status
+    finally:
+        connection.close()
+
+
+@pytest.fixture(scope='module')
+def webhook_server():
+    received = []
+
+    def ingest(tenant_id, event):
+        if tenant_id != 'a':
+            return False
+        if 'homeworks' not in event:
+            raise KeyError('homeworks')
+        received.append((tenant_id, event))
+        return True
+
+    server = start_webhook_server(ingest, 0, '127.0.0.1', SECRET)
+    server.received = received
+    server.url = f'http://127.0.0.1:{server.server_port}/events/'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def server(webhook_server):
+    webhook_server.received.clear()
+    return webhook_server
+
+
+class TestWebhookServer:
+
+    def test_accepted(self, server):
+        assert post(server.url + 'a', EVENT) == 202
+        assert server.received == [('a', EVENT)]
+
+    @pytest.mark.parametrize('tenant, payload, secret, length, code', [
+        ('a', EVENT, 'wrong', None, 401),
+        ('a', EVENT, None, None, 401),
+        ('b', EVENT, SECRET, None, 404),
+        ('a', b'{not json', SECRET, None, 400),
+        ('a', {'current_date': 1}, SECRET, None, 422),
+        ('a', EVENT, SECRET, '', 400),
+        ('a', EVENT, SECRET, '-1', 400),
+        ('a', EVENT, SECRET, 'ten', 400),
+        ('a', EVENT, SECRET, str(2 ** 21), 413),
+    ])
+    def test_rejected(self, server, tenant, payload, secret, length, code):
+        assert post(server.url + tenant, payload, secret, length) == code
+        assert server.received == []
+
+
+class TestServerSecurity:
+
+    def test_public_bind_requires_secret(self):
+        with pytest.raises(ValueError):
+            start_webhook_server(lambda *args: True, 0, '0.0.0.0', None)
+
+
+class TestIngestEvent:
+
+    def test_event_goes_through_send_path(self, homework, monkeypatch):
+        sent = []
+        monkeypatch.setattr(
+            homework, 'send_to_chat',
+            lambda bot, chat, message, *args: sent.append((chat, message))
+        )
+        registry = TenantRegistry([Tenant('a', 't', 7, 0)])
+        assert homework.ingest_event(None, registry, 'a', EVENT)
+        assert sent == [(7, homework.parse_status(EVENT['homeworks'][0]))]
+        assert registry.get('a').from_date == 0, (
+            'Событие не должно сдвигать курсор сверочного опроса'
+        )
+        assert homework.STATE_STORE.load_cursor('a') is None
+        assert homework.ingest_event(None, registry, 'a', EVENT)
+        assert len(sent) == 1, 'Повторное событие не отправляется снова'
+        assert not homework.ingest_event(None, registry, 'x', EVENT)
@@ -0,0 +1,138 @@
+"""Иерархическое колесо таймеров для сроков опроса получателей.
+
+Куча в PollScheduler платит O(log n) за каждый перенос и копит
+устаревшие записи; колесо ставит, снимает и переносит срок за O(1)
+независимо от числа получателей.
+"""
+import math
+from operator import itemgetter
+
+
+class TimerWheel:
+    """Сроки опроса в иерархическом колесе таймеров.
+
+    Нижний уровень — ячейки по одному тику в resolution секунд, каждая
+    хранит свои сроки. Верхние уровни, в slots раз шире предыдущего,
+    хранят только число занятых ячеек под собой: по ним pop_due и
+    next_due перешагивают пустые участки. Сроки между уровнями не
+    перекладываются, поэтому тик с миллионом получателей в расписании
+    стоит столько же, сколько сроков в нём наступило. Интерфейс
+    совпадает с PollScheduler.
+    """
+
+    def __init__(self, period, resolution=1.0, slots=64, levels=3):
+        self.period = period
+        self.resolution = resolution
+        self._spans = [slots ** level for level in range(1, levels + 1)]
+        self._occupied = [{} for _ in self._spans]
+        self._buckets = {}
+        self._where = {}
+        self._current = None
+
+    def spread(self, tenant_ids, start):
+        """Расставляет опросы с равным шагом внутри одного периода."""
+        tenant_ids = list(tenant_ids)
+        if not tenant_ids:
+            return
+        step = self.period / len(tenant_ids)
+        for index, tenant_id in enumerate(tenant_ids):
+            self.schedule(tenant_id, start + index * step)
+
+    def schedule(self, tenant_id, at):
+        """Назначает (или переносит) срок опроса получателя."""
+        if self._current is None:
+            self._current = self._tick(at)
+        self.cancel(tenant_id)
+        # Просроченный срок ждёт в текущем тике: раньше он не наступит.
+        tick = max(self._tick(at), self._current)
+        bucket = self._buckets.get(tick)
+        if bucket is None:
+            bucket = self._buckets[tick] = {}
+            for span, occupied in zip(self._spans, self._occupied):
+                occupied[tick // span] = occupied.get(tick // span, 0) + 1
+        bucket[tenant_id] = at
+        self._where[tenant_id] = tick
+
+    def cancel(self, tenant_id):
+        """Снимает получателя с расписания."""
+        tick = self._where.pop(tenant_id, None)
+        if tick is None:
+            return
+        bucket = self._buckets[tick]
+        del bucket[tenant_id]
+        if not bucket:
+            self._drop(tick)
+
+    def pop_due(self, now):
+        """Возвращает пары (tenant_id, срок) для наступивших сроков."""
+        due = []
+        if not self._where:
+            return due
+        if math.isfinite(now):
+            target = max(self._tick(now), self._current)
+        else:
+            target = max(self._buckets)
+        while self._where:
+            self._current = self._next_occupied(self._current, target)
+            bucket = self._buckets.get(self._current)
+            if bucket is None:
+                break
+            ripe = sorted(bucket.items(), key=itemgetter(1))
+            if self._current == target:
+                ripe = [(tenant_id, at) for tenant_id, at in ripe if at <= now]
+            if len(ripe) == len(bucket):
+                self._drop(self._current)
+            else:
+                for tenant_id, _ in ripe:
+                    del bucket[tenant_id]
+            for tenant_id, _ in ripe:
+                del self._where[tenant_id]
+            due.extend(ripe)
+            if self._current == target:
+                break
+            self._current += 1
+        return due
+
+    def next_due(self):
+        """Ближайший срок опроса или None, если расписание пусто."""
+        if not self._where:
+            return None
+        tick = self._next_occupied(self._current, math.inf)
+        return min(self._buckets[tick].values())
+
+    def lag(self, now):
+        """На сколько секунд просрочен самый ранний ожидающий срок."""
+        earliest = self.next_due()
+        if earliest is None:
+            return 0.0
+        return max(0.0, now - earliest)
+
+    def __len__(self):
+        return len(self._where)
+
+    def _tick(self, at):
+        return math.floor(at / self.resolution)
+
+    def _drop(self, tick):
+        del self._buckets[tick]
+        for span, occupied in zip(self._spans, self._occupied):
+            group = tick // span
+            if occupied[group] == 1:
+                del occupied[group]
+            else:
+                occupied[group] -= 1
+
+    def _next_occupied(self, tick, limit):
+        """Первый занятый тик не раньше tick, но не дальше limit.
+
+        Пустую ячейку верхнего уровня перешагиваем целиком, поэтому долгий
+        простой не перебирается по тикам.
+        """
+        while tick < limit and tick not in self._buckets:
+            step = 1
+            for span, occupied in zip(self._spans, self._occupied):
+                if tick // span in occupied:
+                    break
+                step = span
+            tick = min(limit, (tick // step + 1) * step)
+        return tick
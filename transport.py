@@ -0,0 +1,50 @@
+"""Пул постоянных HTTP-соединений к API Практикума."""
+from startup import lazy_import
+
+requests = lazy_import('requests')
+
+
+class PooledSession:
+    """Сессия requests с keep-alive, размером пула и таймаутами.
+
+    Совместима с requests.get по сигнатуре get(url, **kwargs), поэтому
+    подставляется вместо модуля requests без изменения вызывающего кода.
+    """
+
+    def __init__(self, pool_size=10, connect_timeout=5, read_timeout=30,
+                 session=None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = session or requests.Session()
+        self.adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+    def get(self, url, **kwargs):
+        """Выполняет GET-запрос через общий пул соединений."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def stats(self):
+        """Возвращает число запросов по уже открытым и новым соединениям.
+
+        Промах — запрос, для которого пришлось открыть новое соединение
+        (TCP+TLS), попадание — запрос по соединению из пула.
+        """
+        pools = self.adapter.poolmanager.pools
+        requests_total = connections = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_total += pool.num_requests
+            connections += pool.num_connections
+        return {
+            'hits': requests_total - connections,
+            'misses': connections,
+        }
+
+    def close(self):
+        """Закрывает все соединения пула."""
+        self.session.close()
@@ -0,0 +1,117 @@
+"""Приём событий о статусах работ по HTTP вместо ожидания опроса.
+
+POST /events/<id получателя> с телом в формате ответа API
+({"homeworks": [...], "current_date": ...}). Если задан секрет, тело
+подписывается HMAC-SHA256, подпись передаётся в заголовке X-Signature
+в виде sha256=<hex>.
+"""
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+EVENTS_PATH = '/events/'
+SIGNATURE_HEADER = 'X-Signature'
+MAX_BODY = 1024 * 1024
+LOCAL_HOSTS = ('127.0.0.1', '::1', 'localhost')
+
+
+def sign(secret, body):
+    """Подпись тела события для заголовка X-Signature."""
+    digest = hmac.new(secret.encode('utf-8'), body, hashlib.sha256)
+    return 'sha256=' + digest.hexdigest()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Обработчик событий; ingest и secret задаёт start_webhook_server."""
+
+    protocol_version = 'HTTP/1.1'
+    ingest = None
+    secret = None
+
+    def _reply(self, code, text):
+        body = json.dumps({'status': text}).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _content_length(self):
+        """Длина тела из заголовка; None, если её нет или она неверна."""
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            return None
+        return length if length >= 0 else None
+
+    def _read_body(self):
+        """Читает тело запроса; None, если ответ уже отправлен."""
+        length = self._content_length()
+        if length is None:
+            # Непрочитанное тело нельзя отделить от следующего запроса.
+            self.close_connection = True
+            self._reply(400, 'bad content length')
+            return None
+        if length > MAX_BODY:
+            self.close_connection = True
+            self._reply(413, 'too large')
+            return None
+        body = self.rfile.read(length)
+        if self.secret is not None and not hmac.compare_digest(
+            self.headers.get(SIGNATURE_HEADER, ''), sign(self.secret, body)
+        ):
+            self._reply(401, 'bad signature')
+            return None
+        return body
+
+    def do_POST(self):
+        """Принимает событие для получателя из пути запроса."""
+        path = self.path.split('?')[0]
+        if not path.startswith(EVENTS_PATH):
+            self._reply(404, 'not found')
+            return
+        body = self._read_body()
+        if body is None:
+            return
+        try:
+            event = json.loads(body)
+        except ValueError:
+            self._reply(400, 'bad json')
+            return
+        try:
+            accepted = self.ingest(unquote(path[len(EVENTS_PATH):]), event)
+        except (TypeError, KeyError, ValueError) as error:
+            self._reply(422, str(error))
+            return
+        if accepted:
+            self._reply(202, 'accepted')
+        else:
+            self._reply(404, 'unknown tenant')
+
+    def log_message(self, *args):
+        """Не пишет каждый запрос в лог."""
+
+
+def start_webhook_server(ingest, port, host='0.0.0.0', secret=None):
+    """Запускает в фоновом потоке сервер приёма событий.
+
+    ingest(id получателя, событие) возвращает False для неизвестного
+    получателя, а для некорректного события выбрасывает TypeError,
+    KeyError или ValueError. Без секрета сервер слушает только
+    локальный адрес: иначе кто угодно мог бы писать в чаты получателей.
+    """
+    if not secret and host not in LOCAL_HOSTS:
+        raise ValueError('Для приёма событий не с localhost задайте '
+                         'WEBHOOK_SECRET')
+    handler = type('WebhookHandler', (WebhookHandler,), {
+        'ingest': staticmethod(ingest), 'secret': secret,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever,
+                              name='webhook-http', daemon=True)
+    thread.start()
+    return server